@@ -1,5 +1,5 @@
 # backend/app/__init__.py
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify
 from flask_cors import CORS
 from config import Config
 
@@ -17,7 +17,7 @@ def create_app():
             "origins": "*",  # Allow all origins
             "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
             "allow_headers": ["Content-Type", "Authorization", "X-Requested-With"],
-            "expose_headers": ["Content-Type", "X-Session-ID"],
+            "expose_headers": ["Content-Type", "X-Session-ID", "Retry-After"],
             "supports_credentials": False,  # Set to False when using origins: "*"
             "max_age": 3600
         }
@@ -37,4 +37,40 @@ def create_app():
     def health_check():
         return jsonify({"status": "ok"})
 
+    # Prometheus-style metrics for this worker
+    @app.route('/api/metrics')
+    def metrics():
+        from .core.metrics import render_metrics
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    # Build the model client, chains and agent ahead of the first real request
+    @app.route('/api/warmup', methods=['POST'])
+    def warmup():
+        from .core.agents import warm_up
+        try:
+            warm_up()
+        except Exception as e:
+            return jsonify({"status": "error", "error": str(e)}), 503
+        return jsonify({"status": "ok"})
+
+    # Runtime counters for the shared caches and stores
+    @app.route('/api/stats')
+    def stats():
+        from .core.cache import response_cache
+        from .core.coalesce import request_coalescer
+        from .core.intents import fast_path_stats
+        from .core.limiter import upstream_limiter
+        from .core.prompt_cache import prompt_cache_accounting
+        from .core.sessions import session_store
+        from .core.store import expense_store
+        return jsonify({
+            "response_cache": response_cache.stats(),
+            "coalescing": request_coalescer.stats(),
+            "upstream_limiter": upstream_limiter.stats(),
+            "prompt_cache": prompt_cache_accounting.stats(),
+            "sessions": session_store.stats(),
+            "expense_store": expense_store.stats(),
+            "tracker_fast_path": fast_path_stats.stats(),
+        })
+
     return app
\ No newline at end of file
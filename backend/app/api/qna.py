@@ -1,57 +1,55 @@
 # backend/app/api/qna.py
 from flask import Blueprint, request, Response
-from app.core.agents import get_qna_chain
+from app.core.agents import get_qna_chain, get_model_name
+from app.core.cache import cache_key, response_cache
+from app.core.coalesce import request_coalescer
+from app.core.limiter import LimiterBusy, LimiterCallbackHandler, PRIORITY_INTERACTIVE, busy_response, upstream_limiter
+from app.core.metrics import MetricsCallbackHandler, REQUESTS, instrument_stream
+from app.core.streaming import iter_chain, paced, with_error_message, stream_response
 import time
 
 qna_bp = Blueprint('qna', __name__)
-qna_chain = get_qna_chain()
 
 @qna_bp.route('/api/qna', methods=['POST'])
 def ask_question():
+    started = time.perf_counter()
     data = request.get_json()
     if not data or 'question' not in data:
         return Response('{"error": "Missing \'question\' in request body"}', status=400, mimetype='application/json')
 
     question = data['question']
 
-    def generate():
+    # Chunks are forwarded as soon as the model emits them; any typing effect
+    # is left to the client unless STREAM_PACING=typewriter is configured.
+    # Answers are deterministic (temperature 0), so repeated questions are
+    # served from the response cache without pacing. Identical questions
+    # arriving while the first is still streaming share its model call.
+    key = cache_key("qna", "", get_model_name(), question)
+    cached = response_cache.get(key)
+    if cached is not None:
+        REQUESTS.inc(endpoint="qna", path="cache")
+        chunks = iter([cached])
+    else:
+        # A request that would start a new upstream call is turned away
+        # while the limiter queue is backed up; one joining an in-flight
+        # call never is. The model call itself waits for a permit in the
+        # callback, so the request holds none while it streams.
+        config = {"callbacks": [LimiterCallbackHandler(upstream_limiter, PRIORITY_INTERACTIVE),
+                                MetricsCallbackHandler("qna")]}
         try:
-            # Try streaming first
-            stream_worked = False
-            for chunk in qna_chain.stream(question):
-                if hasattr(chunk, 'content') and chunk.content:
-                    stream_worked = True
-                    # Send character by character for ChatGPT-like streaming
-                    content = chunk.content
-                    # Send 1 character at a time for visible streaming effect
-                    for char in content:
-                        yield char
-                        time.sleep(0.03)  # 30ms delay for slower, more readable streaming
-            
-            # If no streaming chunks were received, fall back to regular invoke
-            if not stream_worked:
-                result = qna_chain.invoke(question)
-                if hasattr(result, 'content'):
-                    content = result.content
-                else:
-                    content = str(result)
-                
-                # Stream character by character even for non-streaming response
-                for char in content:
-                    yield char
-                    time.sleep(0.03)  # 30ms delay for slower, more readable streaming
-                    
-        except Exception as e:
-            error_msg = f"Error: An error occurred during streaming: {str(e)}"
-            for char in error_msg:
-                yield char
+            shared = request_coalescer.stream(
+                key, lambda: response_cache.record(key, iter_chain(get_qna_chain, question, config)),
+                admit=upstream_limiter.admit,
+            )
+        except LimiterBusy as e:
+            REQUESTS.inc(endpoint="qna", path="rejected")
+            return busy_response(e)
+        REQUESTS.inc(endpoint="qna", path="model")
+        chunks = with_error_message(paced(shared))
+    chunks = instrument_stream("qna", chunks, started)
 
     # Return a streaming response with proper headers
-    return Response(generate(), 
-                   mimetype='text/plain',
-                   headers={
-                       'Cache-Control': 'no-cache',
-                       'Connection': 'keep-alive',
-                       'Access-Control-Allow-Origin': '*',
-                       'Access-Control-Allow-Headers': 'Content-Type'
-                   })
\ No newline at end of file
+    return stream_response(chunks, headers={
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type'
+    })
@@ -1,55 +1,126 @@
 # backend/app/api/summarizer.py
 from flask import Blueprint, request, Response
-from app.core.agents import get_summarizer_chain
+from app.core.agents import (
+    get_summarizer_chain, get_model_name,
+    SUMMARIZER_TEMPLATE, CHUNK_SUMMARY_TEMPLATE, COMBINE_SUMMARY_TEMPLATE,
+)
+from app.core.batch_summary import summarize_batch
+from app.core.cache import cache_key, response_cache
+from app.core.coalesce import request_coalescer
+from app.core.limiter import (
+    LimiterBusy, LimiterCallbackHandler, PRIORITY_BATCH, PRIORITY_SUMMARY, busy_response, upstream_limiter,
+)
+from app.core.long_summary import is_long_document, summarize_long
+from app.core.metrics import MetricsCallbackHandler, REQUESTS, instrument_stream
+from app.core.streaming import iter_chain, paced, with_error_message, stream_response
+from config import Config
+import json
 import time
 
 summarizer_bp = Blueprint('summarizer', __name__)
-summarizer_chain = get_summarizer_chain()
+
+LONG_SUMMARY_TEMPLATE = "\n".join([CHUNK_SUMMARY_TEMPLATE, COMBINE_SUMMARY_TEMPLATE, SUMMARIZER_TEMPLATE])
+
+def long_summary_chunks(key, text, show_progress, callbacks=None):
+    """Stream a map-reduce summary, caching only the summary text itself."""
+    parts = []
+    for kind, value in summarize_long(text, callbacks):
+        if kind == "text":
+            parts.append(value)
+            yield value
+        elif show_progress:
+            yield f"[progress] {value}\n"
+    if parts:
+        response_cache.set(key, "".join(parts))
 
 @summarizer_bp.route('/api/summarize', methods=['POST'])
 def summarize_text():
+    started = time.perf_counter()
     data = request.get_json()
     if not data or 'text' not in data:
         return Response('{"error": "Missing \'text\' in request body"}', status=400, mimetype='application/json')
 
     text = data['text']
 
-    def generate():
+    # Documents too large for one prompt are split, summarized in parallel
+    # and reduced; "progress": true adds "[progress] ..." lines to the stream.
+    # Identical in-flight requests share one upstream run.
+    long_mode = is_long_document(text)
+    template = LONG_SUMMARY_TEMPLATE if long_mode else SUMMARIZER_TEMPLATE
+    key = cache_key("summarize", template, get_model_name(), text)
+    cached = response_cache.get(key)
+    show_progress = bool(data.get('progress'))
+    flight_key = key + (":progress" if long_mode and show_progress else "")
+    # Every model call, including each chunk of a long document, takes its
+    # own limiter permit. A request that would start a new upstream run is
+    # turned away up front while the limiter queue is backed up; one
+    # joining an in-flight run never is.
+    callbacks = [LimiterCallbackHandler(upstream_limiter, PRIORITY_SUMMARY), MetricsCallbackHandler("summarize")]
+    if cached is not None:
+        REQUESTS.inc(endpoint="summarize", path="cache")
+        chunks = iter([cached])
+    else:
+        if long_mode:
+            produce = lambda: long_summary_chunks(key, text, show_progress, callbacks)
+        else:
+            produce = lambda: response_cache.record(
+                key, iter_chain(get_summarizer_chain, {"text": text}, {"callbacks": callbacks})
+            )
+        try:
+            shared = request_coalescer.stream(flight_key, produce, admit=upstream_limiter.admit)
+        except LimiterBusy as e:
+            REQUESTS.inc(endpoint="summarize", path="rejected")
+            return busy_response(e)
+        REQUESTS.inc(endpoint="summarize", path="map_reduce" if long_mode else "model")
+        chunks = with_error_message(paced(shared))
+    chunks = instrument_stream("summarize", chunks, started)
+
+    return stream_response(chunks, headers={
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type'
+    })
+
+@summarizer_bp.route('/api/summarize/batch', methods=['POST'])
+def summarize_batch_texts():
+    started = time.perf_counter()
+    data = request.get_json()
+    if not data or not isinstance(data.get('documents'), list):
+        return Response('{"error": "Missing \'documents\' list in request body"}', status=400, mimetype='application/json')
+    if len(data['documents']) > Config.SUMMARY_BATCH_MAX_DOCUMENTS:
+        return Response(json.dumps({"error": f"At most {Config.SUMMARY_BATCH_MAX_DOCUMENTS} documents per batch"}),
+                        status=400, mimetype='application/json')
+
+    # Each document is a string or {"id": ..., "text": ...}; IDs default to
+    # the document's position in the list.
+    documents = []
+    for index, document in enumerate(data['documents']):
+        if isinstance(document, dict):
+            doc_id, text = document.get('id', index), document.get('text')
+        else:
+            doc_id, text = index, document
+        if not isinstance(text, str):
+            return Response(json.dumps({"error": f"Document {index} has no 'text'"}),
+                            status=400, mimetype='application/json')
+        template = LONG_SUMMARY_TEMPLATE if is_long_document(text) else SUMMARIZER_TEMPLATE
+        documents.append((doc_id, text, cache_key("summarize", template, get_model_name(), text)))
+
+    REQUESTS.inc(amount=len(documents), endpoint="summarize_batch", path="batch")
+    # Batch model calls wait behind interactive ones for as long as it takes,
+    # and at most SUMMARY_BATCH_CONCURRENCY of them (chunk calls of long
+    # documents included) run at once
+    callbacks = [LimiterCallbackHandler(upstream_limiter, PRIORITY_BATCH, timeout=None,
+                                        max_in_flight=Config.SUMMARY_BATCH_CONCURRENCY),
+                 MetricsCallbackHandler("summarize_batch")]
+
+    # One NDJSON line per document, in completion order
+    def lines():
         try:
-            # Try streaming first
-            stream_worked = False
-            for chunk in summarizer_chain.stream({"text": text}):
-                if hasattr(chunk, 'content') and chunk.content:
-                    stream_worked = True
-                    # Send character by character for streaming effect
-                    content = chunk.content
-                    for char in content:
-                        yield char
-                        time.sleep(0.03)  # 30ms delay for slower, more readable streaming
-            
-            # If no streaming chunks were received, fall back to regular invoke
-            if not stream_worked:
-                result = summarizer_chain.invoke({"text": text})
-                if hasattr(result, 'content'):
-                    content = result.content
-                else:
-                    content = str(result)
-                
-                # Stream character by character even for non-streaming response
-                for char in content:
-                    yield char
-                    time.sleep(0.03)  # 30ms delay for slower, more readable streaming
-                    
+            for result in summarize_batch(documents, callbacks):
+                yield json.dumps(result) + "\n"
         except Exception as e:
-            error_msg = f"Error: An error occurred during streaming: {str(e)}"
-            for char in error_msg:
-                yield char
-    
-    return Response(generate(), 
-                   mimetype='text/plain',
-                   headers={
-                       'Cache-Control': 'no-cache',
-                       'Connection': 'keep-alive',
-                       'Access-Control-Allow-Origin': '*',
-                       'Access-Control-Allow-Headers': 'Content-Type'
-                   })
\ No newline at end of file
+            yield json.dumps({"error": f"An error occurred during batch summarization: {str(e)}"}) + "\n"
+
+    return stream_response(instrument_stream("summarize_batch", lines(), started), headers={
+        'Access-Control-Allow-Origin': '*',
+        'Access-Control-Allow-Headers': 'Content-Type'
+    }, mimetype='application/x-ndjson')
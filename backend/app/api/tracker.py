@@ -1,12 +1,69 @@
 # backend/app/api/tracker.py
 from flask import Blueprint, request, Response
-from app.core.agents import get_expense_agent_executor
-import uuid
+from app.core.agents import get_expense_agent_executor, EXPENSE_TOOLS
+from app.core.analytics import spending_report
+from app.core.identity import InvalidToken, authenticated_user
+from app.core.intents import parse_command, fast_path_stats
+from app.core.limiter import LimiterBusy, LimiterCallbackHandler, PRIORITY_INTERACTIVE, busy_response, upstream_limiter
+from app.core.memory import compact_history, render_chat_history
+from app.core.metrics import MetricsCallbackHandler, REQUESTS, AGENT_ITERATIONS, instrument_stream
+from app.core.prompt_cache import PromptCacheCallbackHandler, prompt_cache_accounting
+from app.core.sessions import session_store, MAX_SESSION_ID_LENGTH
+from app.core.store import current_tenant, expense_store, DEFAULT_TENANT, MAX_TENANT_LENGTH, PERIOD_FORMATS
+from app.core.streaming import paced, stream_response
+from config import Config
+from datetime import date
+import csv
+import io
+import json
 import time
+import uuid
 
 tracker_bp = Blueprint('tracker', __name__)
 
-conversation_histories = {}
+TOOLS_BY_NAME = {t.name: t for t in EXPENSE_TOOLS}
+
+EXPORT_PAGE_SIZE = 500
+EXPORT_FIELDS = ["id", "timestamp", "amount", "category", "description"]
+
+def resolve_tenant(user_id, session_id):
+    """Each authenticated user gets their own ledger and budget; anonymous
+    clients share the default ledger, or get one per session with EXPENSE_TENANCY=session."""
+    if isinstance(user_id, str) and user_id and len(user_id) <= MAX_TENANT_LENGTH:
+        return f"user:{user_id}"
+    if Config.EXPENSE_TENANCY != "session":
+        return DEFAULT_TENANT
+    if isinstance(session_id, str) and session_id and len(session_id) <= MAX_SESSION_ID_LENGTH:
+        return f"session:{session_id}"
+    return None
+
+def _json_error(message, status=400):
+    return Response(json.dumps({"error": message}), status=status, mimetype='application/json')
+
+def _caller_tenant(session_id):
+    """(tenant, error response) for the caller.
+
+    Users are identified only by a verified bearer token; a bare user_id is
+    a name anyone could send, so it is refused rather than trusted.
+    """
+    if 'user_id' in request.args or 'user_id' in (request.get_json(silent=True) or {}):
+        return None, _json_error("'user_id' is not accepted; authenticate with "
+                                 "'Authorization: Bearer <user token>'", status=403)
+    try:
+        user_id = authenticated_user(request.headers.get('Authorization'))
+    except InvalidToken as e:
+        return None, _json_error(str(e), status=401)
+    tenant = resolve_tenant(user_id, session_id)
+    if tenant is None:
+        return None, _json_error("Missing 'session_id'")
+    return tenant, None
+
+def _date_arg(name):
+    """A YYYY-MM-DD query argument, or None; raises ValueError when malformed."""
+    value = request.args.get(name)
+    if value:
+        date.fromisoformat(value)
+    return value or None
 
 @tracker_bp.route('/api/tracker', methods=['POST'])
 def handle_tracker_prompt():
@@ -15,22 +72,49 @@ def handle_tracker_prompt():
         return Response('{"error": "Missing \'prompt\' in request body"}', status=400, mimetype='application/json')
 
     user_prompt = data['prompt']
-    session_id = data.get('session_id') or str(uuid.uuid4())
-    
-    if session_id not in conversation_histories:
-        conversation_histories[session_id] = []
-    chat_history = conversation_histories[session_id]
+    session_id = data.get('session_id')
+    if not isinstance(session_id, str) or not session_id or len(session_id) > MAX_SESSION_ID_LENGTH:
+        session_id = str(uuid.uuid4())
+
+    tenant, error = _caller_tenant(session_id)
+    if error:
+        return error
 
-    # Execute agent synchronously to avoid loops
+    chat_history = session_store.get(session_id)
+
+    # Plain commands ("add 30 for coffee", "what's my total?") call the
+    # tool directly; anything ambiguous goes to the agent.
     full_response = ""
+    started = time.perf_counter()
+    command = parse_command(user_prompt)
+    metrics_handler = MetricsCallbackHandler("tracker")
+    callbacks = [LimiterCallbackHandler(upstream_limiter, PRIORITY_INTERACTIVE), metrics_handler]
+    if Config.PROMPT_CACHE_ACCOUNTING:
+        callbacks.append(PromptCacheCallbackHandler("tracker", prompt_cache_accounting))
+    config = {"callbacks": callbacks}
+
+    # Only the agent talks to the model. Its turn is turned away up front
+    # while the limiter queue is backed up, then each model call in the
+    # turn waits for its own permit.
+    if command is None:
+        try:
+            upstream_limiter.admit()
+        except LimiterBusy as e:
+            REQUESTS.inc(endpoint="tracker", path="rejected")
+            return busy_response(e)
+    tenant_token = current_tenant.set(tenant)
     try:
-        agent_executor = get_expense_agent_executor()
-        
-        # Use invoke instead of stream to get complete result
-        result = agent_executor.invoke({
-            "input": user_prompt,
-            "chat_history": chat_history
-        })
+        if command:
+            tool_name, tool_input = command
+            result = TOOLS_BY_NAME[tool_name].invoke(tool_input, config=config)
+        else:
+            agent_executor = get_expense_agent_executor()
+            
+            # Use invoke instead of stream to get complete result
+            result = agent_executor.invoke({
+                "input": user_prompt,
+                "chat_history": render_chat_history(chat_history)
+            }, config=config)
         
         # Extract the output safely
         if isinstance(result, dict):
@@ -41,8 +125,8 @@ def handle_tracker_prompt():
         # Ensure we have a string, not a generator or other object
         full_response = str(full_response) if full_response else ""
         
-        # Clean up any repeated content or verbose output
-        if full_response and full_response.strip():
+        # Clean up any repeated content or verbose output from the agent
+        if command is None and full_response and full_response.strip():
             # Remove excessive whitespace and repeated lines
             lines = [line.strip() for line in full_response.split('\n') if line.strip()]
             seen = set()
@@ -59,8 +143,13 @@ def handle_tracker_prompt():
         # Update chat history
         chat_history.append(f"Human: {user_prompt}")
         chat_history.append(f"AI: {full_response}")
-        conversation_histories[session_id] = chat_history[-10:]  # Keep last 10 messages
+        # Older turns are folded into a rolling summary to stay in the token budget
+        session_store.save(session_id, compact_history(chat_history))
 
+    except LimiterBusy as e:
+        # A later model call in the turn could not get a permit in time
+        REQUESTS.inc(endpoint="tracker", path="rejected")
+        return busy_response(e)
     except StopIteration:
         full_response = "I encountered a processing issue. Your request may have been completed. Try checking your summary."
         print("StopIteration caught in tracker.py")
@@ -73,24 +162,79 @@ def handle_tracker_prompt():
         else:
             full_response = "I'm sorry, I encountered an error. Please try again."
         print(f"Error during agent execution: {e}")
+    finally:
+        # Also on BaseException (e.g. gevent.Timeout), so the tenant never
+        # leaks into the next request served by this greenlet's context.
+        current_tenant.reset(tenant_token)
+    fast_path_stats.record(command is not None, time.perf_counter() - started)
+    REQUESTS.inc(endpoint="tracker", path="fast" if command else "agent")
+    if command is None:
+        AGENT_ITERATIONS.observe(metrics_handler.llm_calls, endpoint="tracker")
 
-    # Convert to list for safe iteration
-    chars = list(str(full_response))
-    
-    def generate_response_stream():
-        try:
-            for char in chars:
-                yield char
-                time.sleep(0.03)  # 30ms delay for slower, more readable streaming
-        except GeneratorExit:
-            pass
-        except StopIteration:
-            pass
-    
-    return Response(generate_response_stream(), 
-                   mimetype='text/plain', 
-                   headers={
-                       'X-Session-ID': session_id,
-                       'Cache-Control': 'no-cache',
-                       'Connection': 'keep-alive'
-                   })
\ No newline at end of file
+    # The full answer is already known here, so it goes out in one frame
+    # unless the opt-in typewriter pacing mode is configured.
+    return stream_response(instrument_stream("tracker", paced([str(full_response)]), started), headers={
+        'X-Session-ID': session_id
+    })
+
+@tracker_bp.route('/api/tracker/report', methods=['GET'])
+def expense_report():
+    tenant, error = _caller_tenant(request.args.get('session_id'))
+    if error:
+        return error
+    period = request.args.get('period', 'month')
+    if period not in PERIOD_FORMATS:
+        return _json_error(f"'period' must be one of: {', '.join(PERIOD_FORMATS)}")
+    try:
+        start, end = _date_arg('start'), _date_arg('end')
+        top = min(max(int(request.args.get('top', 5)), 1), 100)
+    except ValueError:
+        return _json_error("'start'/'end' must be YYYY-MM-DD dates and 'top' a number")
+
+    # Answered from the daily rollups, not by scanning the ledger
+    tenant_token = current_tenant.set(tenant)
+    try:
+        report = spending_report(period, start, end, request.args.get('category'), top)
+    finally:
+        current_tenant.reset(tenant_token)
+    return Response(json.dumps(report), mimetype='application/json')
+
+@tracker_bp.route('/api/tracker/export', methods=['GET'])
+def export_expenses():
+    tenant, error = _caller_tenant(request.args.get('session_id'))
+    if error:
+        return error
+    export_format = request.args.get('format', 'csv').lower()
+    if export_format not in ('csv', 'json'):
+        return _json_error("'format' must be 'csv' or 'json'")
+    try:
+        start, end = _date_arg('start'), _date_arg('end')
+    except ValueError:
+        return _json_error("'start'/'end' must be YYYY-MM-DD dates")
+
+    # The ledger is read one page at a time and each page is sent as it is
+    # read, so memory stays flat however many expenses the tenant has.
+    expenses = expense_store.iter_expenses(start, end, EXPORT_PAGE_SIZE, tenant=tenant)
+
+    def csv_chunks():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for index, expense in enumerate(expenses, 1):
+            writer.writerow(expense)
+            if index % EXPORT_PAGE_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    def json_chunks():
+        yield "["
+        for index, expense in enumerate(expenses):
+            yield ("," if index else "") + json.dumps({field: expense[field] for field in EXPORT_FIELDS})
+        yield "]"
+
+    chunks = csv_chunks() if export_format == 'csv' else json_chunks()
+    return stream_response(chunks, headers={
+        'Content-Disposition': f'attachment; filename="expenses.{export_format}"'
+    }, mimetype='text/csv' if export_format == 'csv' else 'application/json')
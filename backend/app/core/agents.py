@@ -1,51 +1,120 @@
 ﻿# backend/app/core/agents.py
-import os
-from datetime import datetime
-from typing import List, Dict
-
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.tools import tool
-from langchain.agents import create_react_agent, AgentExecutor
+import functools
+import threading
+from typing import TYPE_CHECKING
+
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.tools import StructuredTool, tool
+from app.core.analytics import expense_summary, parse_period
+from app.core.calculator import CalculationError, evaluate, format_result
+from app.core.store import expense_store
 from config import Config
 
-llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", google_api_key=Config.GEMINI_API_KEY, temperature=0.0)
+if TYPE_CHECKING:
+    from langchain.agents import AgentExecutor
+
+# The model client, chains and agent are built on first use rather than at
+# import, so workers (or a --preload master) start without touching the
+# Google SDK and /api/health answers immediately.
+
+def _build_llm():
+    if Config.LLM_PROVIDER == "fake":
+        from app.core.fake_llm import FakeStreamingChatModel
+        return FakeStreamingChatModel(
+            ttft=Config.FAKE_LLM_TTFT,
+            tokens_per_second=Config.FAKE_LLM_TOKENS_PER_SECOND,
+            error_rate=Config.FAKE_LLM_ERROR_RATE,
+            quota_per_second=Config.FAKE_LLM_QUOTA_PER_SECOND,
+            record_prompts=Config.FAKE_LLM_RECORD_PROMPTS,
+        )
+    if not Config.GEMINI_API_KEY:
+        raise ValueError("No GEMINI_API_KEY set for Flask application")
+    from langchain_google_genai import ChatGoogleGenerativeAI
+    return ChatGoogleGenerativeAI(
+        model=Config.GEMINI_MODEL,
+        google_api_key=Config.GEMINI_API_KEY,
+        temperature=0.0,
+        transport=Config.GEMINI_TRANSPORT,
+    )
+
+@functools.lru_cache(maxsize=None)
+def get_llm():
+    return _build_llm()
+
+@functools.lru_cache(maxsize=None)
+def rate_limit_errors() -> tuple:
+    """Exception types meaning the upstream quota was exceeded (HTTP 429)."""
+    from app.core.fake_llm import FakeLLMError
+    errors = [FakeLLMError]
+    try:
+        from google.api_core.exceptions import ResourceExhausted, TooManyRequests
+        errors += [ResourceExhausted, TooManyRequests]
+    except ImportError:
+        pass
+    return tuple(errors)
+
+def with_quota_retry(runnable, attempts: int):
+    """runnable, retried on quota errors with exponential backoff and jitter.
+
+    RunnableRetry's own batch methods skip the retry, so the result invokes
+    it once per input and can be fanned out with batch_as_completed.
+    """
+    from langchain_core.runnables import RunnableLambda
+    if attempts <= 1:
+        return runnable
+    retrying = runnable.with_retry(retry_if_exception_type=rate_limit_errors(), stop_after_attempt=attempts)
+    return RunnableLambda(lambda value, config: retrying.invoke(value, config))
+
+SUMMARIZER_TEMPLATE = "Summarize the following text in exactly 3 concise sentences:\n\n{text}"
+
+def get_model_name() -> str:
+    """Identify the configured model, e.g. for response cache keys."""
+    model = Config.GEMINI_MODEL if Config.LLM_PROVIDER == "gemini" else Config.LLM_PROVIDER
+    return f"{Config.LLM_PROVIDER}:{model}"
 
 def get_qna_chain():
-    return llm
+    return get_llm()
 
+@functools.lru_cache(maxsize=None)
 def get_summarizer_chain():
-    prompt = ChatPromptTemplate.from_template("Summarize the following text in exactly 3 concise sentences:\n\n{text}")
-    return prompt | llm
+    prompt = ChatPromptTemplate.from_template(SUMMARIZER_TEMPLATE)
+    return prompt | get_llm()
 
-# --- EXPENSE TRACKER WITH BUDGET MANAGEMENT ---
+# --- LONG DOCUMENT (MAP-REDUCE) SUMMARIZATION ---
+
+CHUNK_SUMMARY_TEMPLATE = "Summarize this part of a longer document in a few concise sentences, keeping names, numbers and key facts:\n\n{text}"
+COMBINE_SUMMARY_TEMPLATE = "Combine these partial summaries of one document into a single concise summary, keeping the key facts:\n\n{text}"
+
+@functools.lru_cache(maxsize=None)
+def get_chunk_summary_chain():
+    prompt = ChatPromptTemplate.from_template(CHUNK_SUMMARY_TEMPLATE)
+    return prompt | get_llm() | StrOutputParser()
 
-expenses_db: List[Dict] = []
-budget_db: Dict = {"amount": None, "set_at": None}  # Budget storage
+@functools.lru_cache(maxsize=None)
+def get_combine_summary_chain():
+    prompt = ChatPromptTemplate.from_template(COMBINE_SUMMARY_TEMPLATE)
+    return prompt | get_llm() | StrOutputParser()
+
+# --- EXPENSE TRACKER WITH BUDGET MANAGEMENT ---
 
 def _add_expense_impl(amount: float, category: str, description: str) -> str:
     """Internal function to add expense to database."""
-    new_expense = {
-        "id": len(expenses_db) + 1,
-        "amount": amount,
-        "category": category.lower(),
-        "description": description,
-        "timestamp": datetime.now().isoformat(),
-    }
-    expenses_db.append(new_expense)
+    expense_store.add_expense(amount, category, description)
     
     # Check budget if set
     budget_warning = ""
-    if budget_db["amount"] is not None:
-        total_spent = sum(e["amount"] for e in expenses_db)
-        remaining = budget_db["amount"] - total_spent
+    budget = expense_store.get_budget()
+    if budget["amount"] is not None:
+        total_spent = expense_store.total_spent()
+        remaining = budget["amount"] - total_spent
         
         if remaining <= 0:
-            budget_warning = f"\n\n🚨 BUDGET ALERT: You've EXCEEDED your budget of ₹{budget_db['amount']}! You've spent ₹{total_spent:.2f} (₹{abs(remaining):.2f} over budget)."
-        elif remaining < budget_db["amount"] * 0.2:  # Less than 20% remaining
-            budget_warning = f"\n\n⚠️ WARNING: You're running low on budget! Only ₹{remaining:.2f} left out of ₹{budget_db['amount']}."
+            budget_warning = f"\n\n🚨 BUDGET ALERT: You've EXCEEDED your budget of ₹{budget['amount']}! You've spent ₹{total_spent:.2f} (₹{abs(remaining):.2f} over budget)."
+        elif remaining < budget["amount"] * 0.2:  # Less than 20% remaining
+            budget_warning = f"\n\n⚠️ WARNING: You're running low on budget! Only ₹{remaining:.2f} left out of ₹{budget['amount']}."
         else:
-            budget_warning = f"\n💰 Budget remaining: ₹{remaining:.2f} out of ₹{budget_db['amount']}"
+            budget_warning = f"\n💰 Budget remaining: ₹{remaining:.2f} out of ₹{budget['amount']}"
     
     return f"Successfully added expense: {description} (₹{amount}) in category '{category}'.{budget_warning}"
 
@@ -72,56 +141,58 @@ def add_expense(expense_data: str) -> str:
     except Exception as e:
         return f"Error: {str(e)}"
 
+PERIOD_LABELS = {"day": "today", "week": "this week", "month": "this month", "year": "this year"}
+
+def _summary_text(summary: dict) -> str:
+    """Render an expense_summary() dict as the tool's text output."""
+    budget = summary["budget"]
+    label = PERIOD_LABELS.get(summary["period"])
+    if not summary["categories"]:
+        msg = f"📊 No expenses recorded {label}." if label else "📊 No expenses recorded yet."
+        if budget["amount"] is not None:
+            msg += f"\n💰 Budget set: ₹{budget['amount']}"
+        return msg
+
+    total = summary["total"]
+    lines = [
+        f"📊 EXPENSE SUMMARY ({label}: {summary['start']} to {summary['end']})" if label else "📊 EXPENSE SUMMARY",
+        "━━━━━━━━━━━━━━━━━━",
+        f"💸 Total Spent: ₹{total:.2f}",
+        "",
+    ]
+
+    # Budget status covers the whole ledger
+    if label is None and budget["amount"] is not None:
+        remaining = budget["amount"] - total
+        percentage_used = (total / budget["amount"]) * 100
+        lines += [
+            "💰 Budget Status:",
+            f"   Budget: ₹{budget['amount']}",
+            f"   Spent: ₹{total:.2f} ({percentage_used:.1f}%)",
+        ]
+        if remaining > 0:
+            lines.append(f"   Remaining: ₹{remaining:.2f}")
+            if percentage_used >= 80:
+                lines.append(f"   ⚠️ WARNING: {100-percentage_used:.1f}% budget remaining!")
+        else:
+            lines.append(f"   🚨 OVER BUDGET by ₹{abs(remaining):.2f}!")
+        lines.append("")
+
+    lines.append("📂 By Category:")
+    for row in summary["categories"]:
+        percentage = (row["total"] / total) * 100 if total else 0.0
+        lines.append(f"   • {row['category'].capitalize()}: ₹{row['total']:.2f} ({percentage:.1f}%)")
+
+    lines += ["", "🏆 Top Expenses:" if label else "📝 Recent Expenses:"]
+    for exp in summary["expenses"]:
+        lines.append(f"   • {exp['description']}: ₹{exp['amount']} ({exp['category']})")
+    return "\n".join(lines) + "\n"
+
 @tool
-def get_expense_summary(dummy_input: str = "") -> str:
-    """Get detailed summary of all expenses with budget status. NO INPUT needed."""
+def get_expense_summary(period: str = "") -> str:
+    """Get detailed summary of all expenses with budget status. No input needed; optionally 'today', 'this week', 'this month' or 'this year' to limit it to that period."""
     try:
-        if not expenses_db:
-            msg = "📊 No expenses recorded yet."
-            if budget_db["amount"] is not None:
-                msg += f"\n💰 Budget set: ₹{budget_db['amount']}"
-            return msg
-        
-        total = sum(e["amount"] for e in expenses_db)
-        by_cat = {}
-        for e in expenses_db:
-            cat = e["category"]
-            by_cat[cat] = by_cat.get(cat, 0) + e["amount"]
-        
-        result = f"📊 EXPENSE SUMMARY\n"
-        result += f"━━━━━━━━━━━━━━━━━━\n"
-        result += f"💸 Total Spent: ₹{total:.2f}\n\n"
-        
-        # Budget status
-        if budget_db["amount"] is not None:
-            remaining = budget_db["amount"] - total
-            percentage_used = (total / budget_db["amount"]) * 100
-            
-            result += f"💰 Budget Status:\n"
-            result += f"   Budget: ₹{budget_db['amount']}\n"
-            result += f"   Spent: ₹{total:.2f} ({percentage_used:.1f}%)\n"
-            
-            if remaining > 0:
-                result += f"   Remaining: ₹{remaining:.2f}\n"
-                if percentage_used >= 80:
-                    result += f"   ⚠️ WARNING: {100-percentage_used:.1f}% budget remaining!\n"
-            else:
-                result += f"   🚨 OVER BUDGET by ₹{abs(remaining):.2f}!\n"
-            result += f"\n"
-        
-        # Category breakdown
-        result += f"📂 By Category:\n"
-        for cat, amt in sorted(by_cat.items(), key=lambda x: x[1], reverse=True):
-            percentage = (amt / total) * 100
-            result += f"   • {cat.capitalize()}: ₹{amt:.2f} ({percentage:.1f}%)\n"
-        
-        # Recent expenses
-        result += f"\n📝 Recent Expenses:\n"
-        recent = expenses_db[-3:] if len(expenses_db) <= 3 else expenses_db[-3:]
-        for exp in reversed(recent):
-            result += f"   • {exp['description']}: ₹{exp['amount']} ({exp['category']})\n"
-        
-        return str(result)
+        return _summary_text(expense_summary(parse_period(period)))
     except Exception as e:
         return f"Error getting summary: {str(e)}"
 
@@ -133,12 +204,11 @@ def set_budget(budget_amount: str) -> str:
         if amount <= 0:
             return "Error: Budget must be a positive number"
         
-        budget_db["amount"] = amount
-        budget_db["set_at"] = datetime.now().isoformat()
+        expense_store.set_budget(amount)
         
         # Calculate current spending status
-        if expenses_db:
-            total_spent = sum(e["amount"] for e in expenses_db)
+        if expense_store.count():
+            total_spent = expense_store.total_spent()
             remaining = amount - total_spent
             
             msg = f"✅ Budget set to ₹{amount}\n"
@@ -160,16 +230,17 @@ def set_budget(budget_amount: str) -> str:
 def get_budget_status(dummy_input: str = "") -> str:
     """Check current budget status and remaining amount. NO INPUT needed."""
     try:
-        if budget_db["amount"] is None:
+        budget = expense_store.get_budget()
+        if budget["amount"] is None:
             return "💡 No budget set yet. Set a budget with 'set budget to [amount]' to start tracking!"
         
-        total_spent = sum(e["amount"] for e in expenses_db)
-        remaining = budget_db["amount"] - total_spent
-        percentage_used = (total_spent / budget_db["amount"]) * 100
+        total_spent = expense_store.total_spent()
+        remaining = budget["amount"] - total_spent
+        percentage_used = (total_spent / budget["amount"]) * 100
         
         result = f"💰 BUDGET STATUS\n"
         result += f"━━━━━━━━━━━━━━━━━━\n"
-        result += f"Budget: ₹{budget_db['amount']}\n"
+        result += f"Budget: ₹{budget['amount']}\n"
         result += f"Spent: ₹{total_spent:.2f} ({percentage_used:.1f}%)\n"
         
         if remaining > 0:
@@ -198,16 +269,124 @@ def get_budget_status(dummy_input: str = "") -> str:
 def calculate(expression: str) -> str:
     """Calculate a math expression. Input should be a valid math expression like '10+20' or '50*2'."""
     try:
-        # Safe eval with restricted builtins
-        result = eval(expression, {"__builtins__": {}}, {})
-        return f"Result: {expression} = {result}"
-    except Exception as e:
+        # Parsed and evaluated as plain decimal arithmetic, never eval()
+        result = evaluate(expression)
+        return f"Result: {expression} = {format_result(result)}"
+    except CalculationError as e:
         return f"Error calculating: {str(e)}"
 
-def get_expense_agent_executor() -> AgentExecutor:
-    tools = [add_expense, get_expense_summary, set_budget, get_budget_status, calculate]
-    
-    prompt_template = """You are a friendly and proactive expense tracking assistant! 💰
+EXPENSE_TOOLS = [add_expense, get_expense_summary, set_budget, get_budget_status, calculate]
+
+# --- TYPED TOOLS FOR NATIVE FUNCTION CALLING ---
+
+def _add_expense_typed(amount: float, category: str, description: str) -> str:
+    """Add an expense. category is a short lowercase label such as food, travel or bills."""
+    if amount <= 0:
+        return "Error: Amount must be a positive number"
+    return _add_expense_impl(amount, category.strip(), description.strip())
+
+def _expense_summary_typed(period: str = "") -> str:
+    """Get detailed summary of expenses with budget status. period is optional: 'today', 'this week', 'this month' or 'this year'."""
+    return get_expense_summary.func(period)
+
+def _set_budget_typed(amount: float) -> str:
+    """Set the budget limit in rupees."""
+    return set_budget.func(str(amount))
+
+def _budget_status_typed() -> str:
+    """Check current budget status and remaining amount."""
+    return get_budget_status.func("")
+
+def _calculate_typed(expression: str) -> str:
+    """Calculate a math expression like '10+20' or '50*2'."""
+    return calculate.func(expression)
+
+TYPED_EXPENSE_TOOLS = [
+    StructuredTool.from_function(_add_expense_typed, name="add_expense"),
+    StructuredTool.from_function(_expense_summary_typed, name="get_expense_summary"),
+    StructuredTool.from_function(_set_budget_typed, name="set_budget"),
+    StructuredTool.from_function(_budget_status_typed, name="get_budget_status"),
+    StructuredTool.from_function(_calculate_typed, name="calculate"),
+]
+
+# How to use the tools, shared by both agent modes. Together with the
+# instructions and tool descriptions it makes the static prefix large enough
+# for providers that only cache prefixes above a minimum (PROMPT_CACHE_MIN_TOKENS).
+EXPENSE_TOOL_REFERENCE = """TOOL REFERENCE:
+
+Amounts:
+- All amounts are in Indian rupees (₹). "rs 50", "50 rupees", "INR 50" and "₹50" all mean 50.
+- If the user gives an amount in another currency ("$20", "10 euros"), do not convert it
+  yourself: ask them for the rupee amount before adding anything.
+- Amounts must be positive numbers. Round to at most two decimal places.
+
+Categories (use exactly one lowercase label per expense):
+- food: groceries, coffee, tea, snacks, restaurants, cafes, breakfast, lunch, dinner, takeaway
+- travel: bus, train, metro, cab, taxi, auto, uber, ola, flights, fuel, petrol, diesel, parking, tolls
+- entertainment: movies, concerts, games, streaming (netflix, spotify), events, outings
+- shopping: clothes, shoes, electronics, online orders (amazon, flipkart), household items
+- bills: rent, electricity, water, gas, internet, wifi, phone and mobile recharges, subscriptions
+- health: medicine, pharmacy, doctor visits, tests, gym and fitness
+- other: anything that does not clearly fit above; mention the label you chose in the answer
+If a description could fit two categories, pick the one the user is most likely budgeting for
+(a "coffee with a client" is still food).
+
+Adding expenses:
+- One add_expense call per expense. "30 for coffee and 200 for groceries" is two expenses.
+- Keep the description short and in the user's words ("lunch at cafe", "uber to office").
+- Do not add an expense twice: if the conversation shows it was already added, say so instead.
+- Relative dates ("yesterday", "last friday") are recorded as today; mention that in the answer.
+
+Summaries and periods:
+- get_expense_summary with no period covers everything recorded, plus the budget status.
+- Periods are exactly one of: today, this week, this month, this year.
+- For questions about a single category ("how much on food?"), get the summary and read the
+  category line from it rather than estimating.
+
+Budget:
+- set_budget replaces the current budget; it is one amount in rupees for the whole ledger.
+- get_budget_status shows the budget, what is spent, what is left and the percentage used.
+- Below 25% left, suggest specific categories to cut based on the summary; over budget, say by
+  how much and offer two or three concrete tips.
+
+Calculator:
+- calculate evaluates plain arithmetic exactly: + - * / // % ** and parentheses.
+- Exponents must be whole numbers up to 64 and results stay below 10^18; for anything else,
+  explain the result instead of calling the tool.
+- "10% of 450" is 450 * 10 / 100; percentages are not the % operator, which is a remainder.
+
+Examples:
+- "add ₹45 for tea" → add_expense: 45, food, tea
+- "spent 1200 on electricity bill" → add_expense: 1200, bills, electricity bill
+- "paid 350 for an uber and 90 for parking" → add_expense twice: 350, travel, uber and 90, travel, parking
+- "what did I spend this week?" → get_expense_summary: this week
+- "make my budget 15000" → set_budget: 15000
+- "how much is left?" → get_budget_status
+- "what is 18% of 2400?" → calculate: 2400 * 18 / 100"""
+
+TOOL_CALLING_SYSTEM_PROMPT = """You are a friendly and proactive expense tracking assistant! 💰
+
+Use the tools to add expenses, manage the budget and answer questions about spending.
+When several independent tools are needed, call them together in one turn.
+
+- When adding expense: Show budget impact automatically
+- When near budget (>75%): Suggest they slow down spending
+- When over budget: Offer helpful tips
+- Keep responses concise, warm and use emojis to make info engaging
+
+""" + EXPENSE_TOOL_REFERENCE
+
+# Per-request part of every prompt: it follows the static instructions so
+# those form an identical, cacheable prefix on every model call.
+CONVERSATION_PROMPT = """Previous conversation:
+{chat_history}
+
+Begin!
+
+Question: {input}
+"""
+
+EXPENSE_AGENT_INSTRUCTIONS = """You are a friendly and proactive expense tracking assistant! 💰
 
 Your goal is to help users manage their money wisely by:
 - Tracking every expense they add
@@ -222,7 +401,7 @@ Tool Names: {tool_names}
 
 ALWAYS use this EXACT format:
 
-Question: {input}
+Question: [the user's request]
 Thought: [what should I do to help the user?]
 Action: [tool name from: {tool_names}]
 Action Input: [input for that tool]
@@ -232,7 +411,7 @@ Final Answer: [friendly, helpful response with emojis and insights]
 
 TOOL USAGE GUIDE:
 • add_expense: "amount|category|description" → Example: "50|food|lunch at cafe"
-• get_expense_summary: "" (empty string or "summary")
+• get_expense_summary: "" (everything) or "today" / "this week" / "this month" / "this year"
 • set_budget: "amount" → Example: "1000"
 • get_budget_status: "" (empty string)
 • calculate: "math expression" → Example: "50*10"
@@ -255,16 +434,40 @@ IMPORTANT:
 - NEVER use same Action twice in a row
 - Always check budget status after adding expenses
 
-Previous conversation:
-{chat_history}
+""" + EXPENSE_TOOL_REFERENCE
 
-Begin!
+_expense_agent_executor = None
+_expense_agent_lock = threading.Lock()
 
-Question: {input}
-{agent_scratchpad}"""
+def _build_expense_agent_executor() -> "AgentExecutor":
+    from langchain.agents import AgentExecutor, create_react_agent, create_tool_calling_agent
+    from langchain.tools.render import render_text_description
+    from app.core.prompt_cache import get_prompt_cache_hook
     
-    prompt = ChatPromptTemplate.from_template(prompt_template)
-    agent = create_react_agent(llm=llm, tools=tools, prompt=prompt)
+    if Config.TRACKER_AGENT_MODE == "tool_calling":
+        # Structured function calls: typed arguments, no Thought/Action text
+        # to parse, and several tool calls can come back in one round trip.
+        tools = TYPED_EXPENSE_TOOLS
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", TOOL_CALLING_SYSTEM_PROMPT),
+            ("human", CONVERSATION_PROMPT),
+            MessagesPlaceholder("agent_scratchpad"),
+        ])
+        llm = get_prompt_cache_hook().bind(get_llm(), TOOL_CALLING_SYSTEM_PROMPT)
+        agent = create_tool_calling_agent(llm=llm, tools=tools, prompt=prompt)
+    else:
+        tools = EXPENSE_TOOLS
+        # create_react_agent fills in the tool descriptions once, so the
+        # system message is the same text on every step of every turn.
+        prompt = ChatPromptTemplate.from_messages([
+            ("system", EXPENSE_AGENT_INSTRUCTIONS),
+            ("human", CONVERSATION_PROMPT + "{agent_scratchpad}"),
+        ])
+        instructions = EXPENSE_AGENT_INSTRUCTIONS.format(
+            tools=render_text_description(tools), tool_names=", ".join(t.name for t in tools)
+        )
+        llm = get_prompt_cache_hook().bind(get_llm(), instructions)
+        agent = create_react_agent(llm=llm, tools=tools, prompt=prompt)
     
     return AgentExecutor(
         agent=agent, 
@@ -274,4 +477,25 @@ Question: {input}
         max_iterations=3,  # Reduced from 10 to prevent loops
         return_intermediate_steps=False,
         max_execution_time=10  # 10 second timeout
-    )
\ No newline at end of file
+    )
+
+def get_expense_agent_executor() -> "AgentExecutor":
+    """Return the process-wide expense agent, building it on first use.
+
+    The executor holds no per-request state (input and chat history are
+    passed to invoke), so one instance is shared by all requests.
+    """
+    global _expense_agent_executor
+    if _expense_agent_executor is None:
+        with _expense_agent_lock:
+            if _expense_agent_executor is None:
+                _expense_agent_executor = _build_expense_agent_executor()
+    return _expense_agent_executor
+
+def warm_up():
+    """Build the model client, chains and agent now instead of on first request."""
+    get_llm()
+    get_summarizer_chain()
+    get_chunk_summary_chain()
+    get_combine_summary_chain()
+    get_expense_agent_executor()
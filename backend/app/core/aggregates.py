@@ -0,0 +1,71 @@
+# backend/app/core/aggregates.py
+from collections import deque
+from typing import Dict, Iterable, List, Tuple
+
+# How many recent expenses are kept in memory for summaries
+RECENT_EXPENSES_LIMIT = 20
+
+
+class ExpenseAggregates:
+    """Running totals over the expense ledger, updated on every insert/delete.
+
+    Keeps the grand total, count, per-category totals and a bounded ring
+    buffer of the most recent expenses, so budget checks and summaries
+    never scan the ledger.
+    """
+
+    def __init__(self, recent_limit: int = RECENT_EXPENSES_LIMIT):
+        self.total = 0.0
+        self.count = 0
+        self.by_category: Dict[str, Tuple[float, int]] = {}
+        self.recent = deque(maxlen=recent_limit)
+
+    def add(self, expense: Dict):
+        self.total += expense["amount"]
+        self.count += 1
+        total, count = self.by_category.get(expense["category"], (0.0, 0))
+        self.by_category[expense["category"]] = (total + expense["amount"], count + 1)
+        self.recent.append(expense)
+
+    def remove(self, expense: Dict):
+        self.total -= expense["amount"]
+        self.count -= 1
+        total, count = self.by_category.get(expense["category"], (0.0, 0))
+        if count <= 1:
+            self.by_category.pop(expense["category"], None)
+        else:
+            self.by_category[expense["category"]] = (total - expense["amount"], count - 1)
+        # The ring buffer only holds the newest expenses; callers reload it
+        # from the store when a buffered expense is deleted.
+        self.recent = deque((e for e in self.recent if e["id"] != expense["id"]), maxlen=self.recent.maxlen)
+
+    def load(self, category_rows: Iterable[Tuple[str, float, int]], recent_newest_first: List[Dict]):
+        """Replace the aggregates with persisted per-category totals."""
+        self.by_category = {category: (total, count) for category, total, count in category_rows}
+        self.total = sum(total for total, _ in self.by_category.values())
+        self.count = sum(count for _, count in self.by_category.values())
+        self.recent = deque(reversed(recent_newest_first), maxlen=self.recent.maxlen)
+
+    def category_totals(self) -> Dict[str, float]:
+        return {category: total for category, (total, _) in self.by_category.items()}
+
+    def recent_expenses(self, limit: int) -> List[Dict]:
+        """Most recent expenses, newest first."""
+        items = list(self.recent)[-limit:] if limit > 0 else []
+        return list(reversed(items))
+
+    def mismatches(self, category_rows: Iterable[Tuple[str, float, int]], tolerance: float = 1e-6) -> List[str]:
+        """Compare against totals recomputed from the full ledger."""
+        expected = {category: (total, count) for category, total, count in category_rows}
+        problems = []
+        for category in sorted(set(expected) | set(self.by_category)):
+            want_total, want_count = expected.get(category, (0.0, 0))
+            have_total, have_count = self.by_category.get(category, (0.0, 0))
+            if have_count != want_count or abs(have_total - want_total) > tolerance * max(1.0, abs(want_total)):
+                problems.append(f"{category}: have {have_total}/{have_count}, expected {want_total}/{want_count}")
+        want_sum = sum(total for total, _ in expected.values())
+        if abs(self.total - want_sum) > tolerance * max(1.0, abs(want_sum)):
+            problems.append(f"total: have {self.total}, expected {want_sum}")
+        if self.count != sum(count for _, count in expected.values()):
+            problems.append(f"count: have {self.count}, expected {sum(c for _, c in expected.values())}")
+        return problems
@@ -0,0 +1,79 @@
+# backend/app/core/analytics.py
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+from app.core.store import expense_store
+
+# Words the tools and API accept for "the current day/week/month/year"
+PERIOD_ALIASES = {
+    "today": "day", "day": "day", "daily": "day",
+    "this week": "week", "week": "week", "weekly": "week",
+    "this month": "month", "month": "month", "monthly": "month",
+    "this year": "year", "year": "year", "yearly": "year",
+}
+
+
+def parse_period(text: str) -> Optional[str]:
+    """Map free text such as "this month" to a report period, or None."""
+    return PERIOD_ALIASES.get(" ".join(str(text).lower().split()))
+
+
+def current_window(period: str, today: Optional[date] = None) -> Tuple[str, str]:
+    """Inclusive (start, end) ISO dates of the current day, week (from Monday), month or year."""
+    today = today or date.today()
+    if period == "day":
+        start = today
+    elif period == "week":
+        start = today - timedelta(days=today.weekday())
+    elif period == "month":
+        start = today.replace(day=1)
+    else:
+        start = today.replace(month=1, day=1)
+    return start.isoformat(), today.isoformat()
+
+
+def expense_summary(period: Optional[str] = None, top: int = 3) -> Dict:
+    """Totals, category breakdown and notable expenses for the current tenant.
+
+    Without a period this covers the whole ledger from the running
+    aggregates and lists the most recent expenses; with one it covers the
+    current window from the daily rollups and lists the largest expenses.
+    """
+    budget = expense_store.get_budget()
+    if period is None:
+        by_category = expense_store.category_totals()
+        categories = [{"category": category, "total": total}
+                      for category, total in sorted(by_category.items(), key=lambda item: item[1], reverse=True)]
+        return {
+            "period": None,
+            "total": sum(by_category.values()),
+            "categories": categories,
+            "expenses": expense_store.recent_expenses(top),
+            "budget": budget,
+        }
+
+    start, end = current_window(period)
+    categories = expense_store.category_totals_between(start, end)
+    return {
+        "period": period,
+        "start": start,
+        "end": end,
+        "total": sum(row["total"] for row in categories),
+        "categories": categories,
+        "expenses": expense_store.top_expenses(top, start, end),
+        "budget": budget,
+    }
+
+
+def spending_report(period: str = "month", start: Optional[str] = None, end: Optional[str] = None,
+                    category: Optional[str] = None, top: int = 5) -> Dict:
+    """Per-period totals, top categories and top expenses over a date window."""
+    return {
+        "period": period,
+        "start": start,
+        "end": end,
+        "category": category,
+        "totals": expense_store.period_totals(period, start, end, category),
+        "top_categories": expense_store.category_totals_between(start, end, top),
+        "top_expenses": expense_store.top_expenses(top, start, end, category),
+    }
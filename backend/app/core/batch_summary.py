@@ -0,0 +1,51 @@
+# backend/app/core/batch_summary.py
+from typing import Iterator, List, Tuple
+
+from langchain_core.runnables import RunnableLambda
+
+from app.core.agents import get_summarizer_chain, with_quota_retry
+from app.core.cache import response_cache
+from app.core.long_summary import is_long_document, summarize_long
+from config import Config
+
+
+def _summarize_one(text: str, config=None) -> str:
+    # Retries wrap single model calls, so a quota error in one chunk of a
+    # long document does not re-summarize the chunks that succeeded.
+    attempts = Config.SUMMARY_BATCH_MAX_ATTEMPTS
+    if is_long_document(text):
+        callbacks = (config or {}).get("callbacks")
+        return "".join(value for kind, value in summarize_long(text, callbacks, attempts) if kind == "text")
+    return with_quota_retry(get_summarizer_chain(), attempts).invoke({"text": text}, config=config).content
+
+
+def summarize_batch(documents: List[Tuple[str, str, str]], callbacks=None) -> Iterator[dict]:
+    """Summarize (id, text, cache key) documents, yielding results as they finish.
+
+    Cached summaries are yielded first. The rest run through batch_as_completed
+    with at most SUMMARY_BATCH_CONCURRENCY documents in flight. Each model
+    call, including every chunk call of a long document, is retried on its
+    own after a quota error, with exponential backoff and jitter; callers cap
+    the batch's model calls in flight through the limiter callback. A failed
+    document yields an "error" entry instead of failing the batch.
+    """
+    pending = []
+    for doc_id, text, key in documents:
+        cached = response_cache.get(key)
+        if cached is not None:
+            yield {"id": doc_id, "summary": cached, "cached": True}
+        else:
+            pending.append((doc_id, text, key))
+    if not pending:
+        return
+
+    config = {"max_concurrency": Config.SUMMARY_BATCH_CONCURRENCY, "callbacks": callbacks}
+    inputs = [text for _, text, _ in pending]
+    for index, output in RunnableLambda(_summarize_one).batch_as_completed(inputs, config=config,
+                                                                            return_exceptions=True):
+        doc_id, _, key = pending[index]
+        if isinstance(output, Exception):
+            yield {"id": doc_id, "error": str(output)}
+        else:
+            response_cache.set(key, output)
+            yield {"id": doc_id, "summary": output, "cached": False}
@@ -0,0 +1,184 @@
+# backend/app/core/cache.py
+import hashlib
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Optional
+
+from config import Config
+
+
+def normalize_input(text: str) -> str:
+    """Normalize user input so trivially different pastes share a cache entry."""
+    text = unicodedata.normalize("NFC", str(text))
+    return " ".join(text.split())
+
+
+def cache_key(namespace: str, template: str, model: str, text: str) -> str:
+    """Content-addressed key over the prompt template, model name and input."""
+    digest = hashlib.sha256()
+    for part in (namespace, template, model, normalize_input(text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return f"{namespace}:{digest.hexdigest()}"
+
+
+class MemoryCacheBackend:
+    """In-process LRU cache bounded by entry count and total bytes."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (expires_at, value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value, size = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str, ttl: float):
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (time.monotonic() + ttl, value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes, "evictions": self.evictions}
+
+
+class RedisCacheBackend:
+    """Shared cache so every gunicorn worker sees the same hits.
+
+    Expiry uses Redis TTLs; size-based eviction is left to the server's
+    maxmemory policy (e.g. allkeys-lru).
+    """
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("RESPONSE_CACHE_BACKEND=redis requires the 'redis' package") from e
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(key)
+        return value.decode("utf-8") if value is not None else None
+
+    def set(self, key: str, value: str, ttl: float):
+        self._client.set(key, value.encode("utf-8"), ex=max(1, int(ttl)))
+
+    def stats(self) -> dict:
+        info = self._client.info("stats")
+        return {"evictions": info.get("evicted_keys", 0)}
+
+
+class ResponseCache:
+    """Response cache for deterministic (temperature 0) chain outputs."""
+
+    def __init__(self, backend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._stats_lock = threading.Lock()
+
+    def _count(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Response cache lookup failed: {e}")
+            value = None
+        self._count(value is not None)
+        return value
+
+    def set(self, key: str, value: str):
+        try:
+            self.backend.set(key, value, self.ttl)
+        except Exception as e:
+            print(f"Response cache store failed: {e}")
+
+    def record(self, key: str, chunks):
+        """Forward chunks and store the full text once the stream completes.
+
+        Errors and client disconnects end the generator early, so partial
+        responses never reach the cache.
+        """
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk)
+            yield chunk
+        if parts:
+            self.set(key, "".join(parts))
+
+    def stats(self) -> dict:
+        try:
+            backend_stats = self.backend.stats()
+        except Exception as e:
+            backend_stats = {"error": str(e)}
+        with self._stats_lock:
+            return {"hits": self.hits, "misses": self.misses, **backend_stats}
+
+
+class NullResponseCache(ResponseCache):
+    """Disabled cache: every request goes to the model."""
+
+    def __init__(self):
+        super().__init__(backend=None, ttl=0)
+
+    def get(self, key: str) -> Optional[str]:
+        self._count(False)
+        return None
+
+    def set(self, key: str, value: str):
+        pass
+
+    def record(self, key: str, chunks):
+        return chunks
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return {"enabled": False, "hits": 0, "misses": self.misses}
+
+
+def build_response_cache() -> ResponseCache:
+    backend = Config.RESPONSE_CACHE_BACKEND
+    if backend == "none":
+        return NullResponseCache()
+    if backend == "redis":
+        return ResponseCache(RedisCacheBackend(Config.RESPONSE_CACHE_REDIS_URL), Config.RESPONSE_CACHE_TTL)
+    return ResponseCache(
+        MemoryCacheBackend(Config.RESPONSE_CACHE_MAX_ENTRIES, Config.RESPONSE_CACHE_MAX_BYTES),
+        Config.RESPONSE_CACHE_TTL,
+    )
+
+
+response_cache = build_response_cache()
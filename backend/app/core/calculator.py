@@ -0,0 +1,124 @@
+# backend/app/core/calculator.py
+import ast
+import functools
+import re
+from decimal import Decimal, DivisionByZero, InvalidOperation, Overflow, localcontext
+
+# Bounds that keep the worst case to microseconds, whatever the model sends
+MAX_EXPRESSION_LENGTH = 200
+MAX_NODES = 64
+MAX_EXPONENT = 64
+MAX_MAGNITUDE = Decimal("1e18")
+PRECISION = 28
+DISPLAY_PLACES = Decimal("1e-10")
+
+_THOUSANDS_RE = re.compile(r"(?<=\d),(?=\d{3}\b)")
+_REPLACEMENTS = {"₹": "", "$": "", "×": "*", "÷": "/", "^": "**"}
+
+_BINARY_OPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY_OPS = (ast.UAdd, ast.USub)
+
+
+class CalculationError(ValueError):
+    """The expression is not plain arithmetic or exceeds the calculator's bounds."""
+
+
+def _normalize(expression: str) -> str:
+    for old, new in _REPLACEMENTS.items():
+        expression = expression.replace(old, new)
+    return _THOUSANDS_RE.sub("", expression).strip()
+
+
+@functools.lru_cache(maxsize=512)
+def _compile(expression: str) -> ast.expr:
+    """Parse and validate an expression once; repeated expressions skip this."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculationError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(expression, mode="eval")
+    except SyntaxError:
+        raise CalculationError("not a valid math expression") from None
+
+    nodes = 0
+    for node in ast.walk(tree.body):
+        nodes += 1
+        if nodes > MAX_NODES:
+            raise CalculationError(f"expression has more than {MAX_NODES} terms")
+        if isinstance(node, ast.Constant):
+            if type(node.value) not in (int, float):
+                raise CalculationError("only numbers are allowed")
+        elif isinstance(node, ast.BinOp):
+            if not isinstance(node.op, _BINARY_OPS):
+                raise CalculationError("only + - * / // % ** are allowed")
+        elif isinstance(node, ast.UnaryOp):
+            if not isinstance(node.op, _UNARY_OPS):
+                raise CalculationError("only + - * / // % ** are allowed")
+        elif not isinstance(node, (ast.operator, ast.unaryop)):
+            raise CalculationError(f"{type(node).__name__} is not allowed")
+    return tree.body
+
+
+def _checked(value: Decimal) -> Decimal:
+    if abs(value) > MAX_MAGNITUDE:
+        raise CalculationError("result is too large")
+    return value
+
+
+def _evaluate(node: ast.expr) -> Decimal:
+    if isinstance(node, ast.Constant):
+        return _checked(Decimal(str(node.value)))
+    if isinstance(node, ast.UnaryOp):
+        operand = _evaluate(node.operand)
+        return -operand if isinstance(node.op, ast.USub) else operand
+
+    left, right = _evaluate(node.left), _evaluate(node.right)
+    op = node.op
+    if isinstance(op, ast.Pow):
+        if right != right.to_integral_value() or abs(right) > MAX_EXPONENT:
+            raise CalculationError(f"exponents must be whole numbers up to {MAX_EXPONENT}")
+        if left == 0 and right < 0:
+            raise CalculationError("division by zero")
+        if right == 0:
+            # Python semantics (0 ** 0 == 1), where Decimal raises InvalidOperation
+            return Decimal(1)
+        return _checked(left ** int(right))
+    if isinstance(op, (ast.Div, ast.FloorDiv, ast.Mod)) and right == 0:
+        raise CalculationError("division by zero")
+    if isinstance(op, ast.Add):
+        result = left + right
+    elif isinstance(op, ast.Sub):
+        result = left - right
+    elif isinstance(op, ast.Mult):
+        result = left * right
+    elif isinstance(op, ast.Div):
+        result = left / right
+    elif isinstance(op, ast.FloorDiv):
+        # Python semantics (round toward negative infinity), unlike Decimal's //
+        result = (left / right).to_integral_value(rounding="ROUND_FLOOR")
+    else:
+        result = left - right * (left / right).to_integral_value(rounding="ROUND_FLOOR")
+    return _checked(result)
+
+
+def evaluate(expression: str) -> Decimal:
+    """Evaluate plain arithmetic exactly in decimal, so 0.1 + 0.2 == 0.3.
+
+    Raises CalculationError for anything but numbers and + - * / // % **,
+    and when the expression or any intermediate result exceeds the bounds.
+    """
+    tree = _compile(_normalize(expression))
+    with localcontext() as context:
+        context.prec = PRECISION
+        try:
+            return _evaluate(tree)
+        except (InvalidOperation, DivisionByZero, Overflow) as e:
+            raise CalculationError(f"cannot evaluate: {type(e).__name__}") from None
+
+
+def format_result(value: Decimal) -> str:
+    """Whole numbers without a decimal point, others to at most 10 places."""
+    with localcontext() as context:
+        context.prec = PRECISION + 12  # room for 18 integer digits plus the places
+        if value == value.to_integral_value():
+            return str(value.quantize(Decimal(1)))
+        return format(value.quantize(DISPLAY_PLACES).normalize(), "f")
@@ -0,0 +1,160 @@
+# backend/app/core/coalesce.py
+import threading
+from typing import Callable, Iterator, List, Optional
+
+from config import Config
+
+
+class _Flight:
+    """One upstream stream shared by every request with the same key."""
+
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.cond = threading.Condition()
+
+
+class _Subscription:
+    """One request's view of a flight: the chunks received so far, then live ones.
+
+    It counts as a subscriber from creation until close(). That runs when
+    the stream ends, when the response is closed, and when the subscription
+    is garbage-collected without ever being iterated: a client that
+    disconnects before the first chunk closes the wrapping generators, which
+    never reach this iterator.
+    """
+
+    def __init__(self, flight: _Flight):
+        self._flight = flight
+        self._index = 0
+        self._closed = False
+        with flight.cond:
+            flight.subscribers += 1
+
+    def __iter__(self) -> "_Subscription":
+        return self
+
+    def __next__(self) -> str:
+        flight = self._flight
+        with flight.cond:
+            while not self._closed and self._index >= len(flight.chunks) and not flight.done:
+                flight.cond.wait()
+            if not self._closed and self._index < len(flight.chunks):
+                self._index += 1
+                return flight.chunks[self._index - 1]
+            error = flight.error if not self._closed else None
+        self.close()
+        if error is not None:
+            raise error
+        raise StopIteration
+
+    def close(self):
+        with self._flight.cond:
+            if not self._closed:
+                self._closed = True
+                self._flight.subscribers -= 1
+                self._flight.cond.notify_all()
+
+    def __del__(self):
+        self.close()
+
+
+class SingleFlight:
+    """Coalesce identical in-flight streaming requests onto one upstream call.
+
+    The first request for a key starts the upstream stream in a background
+    thread; later requests attach to it and replay the chunks already
+    received before following along live. The upstream stream is closed
+    early only once the last subscriber has disconnected.
+    """
+
+    def __init__(self):
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.cancelled = 0
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def stream(self, key: str, produce: Callable[[], Iterator[str]],
+               admit: Optional[Callable[[], None]] = None) -> Iterator[str]:
+        """Join the flight for key, or start one with produce().
+
+        admit is called only when a new flight would start, under the same
+        lock as the join-or-start decision, so a request cannot be charged
+        for a flight it ends up joining or skip the check for one that
+        finished in between. If it raises, nothing starts and the exception
+        propagates.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            start = flight is None
+            if start:
+                if admit is not None:
+                    admit()
+                flight = self._flights[key] = _Flight()
+                self.upstream_calls += 1
+            else:
+                self.coalesced += 1
+            subscription = _Subscription(flight)
+        if start:
+            threading.Thread(target=self._run, args=(key, flight, produce), daemon=True).start()
+        return subscription
+
+    def _run(self, key: str, flight: _Flight, produce: Callable[[], Iterator[str]]):
+        upstream = None
+        try:
+            upstream = produce()
+            for chunk in upstream:
+                with flight.cond:
+                    abandoned = flight.subscribers == 0
+                    if not abandoned:
+                        flight.chunks.append(chunk)
+                        flight.cond.notify_all()
+                if abandoned:
+                    with self._lock:
+                        self.cancelled += 1
+                    break
+        except Exception as e:
+            flight.error = e
+        except BaseException as e:
+            # GreenletExit and the like stop this thread, but subscribers must
+            # see an error rather than a clean end to a truncated answer.
+            # Wrapped, so it does not also stop every subscriber.
+            flight.error = RuntimeError(f"upstream stream interrupted ({type(e).__name__})")
+            flight.error.__cause__ = e
+            raise
+        finally:
+            if upstream is not None and hasattr(upstream, "close"):
+                upstream.close()
+            with self._lock:
+                if self._flights.get(key) is flight:
+                    del self._flights[key]
+            with flight.cond:
+                flight.done = True
+                flight.cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_flight = len(self._flights)
+        return {
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "cancelled": self.cancelled,
+            "in_flight": in_flight,
+        }
+
+
+class NoCoalescing(SingleFlight):
+    """Every request gets its own upstream stream."""
+
+    def stream(self, key: str, produce: Callable[[], Iterator[str]],
+               admit: Optional[Callable[[], None]] = None) -> Iterator[str]:
+        if admit is not None:
+            admit()
+        self.upstream_calls += 1
+        return produce()
+
+
+request_coalescer = SingleFlight() if Config.COALESCE_REQUESTS else NoCoalescing()
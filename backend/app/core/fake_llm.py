@@ -0,0 +1,156 @@
+# backend/app/core/fake_llm.py
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from langchain_core.callbacks import CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.pydantic_v1 import PrivateAttr
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+class FakeLLMError(Exception):
+    """Injected upstream failure, shaped like a Gemini quota error."""
+
+
+class FakeStreamingChatModel(BaseChatModel):
+    """Deterministic local chat model that streams with configurable latency.
+
+    Selected with LLM_PROVIDER=fake so the API can be run and load-tested
+    without calling Gemini. Replies cycle through ``responses``; when none are
+    given the model echoes the last line of the prompt back. With
+    ``quota_per_second`` set it behaves like a quota-enforcing upstream and
+    rejects calls beyond that many in any rolling second. With
+    ``record_prompts`` set it keeps that many of the latest prompts, as
+    (role, content) pairs, for checking what was actually sent.
+
+    A reply may also be a dict, ``{"content": ..., "tool_calls": [{"name":
+    ..., "args": {...}}, ...]}``, to script native tool calls. Like a real
+    provider the model only returns them once bound with bind_tools(); more
+    than one entry is a parallel call. Streamed, the calls arrive as tool
+    call chunks after the content.
+    """
+
+    responses: List[Union[str, Dict[str, Any]]] = []
+    ttft: float = 0.0
+    tokens_per_second: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    quota_per_second: float = 0.0
+    record_prompts: int = 0
+    call_count: int = 0
+    _recent_calls: deque = PrivateAttr(default_factory=deque)
+    _prompts: deque = PrivateAttr(default_factory=deque)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-streaming"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _check_quota(self):
+        now = time.monotonic()
+        with self._lock:
+            while self._recent_calls and now - self._recent_calls[0] >= 1.0:
+                self._recent_calls.popleft()
+            if len(self._recent_calls) >= self.quota_per_second:
+                raise FakeLLMError("429 Quota exceeded (fake upstream)")
+            self._recent_calls.append(now)
+
+    def recorded_prompts(self) -> List[List[Tuple[str, str]]]:
+        with self._lock:
+            return list(self._prompts)
+
+    def _record(self, messages: List[BaseMessage]):
+        with self._lock:
+            self._prompts.append([(message.type, str(message.content)) for message in messages])
+            while len(self._prompts) > self.record_prompts:
+                self._prompts.popleft()
+
+    def _next_reply(self, messages: List[BaseMessage], stop: Optional[List[str]],
+                    tools: Optional[List[dict]] = None) -> Tuple[str, List[dict]]:
+        call = self.call_count
+        self.call_count += 1
+        if self.record_prompts:
+            self._record(messages)
+
+        if self.error_rate and random.Random(self.seed + call).random() < self.error_rate:
+            raise FakeLLMError("429 Resource has been exhausted (fake upstream)")
+        if self.quota_per_second:
+            self._check_quota()
+
+        tool_calls = []
+        if self.responses:
+            reply = self.responses[call % len(self.responses)]
+            if isinstance(reply, dict):
+                text = reply.get("content", "")
+                if tools:
+                    tool_calls = [{"name": tool_call["name"], "args": tool_call.get("args", {}),
+                                   "id": f"call_{call}_{index}"}
+                                  for index, tool_call in enumerate(reply.get("tool_calls", []))]
+            else:
+                text = reply
+        else:
+            prompt = str(messages[-1].content) if messages else ""
+            lines = [line for line in prompt.splitlines() if line.strip()]
+            last_line = lines[-1].strip() if lines else ""
+            text = f"This is a fake answer to: {last_line[:200]}"
+            # Let the ReAct tracker agent finish in a single step.
+            if any("Final Answer" in str(message.content) for message in messages):
+                text = f"Thought: I can answer directly.\nFinal Answer: {text}"
+
+        for marker in stop or []:
+            index = text.find(marker)
+            if index != -1:
+                text = text[:index]
+        return text, tool_calls
+
+    def _token_delay(self) -> float:
+        return 1.0 / self.tokens_per_second if self.tokens_per_second > 0 else 0.0
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        text, tool_calls = self._next_reply(messages, stop, kwargs.get("tools"))
+        time.sleep(self.ttft + self._token_delay() * len(_TOKEN_RE.findall(text)))
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text, tool_calls=tool_calls))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        text, tool_calls = self._next_reply(messages, stop, kwargs.get("tools"))
+        time.sleep(self.ttft)
+        delay = self._token_delay()
+        for index, token in enumerate(_TOKEN_RE.findall(text)):
+            if index and delay:
+                time.sleep(delay)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+        if tool_calls:
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content="", tool_call_chunks=[
+                {"name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"], "index": index}
+                for index, tool_call in enumerate(tool_calls)
+            ]))
+            if run_manager:
+                run_manager.on_llm_new_token("", chunk=chunk)
+            yield chunk
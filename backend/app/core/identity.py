@@ -0,0 +1,39 @@
+# backend/app/core/identity.py
+import hashlib
+import hmac
+from typing import Optional
+
+from app.core.store import MAX_TENANT_LENGTH
+from config import Config
+
+
+class InvalidToken(ValueError):
+    """The Authorization header carries a user token that does not verify."""
+
+
+def _signature(user_id: str) -> str:
+    return hmac.new(Config.USER_TOKEN_SECRET.encode("utf-8"), user_id.encode("utf-8"), hashlib.sha256).hexdigest()
+
+
+def sign_user(user_id: str) -> str:
+    """A bearer token for user_id ("<user_id>.<hmac>"), for the service that logs users in."""
+    if not Config.USER_TOKEN_SECRET:
+        raise ValueError("USER_TOKEN_SECRET is not set")
+    return f"{user_id}.{_signature(user_id)}"
+
+
+def authenticated_user(authorization: Optional[str]) -> Optional[str]:
+    """The user ID from an "Authorization: Bearer <token>" header, or None without one.
+
+    Raises InvalidToken for a malformed or forged token, or when no
+    USER_TOKEN_SECRET is configured to check it against.
+    """
+    if not authorization:
+        return None
+    scheme, _, token = authorization.partition(" ")
+    user_id, _, signature = token.strip().rpartition(".")
+    if scheme.lower() != "bearer" or not user_id or len(user_id) > MAX_TENANT_LENGTH:
+        raise InvalidToken("expected 'Authorization: Bearer <user token>'")
+    if not Config.USER_TOKEN_SECRET or not hmac.compare_digest(signature, _signature(user_id)):
+        raise InvalidToken("user token does not verify")
+    return user_id
@@ -0,0 +1,115 @@
+# backend/app/core/intents.py
+import re
+import threading
+from typing import Optional, Tuple
+
+# Descriptions that map unambiguously to a category. Anything else is left
+# to the agent, which can ask or infer from context.
+CATEGORY_KEYWORDS = {
+    "food": {"food", "coffee", "tea", "lunch", "dinner", "breakfast", "snack", "snacks", "pizza",
+             "burger", "restaurant", "cafe", "meal", "groceries", "grocery"},
+    "travel": {"travel", "bus", "taxi", "cab", "uber", "ola", "train", "metro", "flight", "fuel",
+               "petrol", "diesel", "parking", "auto"},
+    "entertainment": {"entertainment", "movie", "movies", "netflix", "concert", "game", "games", "spotify"},
+    "shopping": {"shopping", "clothes", "shoes", "shirt", "amazon"},
+    "bills": {"bills", "bill", "rent", "electricity", "internet", "wifi", "phone", "recharge", "water"},
+    "health": {"health", "medicine", "medicines", "doctor", "pharmacy", "gym"},
+}
+
+# Amounts are recorded in rupees, so only rupee units are accepted; "$50" or
+# "50 dollars" falls through to the agent instead of being booked as ₹50.
+_AMOUNT = r"(?:rs\.?|inr|₹)?\s*(\d+(?:\.\d+)?)\s*(?:rs|rupees|inr|₹)?"
+
+ADD_EXPENSE_RE = re.compile(r"^(?:add|added|spent|spend|paid|pay)\s+" + _AMOUNT + r"\s+(?:for|on)\s+(?:a\s+|an\s+|the\s+|my\s+)?([a-z][a-z \-']{0,60})$")
+SET_BUDGET_RE = re.compile(r"^(?:set|change|update|make)\s+(?:my\s+|the\s+)?(?:monthly\s+)?budget\s+(?:to\s+|at\s+|of\s+|as\s+)?" + _AMOUNT + r"$")
+SUMMARY_RE = re.compile(r"^(?:what(?:'s| is)|show(?: me)?|give me|get|check)?\s*(?:my\s+|the\s+)?(?:total|summary|expense summary|expenses summary|total spending|total expenses|expenses|spending)$")
+PERIOD_SUMMARY_RE = re.compile(r"^(?:how much did i spend|what did i spend|(?:what(?:'s| is)|show(?: me)?|give me|get|check)?\s*(?:my\s+|the\s+)?(?:total|summary|expense summary|expenses summary|total spending|total expenses|expenses|spending))\s+(?:for\s+)?(today|this week|this month|this year)$")
+BUDGET_STATUS_RE = re.compile(r"^(?:(?:what(?:'s| is)|show(?: me)?|check)\s+)?(?:my\s+|the\s+)?budget(?:\s+status)?$|^how much (?:budget )?(?:is |do i have )?left$")
+# Numbers joined by binary operators, each operator followed by an operand,
+# so "what is 10%" (a percentage, not modulo) is left to the agent. The
+# whitespace runs never overlap, which keeps matching linear.
+_OPERAND = r"[\s(]*(?:[+\-]\s*)?\d+(?:\.\d+)?[\s)]*"
+_OPERATOR = r"(?:\*\*|//|[+\-*/%])"
+CALCULATE_RE = re.compile(r"^(?:calculate|compute|what(?:'s| is))\s+(" + _OPERAND + r"(?:" + _OPERATOR + _OPERAND + r")+)$")
+
+
+def _normalize(prompt: str) -> str:
+    text = " ".join(str(prompt).lower().split())
+    return text.rstrip("?!. ")
+
+
+def infer_category(description: str) -> Optional[str]:
+    words = set(re.findall(r"[a-z]+", description))
+    matches = {category for category, keywords in CATEGORY_KEYWORDS.items() if words & keywords}
+    return matches.pop() if len(matches) == 1 else None
+
+
+def parse_command(prompt: str) -> Optional[Tuple[str, str]]:
+    """Recognize common tracker commands without calling the model.
+
+    Returns (tool_name, tool_input) in the same format the agent would use,
+    or None when the prompt is not an unambiguous match.
+    """
+    text = _normalize(prompt)
+
+    match = ADD_EXPENSE_RE.match(text)
+    if match:
+        amount, description = match.group(1), match.group(2).strip()
+        category = infer_category(description)
+        if category is None or float(amount) <= 0:
+            return None
+        return "add_expense", f"{amount}|{category}|{description}"
+
+    match = SET_BUDGET_RE.match(text)
+    if match:
+        return "set_budget", match.group(1)
+
+    if SUMMARY_RE.match(text):
+        return "get_expense_summary", ""
+
+    match = PERIOD_SUMMARY_RE.match(text)
+    if match:
+        return "get_expense_summary", match.group(1)
+
+    if BUDGET_STATUS_RE.match(text):
+        return "get_budget_status", ""
+
+    match = CALCULATE_RE.match(text)
+    if match:
+        return "calculate", match.group(1).strip()
+
+    return None
+
+
+class FastPathStats:
+    """Hit rate and latency of the fast path versus the agent."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.fast_seconds = 0.0
+        self.agent_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, hit: bool, seconds: float):
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.fast_seconds += seconds
+            else:
+                self.misses += 1
+                self.agent_seconds += seconds
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "avg_fast_ms": 1000 * self.fast_seconds / self.hits if self.hits else 0.0,
+                "avg_agent_ms": 1000 * self.agent_seconds / self.misses if self.misses else 0.0,
+            }
+
+
+fast_path_stats = FastPathStats()
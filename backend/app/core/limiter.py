@@ -0,0 +1,275 @@
+# backend/app/core/limiter.py
+import heapq
+import itertools
+import json
+import math
+import threading
+import time
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from flask import Response
+from langchain_core.callbacks import BaseCallbackHandler
+
+from app.core.agents import rate_limit_errors
+from config import Config
+
+# Lower values are admitted first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_SUMMARY = 1
+PRIORITY_BATCH = 2
+
+# Ignore further quota errors for this long after shrinking the limit, so a
+# burst of failures from calls already in flight only halves it once.
+DECREASE_COOLDOWN = 1.0
+
+
+class LimiterBusy(Exception):
+    """The upstream limiter could not admit the request in time."""
+
+    def __init__(self, retry_after: int, position: int):
+        super().__init__(f"Upstream model is busy; retry in {retry_after}s")
+        self.retry_after = retry_after
+        self.position = position
+
+
+class Permit:
+    """One admitted upstream request; release() may be called more than once."""
+
+    def __init__(self, limiter: "AdaptiveLimiter"):
+        self._limiter = limiter
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._limiter._release(time.monotonic() - self._started)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class AdaptiveLimiter:
+    """Token bucket plus AIMD concurrency limit with a priority queue.
+
+    acquire() waits until a model call is first in the queue (by priority,
+    then arrival), a concurrency slot is free and the bucket has a token.
+    The concurrency limit grows by 1/limit per successful model call and
+    halves on a quota error or timeout. admit() is the cheaper check a
+    request makes before it starts: it only turns requests away while the
+    queue could not drain in time.
+    """
+
+    def __init__(self, rate: float, burst: int, min_limit: int, max_limit: int,
+                 max_queue: int, queue_timeout: float):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.throttled = 0
+        self._tokens = float(self.burst)
+        self._refilled = time.monotonic()
+        self._last_decrease = 0.0
+        self._avg_hold = 1.0
+        self._queue = []  # heap of (priority, arrival)
+        self._arrivals = itertools.count()
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float):
+        if self.rate > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+
+    def _has_token(self) -> bool:
+        return self.rate <= 0 or self._tokens >= 1
+
+    def _retry_after(self, position: int) -> int:
+        """Rough seconds until a request at this queue position would be admitted."""
+        estimate = position * self._avg_hold / max(1.0, self.limit)
+        if self.rate > 0:
+            estimate = max(estimate, position / self.rate)
+        return min(60, max(1, math.ceil(estimate)))
+
+    def admit(self):
+        """Raise LimiterBusy if a new request's model calls could not be admitted in time.
+
+        That is when the queue is full, or when every slot or token is taken
+        and the queue ahead would not drain within LLM_QUEUE_TIMEOUT. Nothing
+        is reserved; each model call still waits for its own permit.
+        """
+        with self._cond:
+            self._refill(time.monotonic())
+            position = len(self._queue) + 1
+            saturated = self.in_flight >= int(self.limit) or not self._has_token()
+            if position > self.max_queue or (saturated and self._retry_after(position) > self.queue_timeout):
+                self.rejected += 1
+                raise LimiterBusy(self._retry_after(position), position)
+
+    def acquire(self, priority: int, timeout: Optional[float] = -1) -> Permit:
+        """Wait for admission; raise LimiterBusy when the queue is full or the wait times out.
+
+        timeout=None waits indefinitely and ignores the queue cap (for batch
+        work that is already bounded); the default is LLM_QUEUE_TIMEOUT.
+        """
+        if timeout == -1:
+            timeout = self.queue_timeout
+        with self._cond:
+            if timeout is not None and len(self._queue) >= self.max_queue:
+                self.rejected += 1
+                raise LimiterBusy(self._retry_after(len(self._queue) + 1), len(self._queue) + 1)
+            entry = (priority, next(self._arrivals))
+            heapq.heappush(self._queue, entry)
+            deadline = None if timeout is None else time.monotonic() + timeout
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._queue[0] == entry and self.in_flight < int(self.limit) and self._has_token():
+                        heapq.heappop(self._queue)
+                        if self.rate > 0:
+                            self._tokens -= 1
+                        self.in_flight += 1
+                        self.admitted += 1
+                        self._cond.notify_all()
+                        return Permit(self)
+                    wait = None if deadline is None else deadline - now
+                    if wait is not None and wait <= 0:
+                        position = sorted(self._queue).index(entry) + 1
+                        self.rejected += 1
+                        raise LimiterBusy(self._retry_after(position), position)
+                    if not self._has_token():
+                        token_wait = (1 - self._tokens) / self.rate
+                        wait = token_wait if wait is None else min(wait, token_wait)
+                    self._cond.wait(wait)
+            except BaseException:
+                # Timed out, or interrupted while waiting (e.g. gevent.Timeout):
+                # leave the queue so the entry cannot block everyone behind it.
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                    self._cond.notify_all()
+                raise
+
+    def _release(self, held: float):
+        with self._cond:
+            self.in_flight -= 1
+            self._avg_hold = 0.9 * self._avg_hold + 0.1 * held
+            self._cond.notify_all()
+
+    def record_success(self):
+        with self._cond:
+            if self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                self._cond.notify_all()
+
+    def record_throttle(self):
+        now = time.monotonic()
+        with self._cond:
+            self.throttled += 1
+            if now - self._last_decrease >= DECREASE_COOLDOWN:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self._last_decrease = now
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "concurrency_limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": len(self._queue),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "throttled": self.throttled,
+            }
+
+
+def is_throttle_error(error: BaseException) -> bool:
+    """Quota errors and timeouts are the signals that shrink the limit."""
+    if isinstance(error, rate_limit_errors() + (TimeoutError,)):
+        return True
+    try:
+        from google.api_core.exceptions import DeadlineExceeded
+    except ImportError:
+        return False
+    return isinstance(error, DeadlineExceeded)
+
+
+class LimiterCallbackHandler(BaseCallbackHandler):
+    """Takes a limiter permit for every model call and feeds back its outcome.
+
+    The permit is acquired when the call starts, at this handler's priority,
+    and released when it ends, so an agent turn or a map-reduce summary is
+    limited per model call rather than once per request. raise_error lets
+    LimiterBusy abort the call instead of being logged and ignored; list
+    this handler first so no other handler sees a call that never starts.
+
+    max_in_flight also caps the model calls made under this one handler,
+    however deeply nested, e.g. every chunk call of every document in a
+    batch request.
+    """
+
+    raise_error = True
+
+    def __init__(self, limiter: AdaptiveLimiter, priority: int = PRIORITY_INTERACTIVE,
+                 timeout: Optional[float] = -1, max_in_flight: Optional[int] = None):
+        self.limiter = limiter
+        self.priority = priority
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self._permits: Dict[UUID, Permit] = {}
+
+    def _acquire(self, run_id: UUID):
+        if self._slots is not None:
+            self._slots.acquire()
+        try:
+            self._permits[run_id] = self.limiter.acquire(self.priority, self.timeout)
+        except BaseException:
+            if self._slots is not None:
+                self._slots.release()
+            raise
+
+    def _release(self, run_id: UUID):
+        permit = self._permits.pop(run_id, None)
+        if permit is not None:
+            permit.release()
+            if self._slots is not None:
+                self._slots.release()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *,
+                            run_id: UUID, **kwargs: Any) -> None:
+        self._acquire(run_id)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *,
+                     run_id: UUID, **kwargs: Any) -> None:
+        self._acquire(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        self._release(run_id)
+        self.limiter.record_success()
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._release(run_id)
+        if is_throttle_error(error):
+            self.limiter.record_throttle()
+
+
+def busy_response(error: LimiterBusy) -> Response:
+    """503 telling the client where it stood in the queue and when to retry."""
+    body = {"error": str(error), "queue_position": error.position, "retry_after": error.retry_after}
+    return Response(json.dumps(body), status=503, mimetype='application/json',
+                    headers={'Retry-After': str(error.retry_after)})
+
+
+upstream_limiter = AdaptiveLimiter(
+    Config.LLM_RATE_LIMIT, Config.LLM_BURST, Config.LLM_MIN_CONCURRENCY, Config.LLM_MAX_CONCURRENCY,
+    Config.LLM_MAX_QUEUE, Config.LLM_QUEUE_TIMEOUT,
+)
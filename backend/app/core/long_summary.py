@@ -0,0 +1,107 @@
+# backend/app/core/long_summary.py
+import math
+from typing import List
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.core.agents import (
+    get_chunk_summary_chain, get_combine_summary_chain, get_summarizer_chain, with_quota_retry,
+)
+from app.core.streaming import iter_chain
+from config import Config
+
+# Rough token estimate; good enough to stay well inside the context window.
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def is_long_document(text: str) -> bool:
+    return estimate_tokens(text) > Config.SUMMARY_LONG_THRESHOLD_TOKENS
+
+
+def split_text(text: str) -> List[str]:
+    """Split text into token-bounded, overlapping chunks on natural boundaries."""
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=Config.SUMMARY_CHUNK_TOKENS,
+        chunk_overlap=Config.SUMMARY_CHUNK_OVERLAP_TOKENS,
+        length_function=estimate_tokens,
+    )
+    return splitter.split_text(text)
+
+
+def group_summaries(summaries: List[str], budget_tokens: int) -> List[List[str]]:
+    """Pack consecutive summaries into groups that fit the token budget.
+
+    Groups hold at least two summaries whenever possible, so every reduce
+    level at least halves the count and the reduction always terminates.
+    """
+    groups, current, current_tokens = [], [], 0
+    for summary in summaries:
+        tokens = estimate_tokens(summary)
+        if len(current) >= 2 and current_tokens + tokens > budget_tokens:
+            groups.append(current)
+            current, current_tokens = [], 0
+        current.append(summary)
+        current_tokens += tokens
+    if current:
+        if len(current) == 1 and groups:
+            groups[-1].append(current[0])
+        else:
+            groups.append(current)
+    return groups
+
+
+def _summarize_all(chain, texts: List[str], stage: str, callbacks=None, retry_attempts: int = 1):
+    """Run chain over texts with bounded concurrency, yielding progress events.
+
+    Returns the outputs in input order.
+    """
+    results = [None] * len(texts)
+    done = 0
+    inputs = [{"text": text} for text in texts]
+    config = {"max_concurrency": Config.SUMMARY_MAX_CONCURRENCY, "callbacks": callbacks}
+    for index, output in with_quota_retry(chain, retry_attempts).batch_as_completed(inputs, config=config):
+        results[index] = output
+        done += 1
+        yield ("progress", f"{stage}: {done}/{len(texts)}")
+    return results
+
+
+def summarize_long(text: str, callbacks=None, retry_attempts: int = 1):
+    """Map-reduce summary of a long document.
+
+    Yields ("progress", message) events while chunks are summarized and
+    reduced, then ("text", chunk) events as the final 3-sentence summary
+    streams from the model.
+
+    With retry_attempts above 1 each model call is retried on its own after
+    a quota error, so one 429 costs one call rather than the whole document.
+    The final summary then arrives as a single text event, since a reply
+    that has started streaming cannot be retried.
+    """
+    chunks = split_text(text)
+    yield ("progress", f"Split document into {len(chunks)} chunks")
+    summaries = yield from _summarize_all(
+        get_chunk_summary_chain(), chunks, "Summarized chunks", callbacks, retry_attempts
+    )
+
+    level = 1
+    while len(summaries) > 1 and estimate_tokens("\n\n".join(summaries)) > Config.SUMMARY_CHUNK_TOKENS:
+        groups = group_summaries(summaries, Config.SUMMARY_CHUNK_TOKENS)
+        summaries = yield from _summarize_all(
+            get_combine_summary_chain(), ["\n\n".join(group) for group in groups], f"Reduce level {level}",
+            callbacks, retry_attempts,
+        )
+        level += 1
+
+    yield ("progress", "Writing final summary")
+    final_input = {"text": "\n\n".join(summaries)}
+    if retry_attempts > 1:
+        final = with_quota_retry(get_summarizer_chain(), retry_attempts)
+        yield ("text", final.invoke(final_input, {"callbacks": callbacks}).content)
+        return
+    for chunk in iter_chain(get_summarizer_chain, final_input, {"callbacks": callbacks}):
+        yield ("text", chunk)
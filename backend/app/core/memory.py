@@ -0,0 +1,107 @@
+# backend/app/core/memory.py
+import re
+import unicodedata
+from typing import List, Tuple
+
+from app.core.long_summary import CHARS_PER_TOKEN, estimate_tokens
+from app.core.store import expense_store
+from config import Config
+
+SUMMARY_PREFIX = "Summary: "
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def _is_decoration(ch: str) -> bool:
+    # Pictographs, joiners, variation selectors and skin-tone modifiers
+    return (unicodedata.category(ch) in ("So", "Cf") or ch in "\ufe0e\ufe0f"
+            or "\U0001f3fb" <= ch <= "\U0001f3ff")
+
+
+def _strip_decoration(text: str) -> str:
+    """Drop emojis and other pictographs, which cost tokens but carry no state."""
+    kept = [ch for ch in text if not _is_decoration(ch)]
+    return _WHITESPACE_RE.sub(" ", "".join(kept)).strip()
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    limit = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def _compact_message(message: str) -> str:
+    # The budget and totals in an answer are repeated by the state snapshot,
+    # so only its first line is kept.
+    if message.startswith("AI: "):
+        lines = [line for line in message.splitlines() if _strip_decoration(line)]
+        message = lines[0] if lines else message
+    return _truncate(_strip_decoration(message), Config.TRACKER_MEMORY_MESSAGE_TOKENS)
+
+
+def _split_summary(history: List[str]) -> Tuple[str, List[str]]:
+    if history and history[0].startswith(SUMMARY_PREFIX):
+        return history[0][len(SUMMARY_PREFIX):], history[1:]
+    return "", history
+
+
+def _fold(summary: str, message: str) -> str:
+    """Add a dropped message to the rolling summary, keeping its newest part.
+
+    Only the user's requests are kept; the answers to them are covered by
+    the state snapshot.
+    """
+    if not message.startswith("Human: "):
+        return summary
+    request = message[len("Human: "):]
+    summary = f"{summary}; {request}" if summary else f"Earlier the user asked: {request}"
+    limit = Config.TRACKER_MEMORY_SUMMARY_TOKENS * CHARS_PER_TOKEN
+    if len(summary) > limit:
+        tail = summary[len(summary) - limit:]
+        if "; " in tail:
+            tail = tail[tail.find("; ") + 2:]
+        summary = "Earlier the user asked: ..." + tail
+    return summary
+
+
+def compact_history(history: List[str]) -> List[str]:
+    """Fit a conversation into the tracker's memory budget.
+
+    Messages are stripped of decoration and capped in length; the oldest
+    turns are then folded into a rolling summary (kept as the first
+    message) until the rest fits TRACKER_MEMORY_TOKENS and
+    SESSION_MAX_MESSAGES. The newest turn is always kept verbatim.
+    """
+    summary, messages = _split_summary(history)
+    messages = [_compact_message(message) for message in messages]
+    max_messages = max(2, Config.SESSION_MAX_MESSAGES - 1)
+
+    def size() -> int:
+        return estimate_tokens(summary) + sum(estimate_tokens(message) for message in messages)
+
+    while len(messages) > 2 and (len(messages) > max_messages or size() > Config.TRACKER_MEMORY_TOKENS
+                                 or messages[0].startswith("AI: ")):
+        summary = _fold(summary, messages.pop(0))
+    return ([SUMMARY_PREFIX + summary] if summary else []) + messages
+
+
+def state_snapshot() -> str:
+    """One line describing the ledger, so the agent need not recall it from old turns."""
+    budget = expense_store.get_budget()["amount"]
+    spent = expense_store.total_spent()
+    parts = [f"spent ₹{spent:.2f} across {expense_store.count()} expenses"]
+    if budget:
+        parts.append(f"budget ₹{budget:.2f} ({spent / budget * 100:.0f}% used)")
+    else:
+        parts.append("no budget set")
+    recent = expense_store.recent_expenses(Config.TRACKER_MEMORY_RECENT_EXPENSES)
+    if recent:
+        parts.append("latest: " + ", ".join(
+            f"₹{e['amount']:.2f} {e['category']} ({e['description']})" for e in recent
+        ))
+    return "Current state: " + "; ".join(parts)
+
+
+def render_chat_history(history: List[str]) -> str:
+    """Text for the prompt's {chat_history} slot: state snapshot, then the compacted turns."""
+    lines = [state_snapshot()]
+    lines.extend(compact_history(history))
+    return "\n".join(lines)
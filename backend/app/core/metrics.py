@@ -0,0 +1,182 @@
+# backend/app/core/metrics.py
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (16, 64, 256, 1024, 4096, 16384, 65536)
+ITERATION_BUCKETS = (1, 2, 3, 4, 5, 10)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labels, key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series):
+                    cumulative += count
+                    bucket_labels = _format_labels(self.labels, key, 'le="%s"' % bound)
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                cumulative += series[len(self.buckets)]
+                bucket_labels = _format_labels(self.labels, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {series[-1]}")
+                lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+TTFB_SECONDS = Histogram("api_ttfb_seconds", "Time from request start to the first streamed chunk.", ("endpoint",))
+STREAM_SECONDS = Histogram("api_stream_duration_seconds", "Time from request start to the end of the stream.", ("endpoint",))
+LLM_CALL_SECONDS = Histogram("llm_call_seconds", "Latency of a single model call.", ("endpoint",))
+LLM_TOKENS = Histogram("llm_tokens", "Tokens per model call.", ("endpoint", "direction"), TOKEN_BUCKETS)
+PROMPT_TOKENS = Histogram("llm_prompt_tokens", "Prompt tokens per model call, by cacheable prefix or dynamic part.",
+                          ("endpoint", "part"), TOKEN_BUCKETS)
+AGENT_ITERATIONS = Histogram("agent_iterations", "Model calls per tracker agent turn.", ("endpoint",), ITERATION_BUCKETS)
+TOOL_SECONDS = Histogram("tool_call_seconds", "Latency of a tracker tool call.", ("tool",))
+REQUESTS = Counter("api_requests_total", "Requests handled, by endpoint and path taken.", ("endpoint", "path"))
+
+ALL_METRICS = [REQUESTS, TTFB_SECONDS, STREAM_SECONDS, LLM_CALL_SECONDS, LLM_TOKENS, PROMPT_TOKENS,
+               AGENT_ITERATIONS, TOOL_SECONDS]
+
+
+def render_metrics() -> str:
+    """Prometheus text exposition of all metrics in this worker."""
+    lines = []
+    for metric in ALL_METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4) if text else 0
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback recording model latency, tokens and tool latency.
+
+    One handler is created per request; it only stores start times keyed
+    by run ID and counts model calls for the agent iteration histogram.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.llm_calls = 0
+        self._started: Dict[UUID, float] = {}
+        self._prompt_tokens: Dict[UUID, int] = {}
+        self._tool_names: Dict[UUID, str] = {}
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *,
+                            run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+        self._prompt_tokens[run_id] = sum(
+            _estimate_tokens(str(message.content)) for batch in messages for message in batch
+        )
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *,
+                     run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+        self._prompt_tokens[run_id] = sum(_estimate_tokens(prompt) for prompt in prompts)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            LLM_CALL_SECONDS.observe(time.perf_counter() - started, endpoint=self.endpoint)
+        self.llm_calls += 1
+
+        tokens_in = self._prompt_tokens.pop(run_id, 0)
+        tokens_out = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    tokens_in = usage.get("input_tokens", tokens_in)
+                    tokens_out += usage.get("output_tokens", 0)
+                else:
+                    tokens_out += _estimate_tokens(generation.text)
+        LLM_TOKENS.observe(tokens_in, endpoint=self.endpoint, direction="in")
+        LLM_TOKENS.observe(tokens_out, endpoint=self.endpoint, direction="out")
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._started.pop(run_id, None)
+        self._prompt_tokens.pop(run_id, None)
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *,
+                      run_id: UUID, **kwargs: Any) -> None:
+        self._started[run_id] = time.perf_counter()
+        self._tool_names[run_id] = (serialized or {}).get("name", "unknown")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        started = self._started.pop(run_id, None)
+        name = self._tool_names.pop(run_id, "unknown")
+        if started is not None:
+            TOOL_SECONDS.observe(time.perf_counter() - started, tool=name)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.on_tool_end(None, run_id=run_id)
+
+
+def instrument_stream(endpoint: str, chunks, started: Optional[float] = None):
+    """Forward chunks, recording time to first chunk and total stream duration."""
+    started = started if started is not None else time.perf_counter()
+    first = True
+    try:
+        for chunk in chunks:
+            if first:
+                TTFB_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
+                first = False
+            yield chunk
+    finally:
+        STREAM_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint)
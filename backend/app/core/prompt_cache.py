@@ -0,0 +1,127 @@
+# backend/app/core/prompt_cache.py
+import hashlib
+import importlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import BaseMessage, SystemMessage
+
+from app.core.long_summary import estimate_tokens
+from app.core.metrics import PROMPT_TOKENS
+from config import Config
+
+# Distinct prefixes remembered when counting reuse; there is normally one per
+# agent mode, so this only bounds memory if prompts start to vary.
+MAX_TRACKED_PREFIXES = 64
+
+
+def split_prompt(messages: List[BaseMessage], tools: Optional[list] = None) -> Tuple[str, str]:
+    """(cacheable prefix, dynamic rest) of a chat prompt.
+
+    The prefix is the tool schemas bound to the model, if any, and the
+    leading system message: the agent's instructions and tool reference,
+    identical on every call. Providers send both ahead of the conversation,
+    so they are cached together. Everything after them (history, user
+    input, scratchpad) changes from call to call.
+    """
+    prefix = json.dumps(tools, sort_keys=True, default=str) + "\n" if tools else ""
+    if messages and isinstance(messages[0], SystemMessage):
+        prefix += str(messages[0].content)
+        messages = messages[1:]
+    return prefix, "\n".join(str(message.content) for message in messages)
+
+
+class PromptCacheHook:
+    """How the provider is told to reuse the static prompt prefix.
+
+    The default relies on implicit prefix caching: the prefix is sent first,
+    as the system instruction, byte-identical on every call, which is what
+    Gemini 2.x reuses on its own. A hook for explicit context caching
+    overrides bind() to create the provider-side cache for ``prefix`` and
+    return a model that references it.
+    """
+
+    name = "implicit"
+
+    def bind(self, llm, prefix: str):
+        return llm
+
+
+def get_prompt_cache_hook() -> PromptCacheHook:
+    """The hook named by PROMPT_CACHE_HOOK ("module:attribute"), or the implicit default."""
+    if not Config.PROMPT_CACHE_HOOK:
+        return PromptCacheHook()
+    module_name, _, attribute = Config.PROMPT_CACHE_HOOK.partition(":")
+    hook = getattr(importlib.import_module(module_name), attribute)
+    return hook() if isinstance(hook, type) else hook
+
+
+class PromptCacheAccounting:
+    """Process-wide tally of cacheable versus dynamic prompt tokens.
+
+    A prefix shorter than ``min_prefix_tokens`` is never cached by the
+    provider, so its tokens are counted as dynamic and it is not tracked.
+    """
+
+    def __init__(self, min_prefix_tokens: int = 0):
+        self.min_prefix_tokens = min_prefix_tokens
+        self.calls = 0
+        self.cacheable_tokens = 0
+        self.dynamic_tokens = 0
+        self.prefix_reuses = 0
+        self._prefixes: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, prefix: str, rest: str) -> Tuple[int, int]:
+        cacheable, dynamic = estimate_tokens(prefix), estimate_tokens(rest)
+        if cacheable < self.min_prefix_tokens:
+            cacheable, dynamic, prefix = 0, cacheable + dynamic, ""
+        digest = hashlib.sha256(prefix.encode("utf-8")).hexdigest() if prefix else None
+        with self._lock:
+            self.calls += 1
+            self.cacheable_tokens += cacheable
+            self.dynamic_tokens += dynamic
+            if digest is not None:
+                if digest in self._prefixes:
+                    self.prefix_reuses += 1
+                    self._prefixes.move_to_end(digest)
+                else:
+                    self._prefixes[digest] = None
+                    if len(self._prefixes) > MAX_TRACKED_PREFIXES:
+                        self._prefixes.popitem(last=False)
+        return cacheable, dynamic
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.cacheable_tokens + self.dynamic_tokens
+            return {
+                "calls": self.calls,
+                "cacheable_tokens": self.cacheable_tokens,
+                "dynamic_tokens": self.dynamic_tokens,
+                "cacheable_ratio": round(self.cacheable_tokens / total, 3) if total else 0.0,
+                "prefix_reuses": self.prefix_reuses,
+                "distinct_prefixes": len(self._prefixes),
+            }
+
+
+class PromptCacheCallbackHandler(BaseCallbackHandler):
+    """Splits every chat model call's prompt into cacheable and dynamic tokens."""
+
+    def __init__(self, endpoint: str, accounting: PromptCacheAccounting):
+        self.endpoint = endpoint
+        self.accounting = accounting
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[BaseMessage]], *,
+                            run_id: UUID, **kwargs: Any) -> None:
+        tools = (kwargs.get("invocation_params") or {}).get("tools")
+        for batch in messages:
+            cacheable, dynamic = self.accounting.record(*split_prompt(batch, tools))
+            PROMPT_TOKENS.observe(cacheable, endpoint=self.endpoint, part="cacheable")
+            PROMPT_TOKENS.observe(dynamic, endpoint=self.endpoint, part="dynamic")
+
+
+prompt_cache_accounting = PromptCacheAccounting(Config.PROMPT_CACHE_MIN_TOKENS)
@@ -0,0 +1,195 @@
+# backend/app/core/sessions.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List
+
+from config import Config
+
+# Longer client-supplied IDs are rejected and replaced with a fresh one
+MAX_SESSION_ID_LENGTH = 128
+
+
+def _history_size(history: List[str]) -> int:
+    return sum(len(message.encode("utf-8")) for message in history)
+
+
+def trim_history(history: List[str], max_messages: int, max_bytes: int) -> List[str]:
+    """Keep the newest messages that fit both the message and byte caps."""
+    history = history[-max_messages:]
+    size = _history_size(history)
+    while history and size > max_bytes:
+        size -= len(history[0].encode("utf-8"))
+        history = history[1:]
+    return history
+
+
+class MemorySessionStore:
+    """Per-process conversation histories with LRU eviction and idle expiry.
+
+    Bounded by session count, bytes per session and total bytes, so fresh
+    session IDs cannot grow memory without limit. `clock` is injectable so
+    tests can expire sessions without sleeping.
+    """
+
+    def __init__(self, max_sessions: int, idle_ttl: float, max_messages: int,
+                 max_session_bytes: int, max_total_bytes: int, clock: Callable[[], float] = time.monotonic):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self.max_session_bytes = max_session_bytes
+        self.max_total_bytes = max_total_bytes
+        self.clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        self._sessions = OrderedDict()  # session_id -> (last_access, history, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _drop(self, session_id: str):
+        _, _, size = self._sessions.pop(session_id)
+        self._bytes -= size
+
+    def _expire(self, now: float):
+        # Least recently used sessions are first, so expired ones are too
+        while self._sessions:
+            session_id, (last_access, _, _) = next(iter(self._sessions.items()))
+            if now - last_access <= self.idle_ttl:
+                break
+            self._drop(session_id)
+            self.expirations += 1
+
+    def get(self, session_id: str) -> List[str]:
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            self._sessions[session_id] = (now, entry[1], entry[2])
+            self._sessions.move_to_end(session_id)
+            return list(entry[1])
+
+    def save(self, session_id: str, history: List[str]):
+        history = trim_history(history, self.max_messages, self.max_session_bytes)
+        size = _history_size(history)
+        now = self.clock()
+        with self._lock:
+            if session_id in self._sessions:
+                self._drop(session_id)
+            self._sessions[session_id] = (now, history, size)
+            self._bytes += size
+            self._expire(now)
+            while len(self._sessions) > self.max_sessions or self._bytes > self.max_total_bytes:
+                self._drop(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "active_sessions": len(self._sessions),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+class SqliteSessionStore:
+    """Conversation histories shared by every gunicorn worker on the host.
+
+    Uses the same SQLite file as the expense store. Expired and excess
+    sessions are purged on write.
+    """
+
+    def __init__(self, path: str, max_sessions: int, idle_ttl: float, max_messages: int,
+                 max_session_bytes: int, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.max_messages = max_messages
+        self.max_session_bytes = max_session_bytes
+        self.clock = clock
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """This process's connection, opened on first use and again after a fork."""
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    history TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_sessions_last_access ON sessions (last_access);
+            """)
+        return self._connection
+
+    def get(self, session_id: str) -> List[str]:
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT history, last_access FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+            if row is None or now - row[1] > self.idle_ttl:
+                return []
+            self._conn.execute("UPDATE sessions SET last_access = ? WHERE id = ?", (now, session_id))
+        return json.loads(row[0])
+
+    def save(self, session_id: str, history: List[str]):
+        history = trim_history(history, self.max_messages, self.max_session_bytes)
+        now = self.clock()
+        with self._lock:
+            with self._conn:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute(
+                    "INSERT INTO sessions (id, history, size, last_access) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (id) DO UPDATE SET history = excluded.history, size = excluded.size, "
+                    "last_access = excluded.last_access",
+                    (session_id, json.dumps(history), _history_size(history), now),
+                )
+                self.expirations += self._conn.execute(
+                    "DELETE FROM sessions WHERE last_access < ?", (now - self.idle_ttl,)
+                ).rowcount
+                self.evictions += self._conn.execute(
+                    "DELETE FROM sessions WHERE id IN (SELECT id FROM sessions ORDER BY last_access DESC "
+                    "LIMIT -1 OFFSET ?)", (self.max_sessions,)
+                ).rowcount
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM sessions").fetchone()
+        return {
+            "backend": "sqlite",
+            "active_sessions": count,
+            "bytes": size,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+def build_session_store():
+    if Config.SESSION_BACKEND == "sqlite":
+        return SqliteSessionStore(
+            Config.SESSION_DB_PATH, Config.SESSION_MAX_SESSIONS, Config.SESSION_IDLE_TTL,
+            Config.SESSION_MAX_MESSAGES, Config.SESSION_MAX_BYTES,
+        )
+    return MemorySessionStore(
+        Config.SESSION_MAX_SESSIONS, Config.SESSION_IDLE_TTL, Config.SESSION_MAX_MESSAGES,
+        Config.SESSION_MAX_BYTES, Config.SESSION_MAX_TOTAL_BYTES,
+    )
+
+
+session_store = build_session_store()
@@ -0,0 +1,447 @@
+# backend/app/core/store.py
+import contextvars
+import os
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.aggregates import ExpenseAggregates
+from config import Config
+
+# Ledger used when no tenant is set: the one shared by anonymous clients
+DEFAULT_TENANT = "default"
+MAX_TENANT_LENGTH = 128
+
+# strftime formats grouping the daily rollups into report periods
+PERIOD_FORMATS = {"day": "%Y-%m-%d", "week": "%Y-W%W", "month": "%Y-%m", "year": "%Y"}
+
+# Tenant whose ledger the expense tools read and write; set per request
+current_tenant: contextvars.ContextVar[str] = contextvars.ContextVar("expense_tenant", default=DEFAULT_TENANT)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    tenant TEXT NOT NULL DEFAULT 'default',
+    amount REAL NOT NULL,
+    category TEXT NOT NULL,
+    description TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_expenses_tenant_id ON expenses (tenant, id);
+CREATE INDEX IF NOT EXISTS idx_expenses_tenant_timestamp ON expenses (tenant, timestamp);
+
+-- Per-tenant, per-category totals kept current by triggers, so a tenant's
+-- aggregates can be loaded without scanning its ledger.
+CREATE TABLE IF NOT EXISTS category_totals (
+    tenant TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (tenant, category)
+);
+CREATE TRIGGER IF NOT EXISTS trg_expenses_insert AFTER INSERT ON expenses BEGIN
+    INSERT INTO category_totals (tenant, category, total, count) VALUES (NEW.tenant, NEW.category, NEW.amount, 1)
+    ON CONFLICT (tenant, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_expenses_delete AFTER DELETE ON expenses BEGIN
+    UPDATE category_totals SET total = total - OLD.amount, count = count - 1
+    WHERE tenant = OLD.tenant AND category = OLD.category;
+    DELETE FROM category_totals WHERE tenant = OLD.tenant AND category = OLD.category AND count <= 0;
+END;
+
+-- Per-tenant daily rollups by category, so day/week/month reports read at
+-- most one row per day and category instead of the ledger itself.
+CREATE TABLE IF NOT EXISTS daily_totals (
+    tenant TEXT NOT NULL,
+    day TEXT NOT NULL,
+    category TEXT NOT NULL,
+    total REAL NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (tenant, day, category)
+);
+CREATE TRIGGER IF NOT EXISTS trg_expenses_insert_daily AFTER INSERT ON expenses BEGIN
+    INSERT INTO daily_totals (tenant, day, category, total, count)
+    VALUES (NEW.tenant, substr(NEW.timestamp, 1, 10), NEW.category, NEW.amount, 1)
+    ON CONFLICT (tenant, day, category) DO UPDATE SET total = total + excluded.total, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS trg_expenses_delete_daily AFTER DELETE ON expenses BEGIN
+    UPDATE daily_totals SET total = total - OLD.amount, count = count - 1
+    WHERE tenant = OLD.tenant AND day = substr(OLD.timestamp, 1, 10) AND category = OLD.category;
+    DELETE FROM daily_totals
+    WHERE tenant = OLD.tenant AND day = substr(OLD.timestamp, 1, 10) AND category = OLD.category AND count <= 0;
+END;
+CREATE INDEX IF NOT EXISTS idx_expenses_tenant_amount ON expenses (tenant, amount);
+
+CREATE TABLE IF NOT EXISTS budgets (
+    tenant TEXT PRIMARY KEY,
+    amount REAL,
+    set_at TEXT
+);
+"""
+
+
+def _row_to_expense(row) -> Dict:
+    return {
+        "id": row[0],
+        "amount": row[1],
+        "category": row[2],
+        "description": row[3],
+        "timestamp": row[4],
+    }
+
+
+def shard_paths(path: str, shards: int) -> List[str]:
+    """expenses.db with one shard, expenses.0.db ... expenses.N-1.db otherwise."""
+    if shards <= 1:
+        return [path]
+    root, ext = os.path.splitext(path)
+    return [f"{root}.{index}{ext}" for index in range(shards)]
+
+
+class _Shard:
+    """One SQLite file holding the ledgers of the tenants hashed to it.
+
+    Each process keeps one connection per shard, serialized by the shard's
+    lock; statements are short, so tenants on the same shard only contend
+    for the duration of a single query.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """This process's connection, opened on first use and again after a fork.
+
+        Keeps the store safe to create in a gunicorn --preload master.
+        Must be used with the lock held.
+        """
+        if self._pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+            self._pid = os.getpid()
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+
+class _TenantLedger:
+    """In-memory state for one hot tenant: its aggregates and its lock."""
+
+    def __init__(self, tenant: str):
+        self.tenant = tenant
+        self.lock = threading.Lock()
+        self.aggregates = ExpenseAggregates()
+        self.data_version = None
+        self.evicted = False
+
+
+class ExpenseStore:
+    """SQLite-backed expense ledgers and budgets, one per tenant.
+
+    Tenants are hashed onto EXPENSE_DB_SHARDS SQLite files. WAL mode lets
+    every gunicorn worker read while another writes, and IDs come from
+    SQLite instead of the size of an in-memory list.
+
+    Each tenant's totals, counts, per-category sums and recent expenses are
+    served from running aggregates, loaded on first use from the
+    trigger-maintained category_totals table and guarded by a per-tenant
+    lock. The most recently used tenants stay in memory; colder ones are
+    evicted and reloaded when they come back. Writes from other processes
+    are detected through PRAGMA data_version.
+
+    Methods act on the tenant in ``current_tenant`` unless one is passed.
+    """
+
+    def __init__(self, path: str, shards: int = 1, hot_tenants: int = 1000):
+        self.path = path
+        self.shards = [_Shard(shard_path) for shard_path in shard_paths(path, shards)]
+        self.hot_tenants = max(1, hot_tenants)
+        self.evictions = 0
+        self._tenants: "OrderedDict[str, _TenantLedger]" = OrderedDict()
+        self._tenants_lock = threading.Lock()
+
+    def _shard(self, tenant: str) -> _Shard:
+        # crc32 rather than hash(), which differs between processes
+        return self.shards[zlib.crc32(tenant.encode("utf-8")) % len(self.shards)]
+
+    def _hot_ledger(self, tenant: str) -> _TenantLedger:
+        with self._tenants_lock:
+            ledger = self._tenants.get(tenant)
+            if ledger is None:
+                ledger = self._tenants[tenant] = _TenantLedger(tenant)
+                self._evict()
+            else:
+                self._tenants.move_to_end(tenant)
+            return ledger
+
+    def _evict(self):
+        """Drop the least recently used idle tenants. Call with _tenants_lock held.
+
+        A ledger is only evicted while its lock can be taken, and is marked
+        so a request that fetched it just before retries with a fresh one.
+        """
+        excess = len(self._tenants) - self.hot_tenants
+        victims = []
+        for tenant, ledger in self._tenants.items():
+            if len(victims) >= excess:
+                break
+            if ledger.lock.acquire(blocking=False):
+                ledger.evicted = True
+                ledger.lock.release()
+                victims.append(tenant)
+        for tenant in victims:
+            del self._tenants[tenant]
+        self.evictions += len(victims)
+
+    @contextmanager
+    def _ledger(self, tenant: Optional[str] = None):
+        """Hold the tenant's lock, with its aggregates current."""
+        tenant = tenant or current_tenant.get()
+        shard = self._shard(tenant)
+        while True:
+            ledger = self._hot_ledger(tenant)
+            with ledger.lock:
+                if ledger.evicted:
+                    continue
+                yield ledger, shard
+                return
+
+    def _refresh_aggregates(self, ledger: _TenantLedger, shard: _Shard, force: bool = False) -> bool:
+        """Reload the tenant's aggregates if another connection committed since they were loaded.
+
+        Returns True when a reload happened. Must be called with the tenant's lock held.
+        """
+        with shard.lock:
+            data_version = shard.conn.execute("PRAGMA data_version").fetchone()[0]
+            if not (force or data_version != ledger.data_version):
+                return False
+            category_rows = shard.conn.execute(
+                "SELECT category, total, count FROM category_totals WHERE tenant = ?", (ledger.tenant,)
+            ).fetchall()
+            recent_rows = shard.conn.execute(
+                "SELECT id, amount, category, description, timestamp FROM expenses "
+                "WHERE tenant = ? ORDER BY id DESC LIMIT ?",
+                (ledger.tenant, ledger.aggregates.recent.maxlen),
+            ).fetchall()
+        ledger.aggregates.load(category_rows, [_row_to_expense(row) for row in recent_rows])
+        ledger.data_version = data_version
+        return True
+
+    def add_expense(self, amount: float, category: str, description: str,
+                    timestamp: Optional[str] = None, tenant: Optional[str] = None) -> Dict:
+        """Insert one expense atomically and return it with its new ID."""
+        row = (amount, category.lower(), description, timestamp or datetime.now().isoformat())
+        with self._ledger(tenant) as (ledger, shard):
+            with shard.lock:
+                cursor = shard.conn.execute(
+                    "INSERT INTO expenses (tenant, amount, category, description, timestamp) VALUES (?, ?, ?, ?, ?)",
+                    (ledger.tenant,) + row,
+                )
+            expense = _row_to_expense((cursor.lastrowid,) + row)
+            # A reload already reflects this insert
+            if not self._refresh_aggregates(ledger, shard):
+                ledger.aggregates.add(expense)
+        return expense
+
+    def add_expenses(self, expenses: Iterable[Tuple[float, str, str, Optional[str]]],
+                     tenant: Optional[str] = None) -> int:
+        """Insert many (amount, category, description, timestamp) rows in one transaction."""
+        now = datetime.now().isoformat()
+        with self._ledger(tenant) as (ledger, shard):
+            rows = [(ledger.tenant, amount, category.lower(), description, timestamp or now)
+                    for amount, category, description, timestamp in expenses]
+            with shard.lock:
+                with shard.conn:
+                    shard.conn.execute("BEGIN")
+                    shard.conn.executemany(
+                        "INSERT INTO expenses (tenant, amount, category, description, timestamp) "
+                        "VALUES (?, ?, ?, ?, ?)", rows
+                    )
+            # One reload from category_totals is cheaper than per-row updates
+            self._refresh_aggregates(ledger, shard, force=True)
+        return len(rows)
+
+    def delete_expense(self, expense_id: int, tenant: Optional[str] = None) -> Optional[Dict]:
+        """Delete one of the tenant's expenses by ID and return it, or None if it does not exist."""
+        with self._ledger(tenant) as (ledger, shard):
+            with shard.lock:
+                row = shard.conn.execute(
+                    "DELETE FROM expenses WHERE id = ? AND tenant = ? "
+                    "RETURNING id, amount, category, description, timestamp",
+                    (expense_id, ledger.tenant),
+                ).fetchone()
+            if row is None:
+                return None
+            expense = _row_to_expense(row)
+            aggregates = ledger.aggregates
+            if not self._refresh_aggregates(ledger, shard):
+                aggregates.remove(expense)
+            if len(aggregates.recent) < min(aggregates.count, aggregates.recent.maxlen):
+                self._refresh_aggregates(ledger, shard, force=True)
+        return expense
+
+    def count(self, tenant: Optional[str] = None) -> int:
+        with self._ledger(tenant) as (ledger, shard):
+            self._refresh_aggregates(ledger, shard)
+            return ledger.aggregates.count
+
+    def total_spent(self, tenant: Optional[str] = None) -> float:
+        with self._ledger(tenant) as (ledger, shard):
+            self._refresh_aggregates(ledger, shard)
+            return ledger.aggregates.total
+
+    def category_totals(self, tenant: Optional[str] = None) -> Dict[str, float]:
+        with self._ledger(tenant) as (ledger, shard):
+            self._refresh_aggregates(ledger, shard)
+            return ledger.aggregates.category_totals()
+
+    def recent_expenses(self, limit: int = 3, tenant: Optional[str] = None) -> List[Dict]:
+        """Most recent expenses, newest first."""
+        with self._ledger(tenant) as (ledger, shard):
+            self._refresh_aggregates(ledger, shard)
+            if limit <= ledger.aggregates.recent.maxlen:
+                return ledger.aggregates.recent_expenses(limit)
+            with shard.lock:
+                rows = shard.conn.execute(
+                    "SELECT id, amount, category, description, timestamp FROM expenses "
+                    "WHERE tenant = ? ORDER BY id DESC LIMIT ?",
+                    (ledger.tenant, limit),
+                ).fetchall()
+        return [_row_to_expense(row) for row in rows]
+
+    def verify_aggregates(self, tenant: Optional[str] = None) -> List[str]:
+        """Check the tenant's running aggregates against a full recompute of its ledger.
+
+        Returns a list of mismatches; empty when consistent.
+        """
+        with self._ledger(tenant) as (ledger, shard):
+            self._refresh_aggregates(ledger, shard)
+            with shard.lock:
+                rows = shard.conn.execute(
+                    "SELECT category, SUM(amount), COUNT(*) FROM expenses WHERE tenant = ? GROUP BY category",
+                    (ledger.tenant,),
+                ).fetchall()
+            return ledger.aggregates.mismatches(rows)
+
+    # --- Time-windowed queries. start and end are inclusive YYYY-MM-DD dates. ---
+
+    def _query(self, tenant: Optional[str], sql: str, params: tuple) -> List[tuple]:
+        tenant = tenant or current_tenant.get()
+        shard = self._shard(tenant)
+        with shard.lock:
+            return shard.conn.execute(sql, (tenant,) + params).fetchall()
+
+    @staticmethod
+    def _window(column: str, start: Optional[str], end: Optional[str], category: Optional[str]) -> Tuple[str, tuple]:
+        clauses, params = [], []
+        if start:
+            clauses.append(f"{column} >= ?")
+            params.append(start)
+        if end:
+            # Timestamps carry a time of day, so compare against the next day
+            clauses.append(f"{column} < date(?, '+1 day')")
+            params.append(end)
+        if category:
+            clauses.append("category = ?")
+            params.append(category.lower())
+        return "".join(" AND " + clause for clause in clauses), tuple(params)
+
+    def period_totals(self, period: str = "month", start: Optional[str] = None, end: Optional[str] = None,
+                      category: Optional[str] = None, tenant: Optional[str] = None) -> List[Dict]:
+        """Spending per day, week, month or year, oldest first, from the daily rollups."""
+        where, params = self._window("day", start, end, category)
+        rows = self._query(
+            tenant,
+            f"SELECT strftime('{PERIOD_FORMATS[period]}', day) AS period, SUM(total), SUM(count) "
+            f"FROM daily_totals WHERE tenant = ?{where} GROUP BY period ORDER BY period",
+            params,
+        )
+        return [{"period": row[0], "total": round(row[1], 2), "count": row[2]} for row in rows]
+
+    def category_totals_between(self, start: Optional[str] = None, end: Optional[str] = None,
+                                limit: Optional[int] = None, tenant: Optional[str] = None) -> List[Dict]:
+        """Per-category spending in a window, largest first, from the daily rollups."""
+        where, params = self._window("day", start, end, None)
+        rows = self._query(
+            tenant,
+            f"SELECT category, SUM(total) AS spent, SUM(count) FROM daily_totals WHERE tenant = ?{where} "
+            f"GROUP BY category ORDER BY spent DESC LIMIT ?",
+            params + (limit if limit else -1,),
+        )
+        return [{"category": row[0], "total": round(row[1], 2), "count": row[2]} for row in rows]
+
+    def top_expenses(self, limit: int = 5, start: Optional[str] = None, end: Optional[str] = None,
+                     category: Optional[str] = None, tenant: Optional[str] = None) -> List[Dict]:
+        """The largest single expenses in a window."""
+        where, params = self._window("timestamp", start, end, category)
+        rows = self._query(
+            tenant,
+            f"SELECT id, amount, category, description, timestamp FROM expenses WHERE tenant = ?{where} "
+            f"ORDER BY amount DESC, id DESC LIMIT ?",
+            params + (limit,),
+        )
+        return [_row_to_expense(row) for row in rows]
+
+    def iter_expenses(self, start: Optional[str] = None, end: Optional[str] = None,
+                      page_size: int = 500, tenant: Optional[str] = None) -> Iterator[Dict]:
+        """Yield a tenant's expenses oldest first, one page per query.
+
+        Pages are keyed on the last ID seen, and the shard lock is only held
+        while a page is read, so exporting a large ledger neither loads it
+        into memory nor blocks writers.
+        """
+        tenant = tenant or current_tenant.get()
+        where, params = self._window("timestamp", start, end, None)
+        last_id = 0
+        while True:
+            rows = self._query(
+                tenant,
+                f"SELECT id, amount, category, description, timestamp FROM expenses "
+                f"WHERE tenant = ? AND id > ?{where} ORDER BY id LIMIT ?",
+                (last_id,) + params + (page_size,),
+            )
+            for row in rows:
+                yield _row_to_expense(row)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def get_budget(self, tenant: Optional[str] = None) -> Dict:
+        tenant = tenant or current_tenant.get()
+        shard = self._shard(tenant)
+        with shard.lock:
+            row = shard.conn.execute("SELECT amount, set_at FROM budgets WHERE tenant = ?", (tenant,)).fetchone()
+        if row is None:
+            return {"amount": None, "set_at": None}
+        return {"amount": row[0], "set_at": row[1]}
+
+    def set_budget(self, amount: float, tenant: Optional[str] = None) -> Dict:
+        tenant = tenant or current_tenant.get()
+        shard = self._shard(tenant)
+        budget = {"amount": amount, "set_at": datetime.now().isoformat()}
+        with shard.lock:
+            shard.conn.execute(
+                "INSERT INTO budgets (tenant, amount, set_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (tenant) DO UPDATE SET amount = excluded.amount, set_at = excluded.set_at",
+                (tenant, budget["amount"], budget["set_at"]),
+            )
+        return budget
+
+    def stats(self) -> dict:
+        with self._tenants_lock:
+            return {
+                "shards": len(self.shards),
+                "hot_tenants": len(self._tenants),
+                "evictions": self.evictions,
+            }
+
+
+expense_store = ExpenseStore(Config.EXPENSE_DB_PATH, Config.EXPENSE_DB_SHARDS, Config.EXPENSE_HOT_TENANTS)
@@ -0,0 +1,87 @@
+# backend/app/core/streaming.py
+import time
+
+from flask import Response
+from config import Config
+
+BASE_STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+}
+
+
+def chunk_text(chunk) -> str:
+    """Extract the text of a single chain chunk (AIMessageChunk or plain string)."""
+    if hasattr(chunk, 'content'):
+        content = chunk.content
+    else:
+        content = chunk
+    if not content:
+        return ""
+    return content if isinstance(content, str) else str(content)
+
+
+def iter_chain(get_chain, payload, config: dict = None):
+    """Yield text chunks from the chain returned by get_chain() as soon as the model produces them.
+
+    The chain is only fetched once the response starts streaming, so a model
+    that cannot be built (e.g. a missing API key) surfaces as a stream error.
+    Falls back to a regular invoke when the model does not stream anything.
+    """
+    chain = get_chain()
+    stream_worked = False
+    for chunk in chain.stream(payload, config=config):
+        text = chunk_text(chunk)
+        if text:
+            stream_worked = True
+            yield text
+
+    if not stream_worked:
+        text = chunk_text(chain.invoke(payload, config=config))
+        if text:
+            yield text
+
+
+def split_frames(text: str, frame_chars: int):
+    """Split text into frames of at most frame_chars characters."""
+    frame_chars = max(1, frame_chars)
+    for start in range(0, len(text), frame_chars):
+        yield text[start:start + frame_chars]
+
+
+def paced(chunks, mode: str = None):
+    """Apply the configured pacing mode to a stream of text chunks.
+
+    "none" (the default) forwards every chunk unchanged so the worker is only
+    held for as long as the model takes. "typewriter" re-frames chunks into
+    small pieces with a per-character delay, but the total added delay never
+    exceeds STREAM_MAX_PACING_SECONDS per response.
+    """
+    mode = mode or Config.STREAM_PACING
+    if mode != "typewriter":
+        yield from chunks
+        return
+
+    budget = Config.STREAM_MAX_PACING_SECONDS
+    for chunk in chunks:
+        for frame in split_frames(chunk, Config.STREAM_FRAME_CHARS):
+            yield frame
+            if budget > 0:
+                delay = min(budget, Config.STREAM_CHAR_DELAY * len(frame))
+                time.sleep(delay)
+                budget -= delay
+
+
+def with_error_message(chunks):
+    """Forward chunks, turning a failure mid-stream into a readable error line."""
+    try:
+        yield from chunks
+    except Exception as e:
+        yield f"Error: An error occurred during streaming: {str(e)}"
+
+
+def stream_response(chunks, headers: dict = None, mimetype: str = 'text/plain') -> Response:
+    """Wrap a chunk generator in a streaming Response (text/plain by default)."""
+    return Response(chunks,
+                    mimetype=mimetype,
+                    headers={**BASE_STREAM_HEADERS, **(headers or {})})
@@ -0,0 +1,110 @@
+# backend/benchmarks/agent_modes.py
+"""Tracker turns under TRACKER_AGENT_MODE=react versus tool_calling.
+
+Run from backend/:
+
+    python -m benchmarks.agent_modes --ttft 0.3 --tokens-per-second 50
+
+The same scripted conversation runs through each agent. The fake model
+replies with ReAct text in one mode and with native tool calls in the
+other, including parallel calls where a turn needs several tools. For every
+turn the report shows model round trips, prompt and completion tokens
+(estimated at four characters a token; in tool_calling mode the prompt
+includes the tool schemas sent with every call) and latency.
+"""
+import argparse
+import json
+import time
+import uuid
+
+from benchmarks.common import use_fake_model
+
+# (user input, ReAct replies, tool-calling replies) per turn
+CONVERSATION = [
+    ("add 30 for coffee and 200 for groceries",
+     ["Thought: add the coffee\nAction: add_expense\nAction Input: 30|food|coffee",
+      "Thought: now the groceries\nAction: add_expense\nAction Input: 200|food|groceries",
+      "Thought: both are added\nFinal Answer: Added ₹30 for coffee and ₹200 for groceries ☕🛒"],
+     [{"tool_calls": [{"name": "add_expense", "args": {"amount": 30, "category": "food", "description": "coffee"}},
+                      {"name": "add_expense", "args": {"amount": 200, "category": "food", "description": "groceries"}}]},
+      "Added ₹30 for coffee and ₹200 for groceries ☕🛒"]),
+    ("set my budget to 1000 and show the budget status",
+     ["Thought: set the budget\nAction: set_budget\nAction Input: 1000",
+      "Thought: check the status\nAction: get_budget_status\nAction Input: ",
+      "Thought: done\nFinal Answer: Budget set to ₹1000, ₹770 left 💰"],
+     [{"tool_calls": [{"name": "set_budget", "args": {"amount": 1000}},
+                      {"name": "get_budget_status", "args": {}}]},
+      "Budget set to ₹1000, ₹770 left 💰"]),
+    ("how much did I spend this month?",
+     ["Thought: get the month's summary\nAction: get_expense_summary\nAction Input: this month",
+      "Thought: done\nFinal Answer: You spent ₹230 this month, all on food 📊"],
+     [{"tool_calls": [{"name": "get_expense_summary", "args": {"period": "this month"}}]},
+      "You spent ₹230 this month, all on food 📊"]),
+    ("thanks!",
+     ["Thought: no tool needed\nFinal Answer: Happy to help! 😊"],
+     ["Happy to help! 😊"]),
+]
+
+
+def completion_tokens(reply, estimate_tokens) -> int:
+    if isinstance(reply, dict):
+        return estimate_tokens(reply.get("content", "") + json.dumps(reply.get("tool_calls", [])))
+    return estimate_tokens(reply)
+
+
+def run_mode(mode: str):
+    from langchain_core.utils.function_calling import convert_to_openai_tool
+
+    from app.core.agents import TYPED_EXPENSE_TOOLS, _build_expense_agent_executor, get_llm
+    from app.core.long_summary import estimate_tokens
+    from app.core.store import current_tenant
+    from config import Config
+
+    Config.TRACKER_AGENT_MODE = mode
+    model = get_llm()
+    replies = [reply for _, react, tool_calling in CONVERSATION for reply in (react if mode == "react" else tool_calling)]
+    model.responses, model.call_count = replies, 0
+    executor = _build_expense_agent_executor()
+    executor.verbose = False
+    schema_tokens = 0
+    if mode == "tool_calling":
+        schema_tokens = estimate_tokens(json.dumps([convert_to_openai_tool(tool) for tool in TYPED_EXPENSE_TOOLS]))
+    token = current_tenant.set(f"bench-{mode}-{uuid.uuid4().hex}")
+    rows, history = [], []
+    try:
+        for turn, (text, _, _) in enumerate(CONVERSATION, 1):
+            calls_before, prompts_before = model.call_count, len(model.recorded_prompts())
+            started = time.perf_counter()
+            output = executor.invoke({"input": text, "chat_history": "\n".join(history)})["output"]
+            latency = time.perf_counter() - started
+            calls = model.call_count - calls_before
+            prompts = model.recorded_prompts()[prompts_before:]
+            prompt_tokens = sum(estimate_tokens("\n".join(content for _, content in prompt)) + schema_tokens
+                                for prompt in prompts)
+            completion = sum(completion_tokens(reply, estimate_tokens) for reply in replies[calls_before:calls_before + calls])
+            rows.append((turn, calls, prompt_tokens, completion, latency))
+            history += [f"Human: {text}", f"AI: {output}"]
+    finally:
+        current_tenant.reset(token)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ttft", type=float, default=0.3, help="fake model latency per call, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="fake model streaming rate")
+    args = parser.parse_args()
+    use_fake_model(FAKE_LLM_TTFT=args.ttft, FAKE_LLM_TOKENS_PER_SECOND=args.tokens_per_second,
+                   FAKE_LLM_RECORD_PROMPTS=100)
+
+    print(f"{'mode':<13} {'turn':>4} {'round trips':>11} {'prompt tok':>10} {'output tok':>10} {'latency s':>9}")
+    for mode in ("react", "tool_calling"):
+        rows = run_mode(mode)
+        for turn, calls, prompt_tokens, completion, latency in rows:
+            print(f"{mode:<13} {turn:>4} {calls:>11} {prompt_tokens:>10} {completion:>10} {latency:>9.2f}")
+        totals = [sum(row[index] for row in rows) for index in range(1, 5)]
+        print(f"{mode:<13} {'all':>4} {totals[0]:>11} {totals[1]:>10} {totals[2]:>10} {totals[3]:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
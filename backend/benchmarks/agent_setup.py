@@ -0,0 +1,49 @@
+# backend/benchmarks/agent_setup.py
+"""Per-request setup cost of the tracker agent, before and after caching it.
+
+Run from backend/:
+
+    python -m benchmarks.agent_setup --iterations 200
+
+"per request" rebuilds the tools, prompt and AgentExecutor on every call,
+as the tracker did before; "cached" is get_expense_agent_executor(), which
+builds it once per process.
+"""
+import argparse
+import time
+
+from benchmarks.common import use_fake_model
+from benchmarks.run import percentile
+
+
+def measure(build, iterations: int):
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        build()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--mode", choices=("react", "tool_calling"), default="react",
+                        help="TRACKER_AGENT_MODE to build")
+    args = parser.parse_args()
+    use_fake_model(TRACKER_AGENT_MODE=args.mode)
+
+    from app.core.agents import _build_expense_agent_executor, get_expense_agent_executor, get_llm
+
+    get_llm()
+    print(f"{args.mode} agent, {args.iterations} iterations")
+    print(f"{'setup':<12} {'mean us':>10} {'p50 us':>10} {'p95 us':>10}")
+    for name, build in (("per request", _build_expense_agent_executor), ("cached", get_expense_agent_executor)):
+        samples = measure(build, args.iterations)
+        mean = sum(samples) / len(samples)
+        print(f"{name:<12} {mean * 1e6:>10.1f} {percentile(samples, 50) * 1e6:>10.1f} "
+              f"{percentile(samples, 95) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
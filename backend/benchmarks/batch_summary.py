@@ -0,0 +1,78 @@
+# backend/benchmarks/batch_summary.py
+"""/api/summarize/batch throughput with injected latency and quota errors.
+
+Run from backend/:
+
+    python -m benchmarks.batch_summary --documents 40 --error-rates 0,0.05,0.2
+
+A mix of short documents and long ones (every --long-every th document,
+summarized by map-reduce) goes through summarize_batch() with the batch
+endpoint's limiter callback. The fake model fails the given fraction of
+calls with a 429; those calls are retried with the usual backoff. The
+report shows documents per second, model calls, 429s and failed documents.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.common import synthetic_text, use_fake_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=40, help="documents per batch")
+    parser.add_argument("--long-every", type=int, default=4, help="every Nth document is long (0 = none)")
+    parser.add_argument("--long-chars", type=int, default=60000, help="size of a long document")
+    parser.add_argument("--ttft", type=float, default=0.05, help="fake model latency per call, seconds")
+    parser.add_argument("--error-rates", default="0,0.05,0.2", help="comma-separated fractions of calls failing with 429")
+    parser.add_argument("--concurrency", type=int, default=None, help="SUMMARY_BATCH_CONCURRENCY (default: configured)")
+    args = parser.parse_args()
+    settings = {"FAKE_LLM_TTFT": args.ttft}
+    if args.concurrency:
+        settings["SUMMARY_BATCH_CONCURRENCY"] = args.concurrency
+    use_fake_model(**settings)
+
+    from langchain_core.callbacks import BaseCallbackHandler
+
+    from app.core.agents import get_llm
+    from app.core.batch_summary import summarize_batch
+    from app.core.limiter import LimiterCallbackHandler, PRIORITY_BATCH, upstream_limiter
+    from config import Config
+
+    class Outcomes(BaseCallbackHandler):
+        def __init__(self):
+            self.calls = self.throttled = 0
+            self._lock = threading.Lock()
+
+        def on_chat_model_start(self, serialized, messages, **kwargs):
+            with self._lock:
+                self.calls += 1
+
+        def on_llm_error(self, error, **kwargs):
+            with self._lock:
+                self.throttled += 1
+
+    model = get_llm()
+    print(f"SUMMARY_BATCH_CONCURRENCY={Config.SUMMARY_BATCH_CONCURRENCY} "
+          f"SUMMARY_BATCH_MAX_ATTEMPTS={Config.SUMMARY_BATCH_MAX_ATTEMPTS} fake latency {args.ttft}s/call")
+    print(f"{'429 rate':>8} {'docs':>5} {'long':>5} {'calls':>6} {'429s':>5} {'failed':>6} {'seconds':>8} {'docs/s':>7}")
+    for run, error_rate in enumerate(float(part) for part in args.error_rates.split(",")):
+        model.error_rate, model.seed = error_rate, run
+        documents, long_count = [], 0
+        for index in range(args.documents):
+            is_long = args.long_every and index % args.long_every == args.long_every - 1
+            long_count += bool(is_long)
+            text = f"Run {run} document {index}. " + synthetic_text(args.long_chars if is_long else 2000)
+            documents.append((index, text, f"bench-{run}-{index}"))
+        outcomes = Outcomes()
+        callbacks = [LimiterCallbackHandler(upstream_limiter, PRIORITY_BATCH, timeout=None,
+                                            max_in_flight=Config.SUMMARY_BATCH_CONCURRENCY), outcomes]
+        started = time.perf_counter()
+        failed = sum("error" in result for result in summarize_batch(documents, callbacks))
+        elapsed = time.perf_counter() - started
+        print(f"{error_rate:>8.2f} {len(documents):>5} {long_count:>5} {outcomes.calls:>6} {outcomes.throttled:>5} "
+              f"{failed:>6} {elapsed:>8.2f} {len(documents) / elapsed:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+# backend/benchmarks/calculator.py
+"""Fuzz the calculator against an exact reference and time its worst cases.
+
+Run from backend/:
+
+    python -m benchmarks.calculator --expressions 20000 --seed 1
+
+Random expressions of numbers and + - * / // % ** (nested parentheses and
+unary signs included) go through evaluate(). Each accepted result is
+compared with an exact Fraction evaluation of the same tree, and each
+rejection is counted by reason. A result counts as a mismatch when it is
+off by more than the 10 places format_result() displays. Intermediates are
+rounded to 28 significant digits, so the few mismatches are // and % of an
+operand that is not exact in decimal (45 % 7**-1 is 0 exactly, 1/7 rounded
+makes the floor step down by one); exact fractions would avoid them but
+their size grows without bound under **.
+
+The report then times a fixed set of adversarial inputs (power towers, deep
+nesting, inputs at the length and node bounds) and prints p50/p99/max
+latency for both.
+"""
+import argparse
+import ast
+import random
+import statistics
+import time
+from collections import Counter
+from decimal import Decimal
+from fractions import Fraction
+
+DISPLAY_TOLERANCE = Fraction(1, 10 ** 10)
+
+ADVERSARIAL = [
+    "9**9**9",
+    "2**2**2**2**2**2",
+    "10**64",
+    "(10**18+1)*1",
+    "(" * 99 + "1" + ")" * 99,
+    "-" * 199 + "1",
+    "1+" * 31 + "1",
+    "1+" * 99 + "1",
+    "9" * 200,
+    "1/3*" * 39 + "3",
+    "10**18//7%3**40",
+    "0**0",
+    "1/0",
+]
+
+
+def random_expression(rng: random.Random, depth: int = 0) -> str:
+    if depth > 3 or rng.random() < 0.3:
+        number = str(rng.randint(0, 10 ** rng.randint(1, 6)))
+        if rng.random() < 0.3:
+            number += f".{rng.randint(0, 999)}"
+        return ("-" if rng.random() < 0.15 else "") + number
+    op = rng.choice(["+", "-", "*", "/", "//", "%", "**"])
+    left = random_expression(rng, depth + 1)
+    right = str(rng.randint(-3, 12)) if op == "**" else random_expression(rng, depth + 1)
+    return f"({left}{op}{right})" if rng.random() < 0.5 else f"{left} {op} {right}"
+
+
+def reference(node: ast.expr) -> Fraction:
+    """Exact evaluation with Python's // and % semantics; raises ZeroDivisionError."""
+    if isinstance(node, ast.Constant):
+        return Fraction(str(node.value))
+    if isinstance(node, ast.UnaryOp):
+        value = reference(node.operand)
+        return -value if isinstance(node.op, ast.USub) else value
+    left, right = reference(node.left), reference(node.right)
+    op = node.op
+    if isinstance(op, ast.Add):
+        return left + right
+    if isinstance(op, ast.Sub):
+        return left - right
+    if isinstance(op, ast.Mult):
+        return left * right
+    if isinstance(op, ast.Div):
+        return left / right
+    if isinstance(op, ast.FloorDiv):
+        return Fraction(left // right)
+    if isinstance(op, ast.Mod):
+        return left % right
+    return left ** int(right)
+
+
+def relative_error(value: Decimal, exact: Fraction) -> Fraction:
+    # Relative to 1 for small results, which are displayed to absolute places
+    return abs(Fraction(value) - exact) / max(abs(exact), Fraction(1))
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    return statistics.median(ordered) * 1e3, p99 * 1e3, ordered[-1] * 1e3
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--expressions", type=int, default=20000, help="random expressions to evaluate")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeats", type=int, default=200, help="timed runs per adversarial input")
+    args = parser.parse_args()
+
+    from app.core.calculator import CalculationError, _compile, evaluate
+
+    rng = random.Random(args.seed)
+    outcomes, mismatches, timings, worst_error = Counter(), [], [], Fraction(0)
+    for _ in range(args.expressions):
+        expression = random_expression(rng)
+        _compile.cache_clear()
+        started = time.perf_counter()
+        try:
+            value = evaluate(expression)
+        except CalculationError as e:
+            timings.append(time.perf_counter() - started)
+            outcomes[f"rejected: {e}"] += 1
+            continue
+        timings.append(time.perf_counter() - started)
+        outcomes["accepted"] += 1
+        try:
+            exact = reference(ast.parse(expression, mode="eval").body)
+        except ZeroDivisionError:
+            mismatches.append((expression, value, "division by zero"))
+            continue
+        error = relative_error(value, exact)
+        worst_error = max(worst_error, error)
+        if error > DISPLAY_TOLERANCE:
+            mismatches.append((expression, value, float(exact)))
+
+    p50, p99, worst = percentiles(timings)
+    print(f"{args.expressions} random expressions: p50 {p50:.3f} ms, p99 {p99:.3f} ms, max {worst:.3f} ms")
+    for outcome, count in outcomes.most_common():
+        print(f"  {count:>7}  {outcome}")
+    print(f"  {len(mismatches):>7}  mismatches against the exact reference (largest error {float(worst_error):.1e})")
+    for expression, value, exact in mismatches[:10]:
+        print(f"           {expression} -> {value}, expected {exact}")
+
+    print(f"\n{'adversarial input':<34} {'outcome':<42} {'p50 ms':>7} {'max ms':>7}")
+    for expression in ADVERSARIAL:
+        samples = []
+        for _ in range(args.repeats):
+            _compile.cache_clear()
+            started = time.perf_counter()
+            try:
+                outcome = str(evaluate(expression))
+            except CalculationError as e:
+                outcome = f"rejected: {e}"
+            samples.append(time.perf_counter() - started)
+        p50, _, worst = percentiles(samples)
+        label = expression if len(expression) <= 32 else f"{expression[:20]}... ({len(expression)} chars)"
+        print(f"{label:<34} {outcome[:42]:<42} {p50:>7.3f} {worst:>7.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# backend/benchmarks/common.py
+"""Setup shared by the benchmark scripts.
+
+Each script calls use_fake_model() before importing anything from app,
+because config.Config reads the environment once, at import.
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+WORDS = ("budget", "stream", "model", "latency", "summary", "expense", "worker", "chunk", "token", "request")
+
+
+def use_fake_model(**settings) -> str:
+    """Point the app at the fake model and a scratch database; returns the scratch directory.
+
+    Keyword arguments override environment variables, e.g. FAKE_LLM_TTFT=0.2.
+    """
+    workdir = tempfile.mkdtemp(prefix="bench-")
+    atexit.register(shutil.rmtree, workdir, ignore_errors=True)
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_TTFT": "0",
+        "FAKE_LLM_TOKENS_PER_SECOND": "0",
+        "EXPENSE_DB_PATH": os.path.join(workdir, "expenses.db"),
+        "SESSION_BACKEND": "memory",
+        "RESPONSE_CACHE_BACKEND": "none",
+        "STREAM_PACING": "none",
+    })
+    os.environ.update({key: str(value) for key, value in settings.items()})
+    return workdir
+
+
+def synthetic_text(chars: int) -> str:
+    """Deterministic prose of about this many characters, in sentences and paragraphs."""
+    parts, size, index = [], 0, 0
+    while size < chars:
+        sentence = " ".join(WORDS[(index + offset) % len(WORDS)] for offset in range(12)).capitalize() + "."
+        parts.append(sentence + ("\n\n" if index % 8 == 7 else " "))
+        size += len(parts[-1])
+        index += 1
+    return "".join(parts)[:chars]
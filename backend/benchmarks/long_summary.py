@@ -0,0 +1,60 @@
+# backend/benchmarks/long_summary.py
+"""Map-reduce summarization of synthetic 10k/100k/1M-character documents.
+
+Run from backend/:
+
+    python -m benchmarks.long_summary --sizes 10000,100000,1000000 --ttft 0.05
+
+Each document goes through summarize_long() against the fake model. The
+report shows the chunk and model-call counts, the time to the first progress
+event and to the end of the summary, and the speedup over running the same
+calls one at a time (calls x per-call latency).
+"""
+import argparse
+import time
+
+from benchmarks.common import synthetic_text, use_fake_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="comma-separated document sizes in characters")
+    parser.add_argument("--ttft", type=float, default=0.05, help="fake model latency per call, seconds")
+    parser.add_argument("--concurrency", type=int, default=None, help="SUMMARY_MAX_CONCURRENCY (default: configured)")
+    args = parser.parse_args()
+    settings = {"FAKE_LLM_TTFT": args.ttft}
+    if args.concurrency:
+        settings["SUMMARY_MAX_CONCURRENCY"] = args.concurrency
+    use_fake_model(**settings)
+
+    from app.core.agents import get_llm, get_summarizer_chain
+    from app.core.long_summary import estimate_tokens, is_long_document, split_text, summarize_long
+    from config import Config
+
+    model = get_llm()
+    print(f"SUMMARY_CHUNK_TOKENS={Config.SUMMARY_CHUNK_TOKENS} SUMMARY_MAX_CONCURRENCY={Config.SUMMARY_MAX_CONCURRENCY}"
+          f" fake latency {args.ttft}s/call")
+    print(f"{'chars':>9} {'tokens':>7} {'mode':>10} {'chunks':>6} {'calls':>5} {'first event s':>13} "
+          f"{'total s':>8} {'serial s':>8} {'speedup':>7}")
+    for size in (int(part) for part in args.sizes.split(",")):
+        text = synthetic_text(size)
+        calls_before = model.call_count
+        started = time.perf_counter()
+        first_event = None
+        if is_long_document(text):
+            mode, chunks = "map-reduce", len(split_text(text))
+            for _ in summarize_long(text):
+                first_event = first_event or time.perf_counter() - started
+        else:
+            mode, chunks = "single", 1
+            get_summarizer_chain().invoke({"text": text})
+        total = time.perf_counter() - started
+        first_event = first_event or total
+        calls = model.call_count - calls_before
+        serial = calls * args.ttft
+        print(f"{size:>9} {estimate_tokens(text):>7} {mode:>10} {chunks:>6} {calls:>5} {first_event:>13.3f} "
+              f"{total:>8.2f} {serial:>8.2f} {serial / total:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
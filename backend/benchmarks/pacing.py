@@ -0,0 +1,70 @@
+# backend/benchmarks/pacing.py
+"""Worker-seconds per streamed response, before and after pluggable pacing.
+
+Run from backend/:
+
+    python -m benchmarks.pacing --lengths 300,3000
+
+A response holds its worker until its last chunk is written, so the time to
+drain the response generator is the worker time it costs. "legacy" is the
+old loop that yielded one character and slept 30 ms; "none" forwards model
+chunks as they arrive; "typewriter" is the opt-in mode, whose added delay is
+capped by STREAM_MAX_PACING_SECONDS.
+"""
+import argparse
+import time
+
+from benchmarks.common import synthetic_text, use_fake_model
+
+LEGACY_CHAR_DELAY = 0.03
+
+
+def legacy_stream(chunks):
+    """The streaming loop pacing replaced."""
+    for chunk in chunks:
+        for char in chunk:
+            yield char
+            time.sleep(LEGACY_CHAR_DELAY)
+
+
+def drain(chunks) -> float:
+    started = time.perf_counter()
+    for _ in chunks:
+        pass
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lengths", default="300,3000", help="comma-separated answer lengths in characters")
+    parser.add_argument("--ttft", type=float, default=0.2, help="fake model time to first token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="fake model streaming rate")
+    parser.add_argument("--measure-legacy-up-to", type=int, default=500,
+                        help="run the legacy loop for answers up to this length; longer ones are computed")
+    args = parser.parse_args()
+    use_fake_model(FAKE_LLM_TTFT=args.ttft, FAKE_LLM_TOKENS_PER_SECOND=args.tokens_per_second)
+
+    from app.core.fake_llm import FakeStreamingChatModel
+    from app.core.streaming import iter_chain, paced
+
+    print(f"{'chars':>6} {'model s':>8} {'legacy s':>12} {'none s':>8} {'typewriter s':>13} {'legacy/none':>12}")
+    for length in (int(part) for part in args.lengths.split(",")):
+        model = FakeStreamingChatModel(responses=[synthetic_text(length)], ttft=args.ttft,
+                                       tokens_per_second=args.tokens_per_second)
+
+        def model_stream():
+            return iter_chain(lambda: model, "prompt")
+
+        model_seconds = drain(model_stream())
+        none = drain(paced(model_stream(), "none"))
+        typewriter = drain(paced(model_stream(), "typewriter"))
+        if length <= args.measure_legacy_up_to:
+            legacy, note = drain(legacy_stream(model_stream())), ""
+        else:
+            legacy, note = model_seconds + length * LEGACY_CHAR_DELAY, " (est.)"
+        print(f"{length:>6} {model_seconds:>8.2f} {legacy:>7.2f}{note:<5} {none:>8.2f} {typewriter:>13.2f} "
+              f"{legacy / none:>11.1f}x")
+
+
+if __name__ == "__main__":
+    main()
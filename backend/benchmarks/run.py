@@ -0,0 +1,435 @@
+# backend/benchmarks/run.py
+"""Load test /api/qna, /api/summarize and /api/tracker against the fake model.
+
+Run from backend/:
+
+    python -m benchmarks.run --output benchmarks/results/baseline.json
+    python -m benchmarks.run --compare benchmarks/results/baseline.json
+
+By default the app is built with create_app() and served in-process by
+werkzeug's threaded server. With --server gunicorn it runs as deployed:
+gunicorn -c gunicorn.conf.py with --workers gevent workers, in a subprocess,
+and memory is the RSS of the master and its workers. Either way every
+request is made over HTTP so streaming, TTFB and connection handling are
+measured as a client sees them. Exits with status 1 when --compare finds a
+regression.
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+ENDPOINTS = ("qna", "summarize", "tracker")
+PERCENTILES = (50, 95, 99)
+
+# Differences smaller than this are treated as noise when comparing runs
+MIN_LATENCY_DELTA_MS = 5.0
+
+SAMPLE_TEXT = (
+    "Streaming responses let the client render the first words of an answer while the model "
+    "is still generating the rest. Time to first byte therefore matters more to perceived "
+    "latency than the total duration, as long as the stream keeps flowing. "
+) * 4
+
+# Tracker turns alternate between fast-path commands and requests for the agent
+TRACKER_PROMPTS = (
+    "add {amount} for coffee",
+    "how is my spending looking, any tips? ({n})",
+    "what's my total?",
+)
+
+# Endpoints stream with status 200 before the model has answered, so a
+# failure shows up as one of these messages in the body instead
+FAILURE_MARKERS = (
+    "Error: An error occurred during streaming",
+    "I'm sorry, I encountered an error",
+)
+
+Sample = Tuple[Optional[int], Optional[float], float, bool]  # status, TTFB, total seconds, failed
+
+
+def configure_environment(args: argparse.Namespace, workdir: str):
+    """Point the app at the fake model and a scratch database before it is imported."""
+    os.environ.update({
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_TTFT": str(args.ttft),
+        "FAKE_LLM_TOKENS_PER_SECOND": str(args.tokens_per_second),
+        "FAKE_LLM_ERROR_RATE": str(args.error_rate),
+        "EXPENSE_DB_PATH": os.path.join(workdir, "expenses.db"),
+        "SESSION_BACKEND": "memory",
+        # Every request must reach the model to measure it
+        "RESPONSE_CACHE_BACKEND": "none",
+        "STREAM_PACING": "none",
+        # Tracker clients are signed-in users, each with their own ledger
+        "USER_TOKEN_SECRET": "benchmark",
+    })
+
+
+def build_request(endpoint: str, level: int, client: int, n: int) -> Tuple[str, dict, dict]:
+    """Path, JSON body and extra headers of the n-th request made by one client; payloads never repeat."""
+    tag = f"{level}-{client}-{n}"
+    if endpoint == "qna":
+        return "/api/qna", {"question": f"What does request {tag} measure?"}, {}
+    if endpoint == "summarize":
+        return "/api/summarize", {"text": f"Document {tag}. {SAMPLE_TEXT}"}, {}
+    from app.core.identity import sign_user
+
+    # One conversation per client and level, so session growth is visible
+    prompt = TRACKER_PROMPTS[n % len(TRACKER_PROMPTS)].format(amount=10 + n, n=tag)
+    session = f"bench-{level}-{client}"
+    headers = {"Authorization": f"Bearer {sign_user(session)}"}
+    return "/api/tracker", {"prompt": prompt, "session_id": session}, headers
+
+
+def timed_request(port: int, path: str, body: dict, timeout: float, headers: Optional[dict] = None) -> Sample:
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    started = time.perf_counter()
+    try:
+        conn.request("POST", path, body=json.dumps(body),
+                     headers={"Content-Type": "application/json", **(headers or {})})
+        response = conn.getresponse()
+        first = response.read(1)
+        ttfb = time.perf_counter() - started
+        text = (first + response.read()).decode("utf-8", "replace")
+        failed = response.status != 200 or any(marker in text for marker in FAILURE_MARKERS)
+        return response.status, ttfb, time.perf_counter() - started, failed
+    except (OSError, http.client.HTTPException):
+        return None, None, time.perf_counter() - started, True
+    finally:
+        conn.close()
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile, or None without values."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def _distribution_ms(values: List[float]) -> Dict[str, Optional[float]]:
+    result = {}
+    for pct in PERCENTILES:
+        value = percentile(values, pct)
+        result[f"p{pct}"] = None if value is None else round(value * 1000, 2)
+    return result
+
+
+def rss_mb() -> float:
+    """Resident memory of this process (the app and the load generator)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return round(int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20, 1)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(peak / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+
+
+def process_tree_rss_mb(pid: int) -> Optional[float]:
+    """Resident memory of a process and its children (Linux only), or None."""
+    total, pending = 0, [pid]
+    try:
+        while pending:
+            current = pending.pop()
+            with open(f"/proc/{current}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pending.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError, AttributeError):
+        return None
+    return round(total / 2 ** 20, 1)
+
+
+class InProcessServer:
+    """The app under werkzeug's threaded server, in this process."""
+
+    name = "werkzeug"
+
+    def __enter__(self):
+        from werkzeug.serving import make_server
+
+        from app import create_app
+        from app.core.agents import warm_up
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        app = create_app()
+        warm_up()
+        self._server = make_server("127.0.0.1", 0, app, threaded=True)
+        self.port = self._server.server_port
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+
+    def memory_snapshot(self) -> dict:
+        from app.core.sessions import session_store
+        sessions = session_store.stats()
+        return {
+            "rss_mb": rss_mb(),
+            "sessions": sessions.get("active_sessions"),
+            "session_bytes": sessions.get("bytes"),
+        }
+
+
+class GunicornServer:
+    """The app as deployed: gunicorn.conf.py (gevent workers) in a subprocess."""
+
+    name = "gunicorn"
+
+    def __init__(self, workers: int, startup_timeout: float = 60.0):
+        self.workers = workers
+        self.startup_timeout = startup_timeout
+
+    def __enter__(self):
+        import socket
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        env = dict(os.environ, PORT=str(self.port), GUNICORN_WORKERS=str(self.workers), WARMUP_ON_START="true")
+        backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._process = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+                                         cwd=backend_dir, env=env,
+                                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + self.startup_timeout
+        while self._get("/api/health") is None:
+            if self._process.poll() is not None or time.monotonic() > deadline:
+                self.__exit__()
+                raise RuntimeError("gunicorn did not start; run it by hand to see its log")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc_info):
+        self._process.terminate()
+        try:
+            self._process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+
+    def _get(self, path: str) -> Optional[dict]:
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=5)
+        try:
+            conn.request("GET", path)
+            response = conn.getresponse()
+            return json.loads(response.read()) if response.status == 200 else None
+        except (OSError, http.client.HTTPException, ValueError):
+            return None
+        finally:
+            conn.close()
+
+    def memory_snapshot(self) -> dict:
+        # Sessions live per worker; this is whichever worker answers /api/stats
+        sessions = (self._get("/api/stats") or {}).get("sessions", {})
+        return {
+            "rss_mb": process_tree_rss_mb(self._process.pid),
+            "sessions": sessions.get("active_sessions"),
+            "session_bytes": sessions.get("bytes"),
+        }
+
+
+def run_level(server, endpoint: str, concurrency: int, requests_per_client: int,
+              timeout: float) -> dict:
+    """Closed loop: each client sends its next request as soon as the last one finishes."""
+    def client(index: int) -> List[Sample]:
+        samples = []
+        for n in range(requests_per_client):
+            path, body, headers = build_request(endpoint, concurrency, index, n)
+            samples.append(timed_request(server.port, path, body, timeout, headers))
+        return samples
+
+    before = server.memory_snapshot()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = [sample for batch in pool.map(client, range(concurrency)) for sample in batch]
+    elapsed = time.perf_counter() - started
+    after = server.memory_snapshot()
+
+    statuses: Dict[str, int] = {}
+    for status, _, _, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    ok = [sample for sample in samples if not sample[3]]
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "statuses": statuses,
+        "failed_in_stream": sum(1 for status, _, _, failed in samples if status == 200 and failed),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+        "ttfb_ms": _distribution_ms([ttfb for _, ttfb, _, _ in ok]),
+        "latency_ms": _distribution_ms([total for _, _, total, _ in ok]),
+        "memory": {
+            "before": before,
+            "after": after,
+            "rss_growth_mb": (round(after["rss_mb"] - before["rss_mb"], 1)
+                              if after["rss_mb"] is not None and before["rss_mb"] is not None else None),
+        },
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, timeout=5, check=True).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    server = GunicornServer(args.workers) if args.server == "gunicorn" else InProcessServer()
+    results: Dict[str, List[dict]] = {}
+    with server:
+        for endpoint in args.endpoints:
+            results[endpoint] = []
+            for concurrency in args.concurrency:
+                print(f"{endpoint}: {concurrency} concurrent clients...", file=sys.stderr)
+                # The tracker agent logs every step to stdout; keep the report readable
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    level = run_level(server, endpoint, concurrency, args.requests, args.timeout)
+                results[endpoint].append(level)
+
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "settings": {
+            "server": server.name if args.server == "werkzeug" else f"{server.name} x{args.workers}",
+            "ttft": args.ttft,
+            "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate,
+            "requests_per_client": args.requests,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float) -> List[str]:
+    """Regressions of current against baseline: lower throughput, higher p95/p99 or more errors."""
+    regressions = []
+    for endpoint, levels in current["results"].items():
+        base_levels = {level["concurrency"]: level for level in baseline.get("results", {}).get(endpoint, [])}
+        for level in levels:
+            base = base_levels.get(level["concurrency"])
+            if base is None:
+                continue
+            where = f"{endpoint} @ {level['concurrency']}"
+            if level["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+                regressions.append(f"{where}: throughput {base['throughput_rps']} -> {level['throughput_rps']} req/s")
+            if level["errors"] > base["errors"]:
+                regressions.append(f"{where}: errors {base['errors']} -> {level['errors']}")
+            for metric in ("ttfb_ms", "latency_ms"):
+                for pct in ("p95", "p99"):
+                    old, new = base[metric].get(pct), level[metric].get(pct)
+                    if old is None or new is None:
+                        continue
+                    if new > old * (1 + tolerance) and new - old > MIN_LATENCY_DELTA_MS:
+                        regressions.append(f"{where}: {metric} {pct} {old} -> {new}")
+    return regressions
+
+
+def _fmt(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.0f}"
+
+
+def _fmt_mb(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _fmt_count(value: Optional[int]) -> str:
+    return "-" if value is None else str(value)
+
+
+def print_report(report: dict):
+    print(f"{'endpoint':<10} {'conc':>4} {'reqs':>5} {'err':>4} {'req/s':>7}  "
+          f"{'ttfb p50/p95/p99 ms':>20}  {'total p50/p95/p99 ms':>21}  {'rss MB':>7} {'sessions':>8}")
+    for endpoint, levels in report["results"].items():
+        for level in levels:
+            ttfb = "/".join(_fmt(level["ttfb_ms"][f"p{pct}"]) for pct in PERCENTILES)
+            total = "/".join(_fmt(level["latency_ms"][f"p{pct}"]) for pct in PERCENTILES)
+            after = level["memory"]["after"]
+            print(f"{endpoint:<10} {level['concurrency']:>4} {level['requests']:>5} {level['errors']:>4} "
+                  f"{level['throughput_rps']:>7.1f}  {ttfb:>20}  {total:>21}  "
+                  f"{_fmt_mb(after['rss_mb']):>7} {_fmt_count(after['sessions']):>8}")
+
+
+def _int_list(text: str) -> List[int]:
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def _endpoint_list(text: str) -> List[str]:
+    endpoints = [part.strip() for part in text.split(",") if part.strip()]
+    unknown = set(endpoints) - set(ENDPOINTS)
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown endpoints: {', '.join(sorted(unknown))}")
+    return endpoints
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--endpoints", type=_endpoint_list, default=list(ENDPOINTS),
+                        help="comma-separated subset of qna,summarize,tracker")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8, 32],
+                        help="comma-separated concurrent client counts (default 1,8,32)")
+    parser.add_argument("--requests", type=int, default=10, help="requests per client at each level")
+    parser.add_argument("--ttft", type=float, default=0.2, help="fake model time to first token, seconds")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0, help="fake model streaming rate")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of fake model calls that fail")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request client timeout, seconds")
+    parser.add_argument("--server", choices=("werkzeug", "gunicorn"), default="werkzeug",
+                        help="serve in-process with werkzeug, or with gunicorn and gevent workers as deployed")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers with --server gunicorn")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed relative slowdown before a result counts as a regression")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        configure_environment(args, workdir)
+        report = run_benchmark(args)
+
+    print_report(report)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline.get("settings") != report["settings"]:
+            print(f"\nWarning: baseline settings differ: {baseline.get('settings')}")
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
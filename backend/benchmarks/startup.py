@@ -0,0 +1,128 @@
+# backend/benchmarks/startup.py
+"""Import time and time to the first healthy /api/health, cold and warm.
+
+Run from backend/:
+
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --provider gemini   # include the Google SDK
+
+Each measurement runs in a fresh subprocess so nothing is already imported.
+First, a plain interpreter times `import app`, create_app() and warm_up()
+(building the model client, chains and agent). Then gunicorn is started with
+gunicorn.conf.py under every combination of GUNICORN_PRELOAD and
+WARMUP_ON_START, and the report shows the time until /api/health first
+answers 200 and the latency of the first /api/qna request after that.
+"""
+import argparse
+import http.client
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import use_fake_model
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import json, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+from app.core.agents import warm_up
+warm_up()
+warmed = time.perf_counter()
+print(json.dumps({"import": imported - started, "create_app": created - imported, "warm_up": warmed - created}))
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(port: int, method: str, path: str, body=None, timeout: float = 30.0):
+    """(status, seconds), or (None, seconds) while nothing is listening yet."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    started = time.perf_counter()
+    try:
+        conn.request(method, path, body=json.dumps(body) if body else None,
+                     headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        response.read()
+        return response.status, time.perf_counter() - started
+    except OSError:
+        return None, time.perf_counter() - started
+    finally:
+        conn.close()
+
+
+def time_imports(env: dict) -> dict:
+    output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def time_gunicorn(env: dict, preload: bool, warmup: bool, timeout: float) -> dict:
+    port = free_port()
+    env = dict(env, PORT=str(port), GUNICORN_PRELOAD=str(preload).lower(), WARMUP_ON_START=str(warmup).lower())
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+                              cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        healthy = None
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"gunicorn exited with status {server.returncode}")
+            status, _ = request(port, "GET", "/api/health", timeout=1.0)
+            if status == 200:
+                healthy = time.perf_counter() - started
+                break
+            time.sleep(0.005)
+        if healthy is None:
+            raise RuntimeError(f"/api/health did not answer within {timeout}s")
+        status, first_request = request(port, "POST", "/api/qna", {"question": "What is a cold start?"})
+        return {"healthy": healthy, "first_request": first_request, "first_status": status}
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per measurement (median reported)")
+    parser.add_argument("--provider", choices=("fake", "gemini"), default="fake",
+                        help="gemini imports the Google SDK (no request is made until /api/qna)")
+    parser.add_argument("--workers", type=int, default=2, help="GUNICORN_WORKERS")
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for /api/health")
+    args = parser.parse_args()
+    use_fake_model(LLM_PROVIDER=args.provider, GUNICORN_WORKERS=args.workers)
+    env = dict(os.environ)
+    if args.provider == "gemini":
+        env.setdefault("GEMINI_API_KEY", "benchmark-placeholder")
+
+    samples = [time_imports(env) for _ in range(args.runs)]
+    print(f"provider {args.provider}, median of {args.runs} fresh interpreters")
+    for step in ("import", "create_app", "warm_up"):
+        print(f"  {step:<11} {statistics.median(sample[step] for sample in samples) * 1e3:>8.1f} ms")
+
+    print(f"\ngunicorn ({args.workers} gevent workers)")
+    print(f"{'preload':>7} {'warm-up':>7} {'healthy ms':>11} {'first /api/qna ms':>18}")
+    for preload in (False, True):
+        for warmup in (False, True):
+            runs = [time_gunicorn(env, preload, warmup, args.timeout) for _ in range(args.runs)]
+            healthy = statistics.median(run["healthy"] for run in runs) * 1e3
+            first = statistics.median(run["first_request"] for run in runs) * 1e3
+            statuses = {run["first_status"] for run in runs}
+            note = "" if statuses == {200} else f"  (status {', '.join(map(str, sorted(statuses, key=str)))})"
+            print(f"{'yes' if preload else 'no':>7} {'yes' if warmup else 'no':>7} {healthy:>11.1f} {first:>18.1f}{note}")
+
+
+if __name__ == "__main__":
+    main()
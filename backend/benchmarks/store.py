@@ -0,0 +1,202 @@
+# backend/benchmarks/store.py
+"""Expense store writes and queries at ledger sizes up to 1M rows.
+
+Run from backend/:
+
+    python -m benchmarks.store --rows 1000000
+    python -m benchmarks.store --concurrent --tenants 500 --threads 16 --shards 1,4,16
+
+The ledger is loaded with add_expenses() in batches of --batch rows, spread
+over a year of timestamps and a handful of categories. The report shows the
+bulk-load rate, then single add_expense() latency and the time-windowed
+queries against the full ledger, and finally the running aggregates
+(total_spent, category_totals, count) against the full recompute they
+replace and that verify_aggregates() runs.
+
+With --concurrent, --threads writer threads add expenses to --tenants
+tenants picked at random, once per --shards count, against a fresh store
+keeping --hot-tenants tenants' aggregates in memory. The report shows
+writes/s and write latency, hot-tenant evictions, how long writers waited
+for each shard's lock, and verify_aggregates() over every tenant.
+"""
+import argparse
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from benchmarks.common import use_fake_model
+from benchmarks.run import percentile
+
+CATEGORIES = ("food", "travel", "rent", "utilities", "shopping", "health", "fun", "misc")
+
+
+def synthetic_expenses(count: int, seed: int = 7):
+    """Deterministic (amount, category, description, timestamp) rows over the past year."""
+    rng = random.Random(seed)
+    start = datetime.now() - timedelta(days=365)
+    for index in range(count):
+        timestamp = start + timedelta(seconds=rng.randrange(365 * 86400))
+        yield (round(rng.uniform(1, 500), 2), rng.choice(CATEGORIES), f"expense {index}", timestamp.isoformat())
+
+
+def timed(fn, repeat: int):
+    """(result, per-call seconds) for repeat calls of fn."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - started)
+    return result, samples
+
+
+def report(name: str, samples):
+    print(f"{name:<34} {percentile(samples, 50) * 1e3:>9.3f} {percentile(samples, 95) * 1e3:>9.3f}")
+
+
+class TimedLock:
+    """A drop-in for a shard's lock that adds up how long acquirers waited."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.acquisitions = 0
+        self.waited = 0.0
+
+    def acquire(self, blocking: bool = True) -> bool:
+        started = time.perf_counter()
+        acquired = self._lock.acquire(blocking)
+        if acquired:
+            # Updated while holding the lock, so the counters need no lock of their own
+            self.acquisitions += 1
+            self.waited += time.perf_counter() - started
+        return acquired
+
+    def release(self):
+        self._lock.release()
+
+    __enter__ = acquire
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+
+def concurrent_writes(args, workdir: str, shards: int):
+    from app.core.store import ExpenseStore
+
+    store = ExpenseStore(os.path.join(workdir, f"concurrent-{shards}", "store.db"), shards, args.hot_tenants)
+    os.makedirs(os.path.dirname(store.path), exist_ok=True)
+    locks = []
+    for shard in store.shards:
+        shard.lock = TimedLock()
+        locks.append(shard.lock)
+    tenants = [f"tenant-{index}" for index in range(args.tenants)]
+    per_thread = args.writes // args.threads
+    latencies = [[] for _ in range(args.threads)]
+
+    def writer(index: int):
+        rng = random.Random(index)
+        for n in range(per_thread):
+            started = time.perf_counter()
+            store.add_expense(round(rng.uniform(1, 500), 2), rng.choice(CATEGORIES), f"write {index}-{n}",
+                              tenant=rng.choice(tenants))
+            latencies[index].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=writer, args=(index,)) for index in range(args.threads)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = [latency for thread_latencies in latencies for latency in thread_latencies]
+    waits = [lock.waited / lock.acquisitions * 1e3 if lock.acquisitions else 0.0 for lock in locks]
+    written = sum(store.count(tenant=tenant) for tenant in tenants)
+    mismatches = [mismatch for tenant in tenants for mismatch in store.verify_aggregates(tenant=tenant)]
+    print(f"{shards:>6} {len(samples) / elapsed:>9,.0f} {percentile(samples, 50) * 1e3:>8.3f} "
+          f"{percentile(samples, 99) * 1e3:>8.3f} {store.stats()['evictions']:>9} {max(waits):>13.3f} "
+          f"{sum(lock.waited for lock in locks) / elapsed:>10.2f} {written:>8} {len(mismatches):>10}")
+    for mismatch in mismatches[:5]:
+        print(f"       {mismatch}")
+
+
+def concurrent_benchmark(args, workdir: str):
+    print(f"{args.writes} writes from {args.threads} threads over {args.tenants} tenants, "
+          f"{args.hot_tenants} hot tenants")
+    print(f"{'shards':>6} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'evictions':>9} "
+          f"{'max wait ms':>13} {'waiting':>10} {'rows':>8} {'mismatches':>10}")
+    for shards in args.shards:
+        concurrent_writes(args, workdir, shards)
+    print("max wait: mean wait for the busiest shard's lock per acquisition; "
+          "waiting: threads blocked on shard locks, on average")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="expenses to load")
+    parser.add_argument("--batch", type=int, default=10_000, help="rows per add_expenses() call")
+    parser.add_argument("--repeat", type=int, default=50, help="samples per timed operation")
+    parser.add_argument("--concurrent", action="store_true", help="benchmark parallel writes to many tenants instead")
+    parser.add_argument("--tenants", type=int, default=500, help="tenants written to with --concurrent")
+    parser.add_argument("--threads", type=int, default=16, help="writer threads with --concurrent")
+    parser.add_argument("--writes", type=int, default=20_000, help="total writes with --concurrent")
+    parser.add_argument("--hot-tenants", type=int, default=100, help="EXPENSE_HOT_TENANTS with --concurrent")
+    parser.add_argument("--shards", default="1,4,16",
+                        type=lambda text: [int(part) for part in text.split(",") if part.strip()],
+                        help="comma-separated EXPENSE_DB_SHARDS values to compare with --concurrent")
+    args = parser.parse_args()
+    workdir = use_fake_model()
+    if args.concurrent:
+        concurrent_benchmark(args, workdir)
+        return
+
+    from app.core.store import ExpenseStore
+
+    store = ExpenseStore(os.path.join(workdir, "store.db"))
+    tenant = "bench"
+    rows = synthetic_expenses(args.rows)
+    started = time.perf_counter()
+    loaded = 0
+    while loaded < args.rows:
+        loaded += store.add_expenses([next(rows) for _ in range(min(args.batch, args.rows - loaded))], tenant=tenant)
+    elapsed = time.perf_counter() - started
+    print(f"loaded {loaded} rows in batches of {args.batch}: {elapsed:.2f}s, {loaded / elapsed:,.0f} rows/s")
+
+    month_start = (datetime.now() - timedelta(days=30)).strftime("%Y-%m-%d")
+    today = datetime.now().strftime("%Y-%m-%d")
+    print(f"{'operation (' + str(loaded) + ' rows)':<34} {'p50 ms':>9} {'p95 ms':>9}")
+    _, samples = timed(lambda: store.add_expense(12.5, "food", "lunch", tenant=tenant), args.repeat)
+    report("add_expense", samples)
+    _, samples = timed(lambda: store.recent_expenses(100, tenant=tenant), args.repeat)
+    report("recent_expenses(100)", samples)
+    _, samples = timed(lambda: store.period_totals("month", tenant=tenant), args.repeat)
+    report("period_totals(month)", samples)
+    _, samples = timed(lambda: store.category_totals_between(month_start, today, tenant=tenant), args.repeat)
+    report("category_totals_between(30 days)", samples)
+    _, samples = timed(lambda: store.top_expenses(5, month_start, today, tenant=tenant), args.repeat)
+    report("top_expenses(5, 30 days)", samples)
+
+    _, samples = timed(lambda: store.total_spent(tenant=tenant), args.repeat)
+    report("total_spent (aggregates)", samples)
+    _, samples = timed(lambda: store.category_totals(tenant=tenant), args.repeat)
+    report("category_totals (aggregates)", samples)
+    _, samples = timed(lambda: store.count(tenant=tenant), args.repeat)
+    report("count (aggregates)", samples)
+    shard = store.shards[0]
+
+    def recompute():
+        with shard.lock:
+            return shard.conn.execute(
+                "SELECT category, SUM(amount), COUNT(*) FROM expenses WHERE tenant = ? GROUP BY category", (tenant,)
+            ).fetchall()
+
+    _, samples = timed(recompute, max(1, args.repeat // 10))
+    report("full recompute (SUM/COUNT scan)", samples)
+    mismatches, samples = timed(lambda: store.verify_aggregates(tenant=tenant), max(1, args.repeat // 10))
+    report("verify_aggregates", samples)
+    print(f"verify_aggregates mismatches: {mismatches or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# backend/benchmarks/tracker_memory.py
+"""Prompt tokens over a 50-turn tracker conversation, raw versus compacted memory.
+
+Run from backend/:
+
+    python -m benchmarks.tracker_memory --turns 50
+
+A scripted conversation of expense commands and open questions goes through
+POST /api/tracker against the fake model. After every turn the report
+compares the chat history a prompt would carry if every past turn were
+sent verbatim with what render_chat_history() actually renders. On turns
+that reach the agent it also shows the prompt tokens recorded by the fake
+model, and what that prompt would have cost with the raw history.
+"""
+import argparse
+
+from benchmarks.common import use_fake_model
+
+SCRIPT = [
+    "add 30 for coffee",
+    "set budget to 5000",
+    "spent 450 on groceries",
+    "how am I doing with my budget compared to last week?",
+    "paid 120 for a cab",
+    "what's my total?",
+    "any tips to cut my food spending?",
+    "add 899 for shoes",
+    "budget status",
+    "which category did I spend the most on, and is that normal?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=50, help="conversation length")
+    parser.add_argument("--every", type=int, default=5, help="print every Nth turn")
+    args = parser.parse_args()
+    use_fake_model(FAKE_LLM_RECORD_PROMPTS=4)
+
+    from app import create_app
+    from app.api.tracker import resolve_tenant
+    from app.core.agents import get_expense_agent_executor, get_llm
+    from app.core.long_summary import estimate_tokens
+    from app.core.memory import render_chat_history
+    from app.core.sessions import session_store
+    from app.core.store import current_tenant
+
+    get_expense_agent_executor().verbose = False
+    client = create_app().test_client()
+    model = get_llm()
+    session_id = "memory-benchmark"
+    tenant = resolve_tenant(None, session_id)
+    raw_history = []
+    totals = {"raw_history": 0, "compacted_history": 0, "sent": 0, "sent_raw": 0}
+    # History tokens as they stood before the current turn: that is what
+    # the turn's prompt carried.
+    raw_before = compacted_before = 0
+
+    print(f"{'turn':>4} {'path':>5} {'raw history':>11} {'compacted':>9} {'prompt sent':>11} {'with raw':>8}")
+    for turn in range(1, args.turns + 1):
+        prompt = SCRIPT[(turn - 1) % len(SCRIPT)]
+        calls_before = model.call_count
+        response = client.post("/api/tracker", json={"prompt": prompt, "session_id": session_id})
+        raw_history += [f"Human: {prompt}", f"AI: {response.get_data(as_text=True)}"]
+
+        sent = sent_raw = ""
+        if model.call_count > calls_before:
+            sent = estimate_tokens("\n".join(content for _, content in model.recorded_prompts()[-1]))
+            sent_raw = sent - compacted_before + raw_before
+            totals["sent"] += sent
+            totals["sent_raw"] += sent_raw
+
+        # What the next turn's prompt carries: every past turn verbatim, or
+        # the state snapshot plus the compacted session history.
+        token = current_tenant.set(tenant)
+        try:
+            compacted = estimate_tokens(render_chat_history(session_store.get(session_id)))
+        finally:
+            current_tenant.reset(token)
+        raw = estimate_tokens("\n".join(raw_history))
+        totals["raw_history"] += raw
+        totals["compacted_history"] += compacted
+        raw_before, compacted_before = raw, compacted
+        if turn % args.every == 0 or turn == 1:
+            path = "agent" if sent != "" else "fast"
+            print(f"{turn:>4} {path:>5} {raw:>11} {compacted:>9} {sent:>11} {sent_raw:>8}")
+
+    print(f"{'all':>4} {'':>5} {totals['raw_history']:>11} {totals['compacted_history']:>9} "
+          f"{totals['sent']:>11} {totals['sent_raw']:>8}")
+    if totals["sent_raw"]:
+        print(f"agent prompt tokens saved: {1 - totals['sent'] / totals['sent_raw']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
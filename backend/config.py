@@ -7,7 +7,122 @@ load_dotenv()
 
 class Config:
     """Application configuration."""
+    # A missing GEMINI_API_KEY is reported when the model is first used, so
+    # the app (and /api/health) still starts without it.
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
-    if not GEMINI_API_KEY:
-        raise ValueError("No GEMINI_API_KEY set for Flask application")
\ No newline at end of file
+    # LLM provider: "gemini" for production, "fake" for a local streaming
+    # model with configurable latency (offline development and load tests).
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini").lower()
+    GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+    # REST transport keeps Gemini calls cooperative under gevent workers.
+    GEMINI_TRANSPORT = os.getenv("GEMINI_TRANSPORT", "rest")
+    FAKE_LLM_TTFT = float(os.getenv("FAKE_LLM_TTFT", "0.2"))
+    FAKE_LLM_TOKENS_PER_SECOND = float(os.getenv("FAKE_LLM_TOKENS_PER_SECOND", "50"))
+    FAKE_LLM_ERROR_RATE = float(os.getenv("FAKE_LLM_ERROR_RATE", "0.0"))
+    FAKE_LLM_QUOTA_PER_SECOND = float(os.getenv("FAKE_LLM_QUOTA_PER_SECOND", "0"))
+    # Keep this many of the latest prompts sent to the fake model (for tests).
+    FAKE_LLM_RECORD_PROMPTS = int(os.getenv("FAKE_LLM_RECORD_PROMPTS", "0"))
+
+    # Prompt caching: the tracker agent's static instructions are sent first,
+    # as an identical system message, so the provider can reuse them.
+    # PROMPT_CACHE_HOOK ("module:attribute") plugs in explicit context
+    # caching; PROMPT_CACHE_ACCOUNTING tallies cacheable vs dynamic tokens.
+    # Providers only cache prefixes of at least PROMPT_CACHE_MIN_TOKENS
+    # (1024 for Gemini 2.x implicit caching); shorter ones count as dynamic.
+    PROMPT_CACHE_HOOK = os.getenv("PROMPT_CACHE_HOOK", "")
+    PROMPT_CACHE_ACCOUNTING = os.getenv("PROMPT_CACHE_ACCOUNTING", "true").lower() == "true"
+    PROMPT_CACHE_MIN_TOKENS = int(os.getenv("PROMPT_CACHE_MIN_TOKENS", "1024"))
+
+    # Streaming: "none" forwards model chunks as they arrive, "typewriter"
+    # adds a per-character delay capped at STREAM_MAX_PACING_SECONDS.
+    STREAM_PACING = os.getenv("STREAM_PACING", "none").lower()
+    STREAM_CHAR_DELAY = float(os.getenv("STREAM_CHAR_DELAY", "0.03"))
+    STREAM_MAX_PACING_SECONDS = float(os.getenv("STREAM_MAX_PACING_SECONDS", "2.0"))
+    STREAM_FRAME_CHARS = int(os.getenv("STREAM_FRAME_CHARS", "16"))
+
+    # Response cache for /api/qna and /api/summarize: "memory" (per worker),
+    # "redis" (shared between workers, needs the redis package) or "none".
+    RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory").lower()
+    RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/0")
+    RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1024"))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+
+    # Client-side limiter in front of the model (per worker): a token bucket
+    # of LLM_RATE_LIMIT calls per second (0 = unlimited) with bursts of
+    # LLM_BURST, and a concurrency limit that halves on quota errors and
+    # timeouts and creeps back up on success. Every model call (each agent
+    # step, each chunk of a long summary) waits up to LLM_QUEUE_TIMEOUT
+    # seconds for a permit, interactive ones first. Requests get a 503 with
+    # Retry-After when the queue is full or would not drain in that time.
+    LLM_RATE_LIMIT = float(os.getenv("LLM_RATE_LIMIT", "0"))
+    LLM_BURST = int(os.getenv("LLM_BURST", "10"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+    LLM_MIN_CONCURRENCY = int(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+    LLM_MAX_QUEUE = int(os.getenv("LLM_MAX_QUEUE", "256"))
+    LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+
+    # Identical Q&A/summarize requests that arrive while the first one is
+    # still streaming share its upstream model call instead of starting another.
+    COALESCE_REQUESTS = os.getenv("COALESCE_REQUESTS", "true").lower() == "true"
+
+    # Long documents (above SUMMARY_LONG_THRESHOLD_TOKENS) are summarized
+    # map-reduce style: overlapping chunks summarized in parallel, then
+    # reduced into the final 3 sentences.
+    SUMMARY_LONG_THRESHOLD_TOKENS = int(os.getenv("SUMMARY_LONG_THRESHOLD_TOKENS", "6000"))
+    SUMMARY_CHUNK_TOKENS = int(os.getenv("SUMMARY_CHUNK_TOKENS", "3000"))
+    SUMMARY_CHUNK_OVERLAP_TOKENS = int(os.getenv("SUMMARY_CHUNK_OVERLAP_TOKENS", "200"))
+    SUMMARY_MAX_CONCURRENCY = int(os.getenv("SUMMARY_MAX_CONCURRENCY", "4"))
+
+    # /api/summarize/batch: documents per request, model calls in flight at
+    # once (chunk calls of long documents included), and attempts per model
+    # call when the upstream reports a quota error
+    SUMMARY_BATCH_MAX_DOCUMENTS = int(os.getenv("SUMMARY_BATCH_MAX_DOCUMENTS", "500"))
+    SUMMARY_BATCH_CONCURRENCY = int(os.getenv("SUMMARY_BATCH_CONCURRENCY", "8"))
+    SUMMARY_BATCH_MAX_ATTEMPTS = int(os.getenv("SUMMARY_BATCH_MAX_ATTEMPTS", "4"))
+
+    # SQLite file holding the expense ledgers and budgets (shared by all
+    # workers). Each tenant (user_id, or the session ID) has its own ledger;
+    # with EXPENSE_DB_SHARDS > 1 tenants are hashed onto expenses.0.db,
+    # expenses.1.db, ... Each file has one connection and one write lock, so
+    # with the default of 1 every tenant's writes queue behind each other;
+    # changing the count rehashes tenants, so choose it before data exists.
+    # EXPENSE_HOT_TENANTS caps the tenants whose running totals are kept in
+    # memory per worker.
+    EXPENSE_DB_PATH = os.getenv("EXPENSE_DB_PATH", "expenses.db")
+    EXPENSE_DB_SHARDS = int(os.getenv("EXPENSE_DB_SHARDS", "1"))
+    EXPENSE_HOT_TENANTS = int(os.getenv("EXPENSE_HOT_TENANTS", "1000"))
+
+    # Ledger for anonymous tracker clients (no user token): "shared" uses the
+    # one default ledger, "session" gives each session_id its own.
+    EXPENSE_TENANCY = os.getenv("EXPENSE_TENANCY", "shared").lower()
+
+    # Key that signs user tokens ("Authorization: Bearer <user_id>.<hmac>",
+    # see app.core.identity.sign_user). Each verified user has their own
+    # ledger; without a secret every client is anonymous.
+    USER_TOKEN_SECRET = os.getenv("USER_TOKEN_SECRET", "")
+
+    # Tracker conversation histories: "memory" (per worker) or "sqlite"
+    # (shared by all workers through SESSION_DB_PATH)
+    SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory").lower()
+    SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", EXPENSE_DB_PATH)
+    SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+    SESSION_IDLE_TTL = float(os.getenv("SESSION_IDLE_TTL", "3600"))
+    SESSION_MAX_MESSAGES = int(os.getenv("SESSION_MAX_MESSAGES", "10"))
+    SESSION_MAX_BYTES = int(os.getenv("SESSION_MAX_BYTES", "16384"))
+    SESSION_MAX_TOTAL_BYTES = int(os.getenv("SESSION_MAX_TOTAL_BYTES", str(64 * 1024 * 1024)))
+
+    # Tracker memory: past turns are stripped of emojis, answers cut to their
+    # first line and messages capped at TRACKER_MEMORY_MESSAGE_TOKENS. Once
+    # they exceed TRACKER_MEMORY_TOKENS the oldest are folded into a rolling
+    # summary of at most TRACKER_MEMORY_SUMMARY_TOKENS, and a snapshot of the
+    # budget and latest expenses is rendered ahead of them.
+    TRACKER_MEMORY_TOKENS = int(os.getenv("TRACKER_MEMORY_TOKENS", "250"))
+    TRACKER_MEMORY_MESSAGE_TOKENS = int(os.getenv("TRACKER_MEMORY_MESSAGE_TOKENS", "60"))
+    TRACKER_MEMORY_SUMMARY_TOKENS = int(os.getenv("TRACKER_MEMORY_SUMMARY_TOKENS", "60"))
+    TRACKER_MEMORY_RECENT_EXPENSES = int(os.getenv("TRACKER_MEMORY_RECENT_EXPENSES", "3"))
+
+    # Tracker agent: "react" (text-parsed Thought/Action loop) or
+    # "tool_calling" (native structured function calls)
+    TRACKER_AGENT_MODE = os.getenv("TRACKER_AGENT_MODE", "react").lower()
@@ -0,0 +1,31 @@
+# backend/gunicorn.conf.py
+import os
+
+# gevent workers run every request in its own greenlet, so a worker can hold
+# hundreds of in-flight LLM streams while waiting on Gemini; concurrency is
+# bounded by memory rather than by the number of worker processes.
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "gevent")
+
+if worker_class == "gevent":
+    # Patch before the app (and its HTTP clients) is imported, including
+    # when the app is preloaded in the master process.
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8080')}"
+workers = int(os.environ.get("GUNICORN_WORKERS", "2"))
+worker_connections = int(os.environ.get("GUNICORN_WORKER_CONNECTIONS", "1000"))
+timeout = 120
+# The app builds its model client lazily, so importing it once in the
+# master and forking is cheap and safe.
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+loglevel = "info"
+accesslog = "-"
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    # Optionally build the model client and agent before taking traffic
+    if os.environ.get("WARMUP_ON_START", "false").lower() == "true":
+        from app.core.agents import warm_up
+        warm_up()
@@ -0,0 +1,33 @@
+# backend/tests/conftest.py
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Config reads the environment once, at import, so the app is pointed at the
+# fake model and a scratch database before any test module imports it.
+_workdir = tempfile.mkdtemp(prefix="tests-")
+atexit.register(shutil.rmtree, _workdir, ignore_errors=True)
+os.environ.update({
+    "LLM_PROVIDER": "fake",
+    "FAKE_LLM_TTFT": "0",
+    "FAKE_LLM_TOKENS_PER_SECOND": "0",
+    "FAKE_LLM_ERROR_RATE": "0",
+    "EXPENSE_DB_PATH": os.path.join(_workdir, "expenses.db"),
+    "SESSION_BACKEND": "memory",
+    "RESPONSE_CACHE_BACKEND": "memory",
+    "STREAM_PACING": "none",
+})
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "expenses.db")
+
+
+@pytest.fixture
+def client():
+    from app import create_app
+    return create_app().test_client()
@@ -0,0 +1,63 @@
+# backend/tests/test_agents.py
+import uuid
+
+import pytest
+
+from app.core import agents
+from app.core.fake_llm import FakeStreamingChatModel
+from app.core.store import current_tenant, expense_store
+from config import Config
+
+PARALLEL_TOOL_CALLS = {"content": "", "tool_calls": [
+    {"name": "add_expense", "args": {"amount": 30, "category": "food", "description": "coffee"}},
+    {"name": "add_expense", "args": {"amount": 200, "category": "food", "description": "groceries"}},
+]}
+
+
+@pytest.fixture
+def tenant():
+    token = current_tenant.set(f"test-{uuid.uuid4().hex}")
+    yield current_tenant.get()
+    current_tenant.reset(token)
+
+
+def build_agent(monkeypatch, mode, responses):
+    model = FakeStreamingChatModel(responses=responses)
+    monkeypatch.setattr(agents, "get_llm", lambda: model)
+    monkeypatch.setattr(Config, "TRACKER_AGENT_MODE", mode)
+    return agents._build_expense_agent_executor(), model
+
+
+def test_fake_model_scripts_parallel_tool_calls_once_tools_are_bound():
+    model = FakeStreamingChatModel(responses=[PARALLEL_TOOL_CALLS])
+    assert model.invoke("hi").tool_calls == []
+
+    bound = model.bind_tools(agents.TYPED_EXPENSE_TOOLS)
+    invoked = bound.invoke("hi").tool_calls
+    streamed = None
+    for chunk in bound.stream("hi"):
+        streamed = chunk if streamed is None else streamed + chunk
+    assert [call["args"]["description"] for call in invoked] == ["coffee", "groceries"]
+    assert [(call["name"], call["args"]) for call in streamed.tool_calls] == \
+        [(call["name"], call["args"]) for call in invoked]
+    assert len({call["id"] for call in invoked + streamed.tool_calls}) == 4
+
+
+def test_tool_calling_agent_runs_parallel_calls_in_one_round_trip(monkeypatch, tenant):
+    executor, model = build_agent(monkeypatch, "tool_calling", [PARALLEL_TOOL_CALLS, "Added both ☕🛒"])
+    result = executor.invoke({"input": "add 30 for coffee and 200 for groceries", "chat_history": ""})
+    assert result["output"] == "Added both ☕🛒"
+    assert model.call_count == 2
+    assert expense_store.total_spent() == pytest.approx(230)
+
+
+def test_react_agent_needs_a_round_trip_per_tool_call(monkeypatch, tenant):
+    executor, model = build_agent(monkeypatch, "react", [
+        "Thought: add the coffee\nAction: add_expense\nAction Input: 30|food|coffee",
+        "Thought: now the groceries\nAction: add_expense\nAction Input: 200|food|groceries",
+        "Thought: done\nFinal Answer: Added both ☕🛒",
+    ])
+    result = executor.invoke({"input": "add 30 for coffee and 200 for groceries", "chat_history": ""})
+    assert result["output"] == "Added both ☕🛒"
+    assert model.call_count == 3
+    assert expense_store.total_spent() == pytest.approx(230)
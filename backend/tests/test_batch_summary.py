@@ -0,0 +1,80 @@
+# backend/tests/test_batch_summary.py
+import threading
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables.retry import RunnableRetry
+
+from app.core.agents import get_llm
+from app.core.batch_summary import summarize_batch
+from app.core.limiter import AdaptiveLimiter, LimiterCallbackHandler, PRIORITY_BATCH
+from config import Config
+
+LONG_TEXT = "budget stream model latency summary expense worker chunk token request. " * 2500
+
+
+class CallCounter(BaseCallbackHandler):
+    """Counts model calls by outcome and the most running at once."""
+
+    def __init__(self):
+        self.succeeded = self.failed = self.running = self.peak = 0
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        with self._lock:
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def on_llm_end(self, response, **kwargs):
+        with self._lock:
+            self.running -= 1
+            self.succeeded += 1
+
+    def on_llm_error(self, error, **kwargs):
+        with self._lock:
+            self.running -= 1
+            self.failed += 1
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    retrying = RunnableRetry._kwargs_retrying.fget
+    monkeypatch.setattr(RunnableRetry, "_kwargs_retrying",
+                        property(lambda self: {k: v for k, v in retrying(self).items() if k != "wait"}))
+
+
+def run_batch(texts, callbacks):
+    documents = [(index, text, f"test-batch-{id(callbacks)}-{index}") for index, text in enumerate(texts)]
+    return sorted(summarize_batch(documents, callbacks), key=lambda result: result["id"])
+
+
+def test_quota_error_retries_one_chunk_call_not_the_whole_document(monkeypatch, no_backoff):
+    model = get_llm()
+    clean = CallCounter()
+    run_batch([LONG_TEXT], [clean])
+    assert clean.failed == 0 and clean.succeeded > 3
+
+    monkeypatch.setattr(model, "error_rate", 0.3)
+    monkeypatch.setattr(model, "seed", 5)
+    monkeypatch.setattr(Config, "SUMMARY_BATCH_MAX_ATTEMPTS", 10)
+    flaky = CallCounter()
+    [result] = run_batch([LONG_TEXT + " "], [flaky])
+
+    assert "summary" in result
+    assert flaky.failed > 0
+    # Every failure cost exactly one extra call; no successful chunk re-ran
+    assert flaky.succeeded == clean.succeeded
+
+
+def test_nested_chunk_calls_count_against_the_batch_concurrency(monkeypatch):
+    monkeypatch.setattr(get_llm(), "ttft", 0.01)
+    limiter = AdaptiveLimiter(rate=0, burst=1, min_limit=1, max_limit=32, max_queue=64, queue_timeout=5)
+    counter = CallCounter()
+    callbacks = [LimiterCallbackHandler(limiter, PRIORITY_BATCH, timeout=None, max_in_flight=3), counter]
+
+    results = run_batch([LONG_TEXT + " " * index for index in range(4)], callbacks)
+
+    assert all("summary" in result for result in results)
+    assert counter.succeeded > 4 * 3
+    assert counter.peak == 3
+    assert limiter.stats()["in_flight"] == 0
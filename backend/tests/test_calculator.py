@@ -0,0 +1,122 @@
+# backend/tests/test_calculator.py
+import time
+from decimal import Decimal
+
+import pytest
+
+from app.core.calculator import (
+    MAX_EXPONENT, MAX_EXPRESSION_LENGTH, MAX_MAGNITUDE, CalculationError, _compile, evaluate, format_result,
+)
+
+# Any expression within the bounds, however adversarial, stays far below this
+WORST_CASE_BUDGET_SECONDS = 0.005
+
+
+def calc(expression: str) -> str:
+    return format_result(evaluate(expression))
+
+
+@pytest.mark.parametrize("expression, expected", [
+    ("0.1 + 0.2", "0.3"),
+    ("50*10", "500"),
+    ("1,250 + ₹50", "1300"),
+    ("10 ÷ 4", "2.5"),
+    ("2^10", "1024"),
+    ("2**-2", "0.25"),
+    ("1/3", "0.3333333333"),
+    ("-(3 - 5) * +2", "4"),
+])
+def test_plain_arithmetic_is_exact_decimal(expression, expected):
+    assert calc(expression) == expected
+
+
+@pytest.mark.parametrize("expression", ["-7//2", "7//-2", "7.5//2", "-7.5//2", "-7%2", "7%-2", "-7.5%2", "7.5%-2",
+                                        "10**17//3", "-10**17%7", "-1//3", "-1%3"])
+def test_floor_division_and_modulo_follow_python(expression):
+    assert Decimal(calc(expression)) == Decimal(str(eval(expression)))
+
+
+def test_modulo_is_exact_where_floats_are_not():
+    assert calc("-0.3 % 0.1") == "0"
+    assert calc("1.1 // 0.1") == "11"
+
+
+def test_zero_to_the_zero_is_one_as_in_python():
+    assert calc("0**0") == "1" == str(0 ** 0)
+    assert calc("0.0**0") == "1"
+    assert calc("0**1") == "0"
+
+
+@pytest.mark.parametrize("expression", ["1/0", "1//0", "1%0", "1/(2-2)", "0**-1", "1/0.0", "5 % (3-3)"])
+def test_division_by_zero_is_an_error(expression):
+    with pytest.raises(CalculationError, match="division by zero"):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", ["9**9**9", "2**65", "10**100", "(-1)**1000", "2**0.5", "(-8)**(1/3)"])
+def test_exponents_are_bounded_whole_numbers(expression):
+    with pytest.raises(CalculationError, match=f"exponents must be whole numbers up to {MAX_EXPONENT}"):
+        evaluate(expression)
+
+
+def test_magnitude_is_bounded_at_1e18_including_intermediate_results():
+    assert evaluate("10**18") == MAX_MAGNITUDE
+    assert evaluate("-999999999999999999 - 1") == -MAX_MAGNITUDE
+    for expression in ("10**18 + 1", "-10**18 - 1", "1e19", "2**64", "10**18*10/10", "9**9*9**9*9**9"):
+        with pytest.raises(CalculationError, match="too large"):
+            evaluate(expression)
+
+
+def test_expression_length_is_bounded_at_200_characters():
+    # Parentheses add length but no nodes
+    at_limit = "(" * 98 + "1+10" + ")" * 98
+    assert len(at_limit) == MAX_EXPRESSION_LENGTH
+    assert calc(at_limit) == "11"
+    with pytest.raises(CalculationError, match=f"longer than {MAX_EXPRESSION_LENGTH}"):
+        evaluate("(" * 98 + "1+100" + ")" * 98)
+    # Checked after normalization: surrounding whitespace and thousands separators do not count
+    assert calc(" " * 300 + "1,000+1") == "1001"
+
+
+def test_expression_size_is_bounded_at_64_nodes():
+    # n numbers joined by + are 3n - 2 nodes: numbers, BinOps and operators
+    assert calc("+".join(["1"] * 22)) == "22"
+    with pytest.raises(CalculationError, match="more than 64 terms"):
+        evaluate("+".join(["1"] * 23))
+    with pytest.raises(CalculationError, match="more than 64 terms"):
+        evaluate("-" * 70 + "1")
+
+
+def test_deep_parentheses_within_the_length_bound():
+    assert calc("(" * 99 + "1" + ")" * 99) == "1"
+    assert calc("-(" * 30 + "1" + ")" * 30) == "1"
+    assert calc("((((((((((1+2)*3)-4)/5)//1)%7)**2)+1)*2)-1)") == "3"
+
+
+@pytest.mark.parametrize("expression", ["__import__('os')", "x + 1", "'a' * 3", "[1, 2]", "f(2)", "1 if 1 else 2",
+                                        "1 < 2", "not 1", "1 & 2", "True + 1", "1j * 2", "", "1 +"])
+def test_anything_but_arithmetic_is_rejected(expression):
+    with pytest.raises(CalculationError):
+        evaluate(expression)
+
+
+@pytest.mark.parametrize("expression", [
+    "9**9**9",
+    "(" * 99 + "1" + ")" * 99,
+    "-" * 199 + "1",
+    "+".join(["999999999.999999999"] * 10),
+    "((((((2**64)**64)**64)**64)**64)**64)",
+    "1/3*" * 21 + "3",
+    "999999999999999999 // 0.0000000001",
+])
+def test_worst_case_expressions_finish_within_budget(expression):
+    best = float("inf")
+    for _ in range(5):
+        _compile.cache_clear()  # time the parse and validation too
+        started = time.perf_counter()
+        try:
+            evaluate(expression)
+        except CalculationError:
+            pass
+        best = min(best, time.perf_counter() - started)
+    assert best < WORST_CASE_BUDGET_SECONDS
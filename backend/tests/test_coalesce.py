@@ -0,0 +1,187 @@
+# backend/tests/test_coalesce.py
+import threading
+import time
+
+import pytest
+
+from app.core.coalesce import SingleFlight
+from app.core.fake_llm import FakeLLMError, FakeStreamingChatModel
+
+REPLY = "one two three four five six seven eight nine ten"
+
+
+def model_stream(model, prompt="question"):
+    return lambda: (chunk.content for chunk in model.stream(prompt))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_concurrent_identical_requests_make_one_upstream_call():
+    model = FakeStreamingChatModel(responses=[REPLY], ttft=0.2, tokens_per_second=200)
+    coalescer = SingleFlight()
+    callers = 20
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def request(index):
+        barrier.wait()
+        results[index] = "".join(coalescer.stream("key", model_stream(model)))
+
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [REPLY] * callers
+    assert model.call_count == 1
+    assert coalescer.stats() == {"upstream_calls": 1, "coalesced": callers - 1, "cancelled": 0, "in_flight": 0}
+
+
+def test_late_subscriber_replays_chunks_already_received():
+    model = FakeStreamingChatModel(responses=[REPLY], tokens_per_second=50)
+    coalescer = SingleFlight()
+    first = coalescer.stream("key", model_stream(model))
+    assert next(first) == "one "
+    wait_for(lambda: coalescer._flights.get("key") and len(coalescer._flights["key"].chunks) >= 3)
+    second = coalescer.stream("key", model_stream(model))
+    assert "".join(second) == REPLY
+    assert "one " + "".join(first) == REPLY
+    assert model.call_count == 1
+
+
+def test_separate_keys_are_not_coalesced():
+    model = FakeStreamingChatModel(responses=[REPLY])
+    coalescer = SingleFlight()
+    assert "".join(coalescer.stream("a", model_stream(model))) == REPLY
+    assert "".join(coalescer.stream("b", model_stream(model))) == REPLY
+    assert model.call_count == 2
+
+
+def test_upstream_error_reaches_every_subscriber():
+    model = FakeStreamingChatModel(error_rate=1.0)
+
+    def produce():
+        # The fake model fails before its TTFT, so hold the flight open for the other subscribers.
+        time.sleep(0.1)
+        yield from model_stream(model)()
+
+    coalescer = SingleFlight()
+    subscriptions = [coalescer.stream("key", produce) for _ in range(3)]
+    for subscription in subscriptions:
+        with pytest.raises(FakeLLMError):
+            list(subscription)
+    assert model.call_count == 1
+
+
+
+class Interrupted(BaseException):
+    """Stands in for gevent's GreenletExit, which is not an Exception."""
+
+
+def test_upstream_interrupted_by_a_base_exception_is_an_error_not_a_clean_end(monkeypatch):
+    uncaught = []
+    monkeypatch.setattr(threading, "excepthook", lambda args: uncaught.append(args.exc_type))
+
+    def produce():
+        yield "partial "
+        time.sleep(0.1)
+        raise Interrupted()
+
+    coalescer = SingleFlight()
+    subscriptions = [coalescer.stream("key", produce) for _ in range(2)]
+    for subscription in subscriptions:
+        assert next(subscription) == "partial "
+        with pytest.raises(RuntimeError, match="Interrupted") as raised:
+            list(subscription)
+        assert isinstance(raised.value.__cause__, Interrupted)
+    # The upstream thread itself still stops with the original exception
+    wait_for(lambda: uncaught)
+    assert uncaught == [Interrupted]
+    assert coalescer.stats()["in_flight"] == 0
+
+def _slow_upstream(produced, closed):
+    def produce():
+        try:
+            for index in range(200):
+                produced.append(index)
+                time.sleep(0.01)
+                yield f"{index} "
+        finally:
+            closed.set()
+    return produce
+
+
+@pytest.mark.parametrize("abandon", ["close", "garbage_collect"])
+def test_subscription_abandoned_before_first_chunk_cancels_upstream(abandon):
+    coalescer = SingleFlight()
+    produced, closed = [], threading.Event()
+
+    def wrapped(chunks):
+        # Stands in for the endpoint's paced/with_error_message generators,
+        # which a closed response closes before they ever reach the subscription.
+        yield from chunks
+
+    response = wrapped(coalescer.stream("key", _slow_upstream(produced, closed)))
+    if abandon == "close":
+        response.close()
+    del response
+
+    assert closed.wait(5)
+    assert len(produced) < 200
+    assert coalescer.stats()["cancelled"] == 1
+    assert coalescer.stats()["in_flight"] == 0
+
+
+def test_upstream_continues_until_the_last_subscriber_leaves():
+    coalescer = SingleFlight()
+    produced, closed = [], threading.Event()
+    first = coalescer.stream("key", _slow_upstream(produced, closed))
+    second = coalescer.stream("key", _slow_upstream(produced, closed))
+    assert next(first) == "0 "
+    first.close()
+    assert next(second) == "0 " and next(second) == "1 "
+    assert not closed.is_set()
+    second.close()
+    assert closed.wait(5)
+    assert coalescer.stats()["cancelled"] == 1
+
+
+def test_admission_runs_once_per_new_flight_under_concurrent_joins():
+    model = FakeStreamingChatModel(responses=[REPLY], ttft=0.2)
+    coalescer = SingleFlight()
+    admissions = []
+    callers = 10
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def request(index):
+        barrier.wait()
+        results[index] = "".join(coalescer.stream("key", model_stream(model), admit=lambda: admissions.append(1)))
+
+    threads = [threading.Thread(target=request, args=(index,)) for index in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == [REPLY] * callers
+    assert len(admissions) == 1 == model.call_count
+
+
+def test_rejected_admission_starts_nothing():
+    model = FakeStreamingChatModel(responses=[REPLY])
+    coalescer = SingleFlight()
+
+    def reject():
+        raise RuntimeError("busy")
+
+    with pytest.raises(RuntimeError):
+        coalescer.stream("key", model_stream(model), admit=reject)
+    assert model.call_count == 0
+    assert coalescer.stats() == {"upstream_calls": 0, "coalesced": 0, "cancelled": 0, "in_flight": 0}
+    assert "".join(coalescer.stream("key", model_stream(model), admit=lambda: None)) == REPLY
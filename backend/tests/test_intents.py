@@ -0,0 +1,65 @@
+# backend/tests/test_intents.py
+import pytest
+
+from app.core.intents import parse_command
+
+
+@pytest.mark.parametrize("prompt, expected", [
+    ("add 30 for coffee", ("add_expense", "30|food|coffee")),
+    ("Add 30 for coffee.", ("add_expense", "30|food|coffee")),
+    ("spent 200 on groceries", ("add_expense", "200|food|groceries")),
+    ("paid rs 150 for a cab", ("add_expense", "150|travel|cab")),
+    ("spent ₹99.50 on my netflix", ("add_expense", "99.50|entertainment|netflix")),
+    ("add 500 rupees for electricity bill", ("add_expense", "500|bills|electricity bill")),
+    ("pay inr 40 for metro", ("add_expense", "40|travel|metro")),
+    ("set budget to 1000", ("set_budget", "1000")),
+    ("Set my monthly budget at ₹5000", ("set_budget", "5000")),
+    ("update the budget 2500 rs", ("set_budget", "2500")),
+    ("what's my total?", ("get_expense_summary", "")),
+    ("show me my expenses", ("get_expense_summary", "")),
+    ("summary", ("get_expense_summary", "")),
+    ("how much did I spend this week?", ("get_expense_summary", "this week")),
+    ("total spending for this month", ("get_expense_summary", "this month")),
+    ("budget status", ("get_budget_status", "")),
+    ("what is my budget", ("get_budget_status", "")),
+    ("how much is left?", ("get_budget_status", "")),
+    ("how much do i have left", ("get_budget_status", "")),
+    ("calculate 50*10", ("calculate", "50*10")),
+    ("what is (12 + 8) / 4", ("calculate", "(12 + 8) / 4")),
+    ("what's 7 % 3", ("calculate", "7 % 3")),
+    ("compute 2**10 // 3", ("calculate", "2**10 // 3")),
+    ("what is -3 * (2 + 1.5)?", ("calculate", "-3 * (2 + 1.5)")),
+])
+def test_plain_commands_take_the_fast_path(prompt, expected):
+    assert parse_command(prompt) == expected
+
+
+@pytest.mark.parametrize("prompt", [
+    # Non-rupee amounts would silently be booked as rupees
+    "add $50 for groceries",
+    "spent 20 dollars on lunch",
+    "paid 15 bucks for a taxi",
+    # No category, or more than one
+    "add 30 for stuff",
+    "spent 300 on pizza and a movie",
+    # Not a positive amount
+    "add 0 for coffee",
+    # Anything with more to it than the bare command is the agent's job
+    "add 30 for coffee yesterday and 20 for tea",
+    "spent about 200 on groceries",
+    "i think i spent 200 on groceries",
+    "set budget to a thousand",
+    "delete my last expense",
+    "how much did i spend on food last month",
+    "what is the capital of france",
+    "calculate 50",
+    # A trailing operator is a percentage or a typo, not arithmetic
+    "what is 10%",
+    "what's 15% of 200",
+    "calculate 5 +",
+    "what is 3 + * 4",
+    "what is 2 ** 3 ** 4 plus my rent",
+    "",
+])
+def test_everything_else_falls_through_to_the_agent(prompt):
+    assert parse_command(prompt) is None
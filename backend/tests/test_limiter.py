@@ -0,0 +1,118 @@
+# backend/tests/test_limiter.py
+import threading
+
+import pytest
+
+from app.core.agents import get_llm
+from app.core.fake_llm import FakeLLMError, FakeStreamingChatModel
+from app.core.limiter import AdaptiveLimiter, LimiterBusy, LimiterCallbackHandler, PRIORITY_SUMMARY
+from app.core.long_summary import split_text, summarize_long
+
+
+class RecordingLimiter(AdaptiveLimiter):
+    """Remembers the most permits it ever had out at once."""
+
+    peak = 0
+
+    def acquire(self, priority, timeout=-1):
+        permit = super().acquire(priority, timeout)
+        with self._cond:
+            self.peak = max(self.peak, self.in_flight)
+        return permit
+
+
+def make_limiter(limit=2, queue_timeout=5.0, cls=AdaptiveLimiter):
+    return cls(rate=0, burst=1, min_limit=1, max_limit=limit, max_queue=16, queue_timeout=queue_timeout)
+
+
+def test_every_chunk_call_of_a_long_summary_takes_a_permit(monkeypatch):
+    model = get_llm()
+    monkeypatch.setattr(model, "ttft", 0.02)
+    limiter = make_limiter(limit=2, cls=RecordingLimiter)
+    text = "budget stream model latency summary expense worker chunk token request. " * 3000
+    calls_before = model.call_count
+
+    events = list(summarize_long(text, [LimiterCallbackHandler(limiter, PRIORITY_SUMMARY)]))
+
+    calls = model.call_count - calls_before
+    assert calls > len(split_text(text)) > 2
+    assert events[-1][0] == "text"
+    assert limiter.admitted == calls
+    assert limiter.peak == 2
+    assert limiter.in_flight == 0
+
+
+def test_call_that_cannot_get_a_permit_fails_before_reaching_the_model():
+    limiter = make_limiter(limit=1)
+    held = limiter.acquire(PRIORITY_SUMMARY)
+    model = FakeStreamingChatModel()
+    with pytest.raises(LimiterBusy):
+        model.invoke("hi", config={"callbacks": [LimiterCallbackHandler(limiter, timeout=0.05)]})
+    assert model.call_count == 0
+    held.release()
+    assert limiter.stats()["in_flight"] == 0 and limiter.stats()["queued"] == 0
+
+
+def test_failed_call_releases_its_permit_and_shrinks_the_limit():
+    limiter = make_limiter(limit=8)
+    model = FakeStreamingChatModel(error_rate=1.0)
+    with pytest.raises(FakeLLMError):
+        list(model.stream("hi", config={"callbacks": [LimiterCallbackHandler(limiter)]}))
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["throttled"] == 1
+    assert limiter.limit == 4
+
+
+def test_admit_reserves_nothing_and_rejects_only_when_backed_up():
+    limiter = make_limiter(limit=1, queue_timeout=0)
+    limiter.admit()
+    assert limiter.stats()["in_flight"] == 0
+    held = limiter.acquire(PRIORITY_SUMMARY)
+    with pytest.raises(LimiterBusy) as busy:
+        limiter.admit()
+    assert busy.value.position == 1 and busy.value.retry_after >= 1
+    held.release()
+    limiter.admit()
+
+
+def test_interactive_calls_overtake_queued_batch_calls():
+    limiter = make_limiter(limit=1)
+    held = limiter.acquire(0)
+    order = []
+
+    def call(priority):
+        with limiter.acquire(priority, timeout=None):
+            order.append(priority)
+
+    threads = [threading.Thread(target=call, args=(2,)), threading.Thread(target=call, args=(0,))]
+    threads[0].start()
+    while limiter.stats()["queued"] < 1:
+        pass
+    threads[1].start()
+    while limiter.stats()["queued"] < 2:
+        pass
+    held.release()
+    for thread in threads:
+        thread.join()
+    assert order == [0, 2]
+
+
+class Interrupted(BaseException):
+    """Stands in for gevent.Timeout, which is not an Exception."""
+
+
+def test_interrupted_wait_leaves_the_queue(monkeypatch):
+    limiter = make_limiter(limit=1)
+    held = limiter.acquire(PRIORITY_SUMMARY)
+
+    def interrupt(timeout=None):
+        raise Interrupted()
+
+    monkeypatch.setattr(limiter._cond, "wait", interrupt)
+    with pytest.raises(Interrupted):
+        limiter.acquire(PRIORITY_SUMMARY, timeout=None)
+    monkeypatch.undo()
+    assert limiter.stats()["queued"] == 0
+    held.release()
+    limiter.acquire(PRIORITY_SUMMARY, timeout=0.1).release()
+    assert limiter.stats()["in_flight"] == 0
@@ -0,0 +1,87 @@
+# backend/tests/test_metrics.py
+import time
+
+from app.core.fake_llm import FakeStreamingChatModel
+from app.core.metrics import ALL_METRICS, Counter, Histogram, MetricsCallbackHandler, instrument_stream, render_metrics
+
+# Per-operation budgets, well above the few microseconds measured locally so
+# a slow CI machine does not fail them, but far below a model call.
+OBSERVE_BUDGET_SECONDS = 50e-6
+CALLBACK_BUDGET_SECONDS = 2e-3
+STREAM_CHUNK_BUDGET_SECONDS = 20e-6
+
+
+def test_histogram_renders_cumulative_buckets_with_le_labels():
+    histogram = Histogram("test_seconds", "Test latency.", ("endpoint",), buckets=(0.1, 1.0, 10.0))
+    for value in (0.05, 0.1, 0.5, 2.0, 2.0, 60.0):
+        histogram.observe(value, endpoint="qna")
+    histogram.observe(0.2, endpoint="summarize")
+
+    assert histogram.render() == [
+        "# HELP test_seconds Test latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{endpoint="qna",le="0.1"} 2',
+        'test_seconds_bucket{endpoint="qna",le="1.0"} 3',
+        'test_seconds_bucket{endpoint="qna",le="10.0"} 5',
+        'test_seconds_bucket{endpoint="qna",le="+Inf"} 6',
+        'test_seconds_sum{endpoint="qna"} 64.65',
+        'test_seconds_count{endpoint="qna"} 6',
+        'test_seconds_bucket{endpoint="summarize",le="0.1"} 0',
+        'test_seconds_bucket{endpoint="summarize",le="1.0"} 1',
+        'test_seconds_bucket{endpoint="summarize",le="10.0"} 1',
+        'test_seconds_bucket{endpoint="summarize",le="+Inf"} 1',
+        'test_seconds_sum{endpoint="summarize"} 0.2',
+        'test_seconds_count{endpoint="summarize"} 1',
+    ]
+
+
+def test_unlabelled_metrics_render_without_braces():
+    histogram = Histogram("plain_seconds", "Plain.", buckets=(1.0,))
+    histogram.observe(3.0)
+    counter = Counter("plain_total", "Plain count.")
+    counter.inc()
+    counter.inc(2)
+
+    assert histogram.render()[2:] == ['plain_seconds_bucket{le="1.0"} 0', 'plain_seconds_bucket{le="+Inf"} 1',
+                                      "plain_seconds_sum 3.0", "plain_seconds_count 1"]
+    assert counter.render() == ["# HELP plain_total Plain count.", "# TYPE plain_total counter", "plain_total 3.0"]
+
+
+def test_render_metrics_declares_every_metric_once():
+    text = render_metrics()
+    assert text.endswith("\n")
+    for metric in ALL_METRICS:
+        assert text.count(f"# TYPE {metric.name} ") == 1
+
+
+def test_observation_overhead_is_within_budget():
+    histogram = Histogram("overhead_seconds", "Overhead.", ("endpoint",))
+    rounds = 20_000
+    started = time.perf_counter()
+    for index in range(rounds):
+        histogram.observe(index * 1e-4, endpoint="qna")
+    assert (time.perf_counter() - started) / rounds < OBSERVE_BUDGET_SECONDS
+
+
+def test_callback_and_stream_overhead_is_within_budget():
+    model = FakeStreamingChatModel(responses=["one two three four five six seven eight"])
+
+    def per_call(config, rounds=200):
+        best = float("inf")
+        for _ in range(3):
+            started = time.perf_counter()
+            for _ in range(rounds):
+                for _ in model.stream("hi", config=config):
+                    pass
+            best = min(best, (time.perf_counter() - started) / rounds)
+        return best
+
+    bare = per_call({})
+    instrumented = per_call({"callbacks": [MetricsCallbackHandler("test")]})
+    assert instrumented - bare < CALLBACK_BUDGET_SECONDS
+
+    chunks = 50_000
+    started = time.perf_counter()
+    for _ in instrument_stream("test", iter(range(chunks))):
+        pass
+    assert (time.perf_counter() - started) / chunks < STREAM_CHUNK_BUDGET_SECONDS
@@ -0,0 +1,92 @@
+# backend/tests/test_prompt_cache.py
+import json
+import uuid
+
+import pytest
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from app.core import agents
+from app.core.fake_llm import FakeStreamingChatModel
+from app.core.long_summary import estimate_tokens
+from app.core.prompt_cache import PromptCacheAccounting, PromptCacheCallbackHandler
+from app.core.store import current_tenant
+from config import Config
+
+TURNS = [
+    ("add 37 for coffee", ""),
+    ("and 213 for groceries", "Human: add 37 for coffee\nAI: Added ₹37 for coffee"),
+    ("what's my total?", "Human: and 213 for groceries\nAI: Added ₹213 for groceries"),
+]
+REPLIES = {"react": "Thought: done\nFinal Answer: ok", "tool_calling": "ok"}
+
+
+@pytest.fixture(autouse=True)
+def tenant():
+    token = current_tenant.set(f"test-{uuid.uuid4().hex}")
+    yield
+    current_tenant.reset(token)
+
+
+def cacheable_prefix(mode, system_prompt):
+    """The tool schemas (tool_calling only) and system message, as the accounting sees them."""
+    if mode == "react":
+        return system_prompt
+    tools = [convert_to_openai_tool(tool) for tool in agents.TYPED_EXPENSE_TOOLS]
+    return json.dumps(tools, sort_keys=True) + "\n" + system_prompt
+
+
+def run_turns(monkeypatch, mode, *accountings):
+    """The prompts the tracker agent sent for TURNS, as recorded by the fake model."""
+    model = FakeStreamingChatModel(responses=[REPLIES[mode]], record_prompts=len(TURNS))
+    monkeypatch.setattr(agents, "get_llm", lambda: model)
+    monkeypatch.setattr(Config, "TRACKER_AGENT_MODE", mode)
+    executor = agents._build_expense_agent_executor()
+    callbacks = [PromptCacheCallbackHandler("tracker", accounting) for accounting in accountings]
+    for user_input, history in TURNS:
+        executor.invoke({"input": user_input, "chat_history": history}, config={"callbacks": callbacks})
+    return model.recorded_prompts()
+
+
+@pytest.mark.parametrize("mode", ["react", "tool_calling"])
+def test_static_instructions_are_a_byte_identical_leading_prefix(monkeypatch, mode):
+    prompts = run_turns(monkeypatch, mode)
+    assert len(prompts) == len(TURNS)
+    assert all(prompt[0][0] == "system" for prompt in prompts)
+    assert len({prompt[0][1] for prompt in prompts}) == 1
+    # Everything that varies comes after the prefix
+    for prompt, (user_input, history) in zip(prompts, TURNS):
+        assert user_input not in prompt[0][1]
+        assert user_input in "".join(content for _, content in prompt[1:])
+        if history:
+            assert history.splitlines()[-1] not in prompt[0][1]
+
+
+@pytest.mark.parametrize("mode", ["react", "tool_calling"])
+def test_accounting_counts_the_prefix_only_above_the_provider_minimum(monkeypatch, mode):
+    counted, too_short = PromptCacheAccounting(), PromptCacheAccounting(min_prefix_tokens=10_000)
+    prompts = run_turns(monkeypatch, mode, counted, too_short)
+    prefix_tokens = estimate_tokens(cacheable_prefix(mode, prompts[0][0][1]))
+    rest_tokens = sum(estimate_tokens("\n".join(content for _, content in prompt[1:])) for prompt in prompts)
+
+    stats = counted.stats()
+    assert stats["calls"] == len(TURNS)
+    assert stats["cacheable_tokens"] == prefix_tokens * len(TURNS)
+    assert stats["dynamic_tokens"] == rest_tokens
+    assert (stats["prefix_reuses"], stats["distinct_prefixes"]) == (len(TURNS) - 1, 1)
+
+    stats = too_short.stats()
+    assert stats["cacheable_tokens"] == 0
+    assert stats["dynamic_tokens"] == prefix_tokens * len(TURNS) + rest_tokens
+    assert (stats["prefix_reuses"], stats["distinct_prefixes"]) == (0, 0)
+
+
+@pytest.mark.parametrize("mode", ["react", "tool_calling"])
+def test_the_static_prefix_is_cacheable_under_the_default_minimum(monkeypatch, mode):
+    accounting = PromptCacheAccounting(Config.PROMPT_CACHE_MIN_TOKENS)
+    prompts = run_turns(monkeypatch, mode, accounting)
+    assert estimate_tokens(cacheable_prefix(mode, prompts[0][0][1])) >= Config.PROMPT_CACHE_MIN_TOKENS == 1024
+
+    stats = accounting.stats()
+    assert stats["cacheable_tokens"] > 0
+    assert stats["cacheable_ratio"] > 0.5
+    assert stats["prefix_reuses"] == len(TURNS) - 1
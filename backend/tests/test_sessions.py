@@ -0,0 +1,135 @@
+# backend/tests/test_sessions.py
+import pytest
+
+from app.core.sessions import MemorySessionStore, SqliteSessionStore, trim_history
+
+
+class FakeClock:
+    """A clock the test advances by hand."""
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def memory_store(clock, max_sessions=3, idle_ttl=60.0, max_messages=10, max_session_bytes=1000,
+                 max_total_bytes=10_000):
+    return MemorySessionStore(max_sessions, idle_ttl, max_messages, max_session_bytes, max_total_bytes, clock=clock)
+
+
+def sqlite_store(db_path, clock, max_sessions=3, idle_ttl=60.0, max_messages=10, max_session_bytes=1000):
+    return SqliteSessionStore(db_path, max_sessions, idle_ttl, max_messages, max_session_bytes, clock=clock)
+
+
+def test_trim_history_keeps_the_newest_messages_within_both_caps():
+    history = ["a" * 10, "b" * 10, "c" * 10, "d" * 10]
+    assert trim_history(history, max_messages=3, max_bytes=1000) == history[1:]
+    assert trim_history(history, max_messages=10, max_bytes=25) == history[2:]
+    assert trim_history(["x" * 50], max_messages=10, max_bytes=25) == []
+
+
+def test_memory_store_evicts_the_least_recently_used_session(clock):
+    store = memory_store(clock)
+    for session_id in ("a", "b", "c"):
+        store.save(session_id, [session_id])
+        clock.advance(1)
+    store.get("a")  # "b" is now the least recently used
+    store.save("d", ["d"])
+
+    assert store.get("b") == []
+    assert [store.get(session_id) for session_id in ("a", "c", "d")] == [["a"], ["c"], ["d"]]
+    assert store.stats()["evictions"] == 1
+    assert store.stats()["active_sessions"] == 3
+
+
+def test_memory_store_expires_idle_sessions(clock):
+    store = memory_store(clock, idle_ttl=60.0)
+    store.save("old", ["hello"])
+    clock.advance(30)
+    store.save("recent", ["hi"])
+    clock.advance(30)
+    assert store.get("old") == ["hello"]  # exactly the TTL, and the read refreshes it
+
+    clock.advance(61)
+    assert store.get("old") == []
+    assert store.get("recent") == []
+    stats = store.stats()
+    assert (stats["expirations"], stats["active_sessions"], stats["bytes"]) == (2, 0, 0)
+
+
+def test_memory_store_trims_each_session_to_its_byte_cap(clock):
+    store = memory_store(clock, max_session_bytes=25)
+    store.save("a", ["a" * 10, "b" * 10, "c" * 10])
+    assert store.get("a") == ["b" * 10, "c" * 10]
+    assert store.stats()["bytes"] == 20
+
+
+def test_memory_store_evicts_to_stay_under_the_total_byte_cap(clock):
+    store = memory_store(clock, max_sessions=100, max_total_bytes=50)
+    for session_id in ("a", "b", "c"):
+        store.save(session_id, [session_id * 20])
+        clock.advance(1)
+
+    assert store.get("a") == []
+    assert store.get("b") == ["b" * 20]
+    assert store.get("c") == ["c" * 20]
+    stats = store.stats()
+    assert (stats["bytes"], stats["evictions"]) == (40, 1)
+
+
+def test_memory_store_resaving_a_session_replaces_its_bytes(clock):
+    store = memory_store(clock)
+    store.save("a", ["x" * 100])
+    store.save("a", ["y" * 10])
+    assert store.stats()["bytes"] == 10
+    assert store.get("a") == ["y" * 10]
+
+
+def test_sqlite_store_purges_expired_sessions_on_write(db_path, clock):
+    store = sqlite_store(db_path, clock, idle_ttl=60.0)
+    store.save("old", ["hello"])
+    clock.advance(61)
+    assert store.get("old") == []  # reads hide it, writes delete it
+    assert store.stats()["active_sessions"] == 1
+
+    store.save("new", ["hi"])
+    stats = store.stats()
+    assert (stats["active_sessions"], stats["expirations"]) == (1, 1)
+    assert store.get("new") == ["hi"]
+
+
+def test_sqlite_store_purges_the_least_recently_used_sessions_over_the_cap(db_path, clock):
+    store = sqlite_store(db_path, clock, max_sessions=3)
+    for session_id in ("a", "b", "c"):
+        store.save(session_id, [session_id])
+        clock.advance(1)
+    store.get("a")
+    clock.advance(1)
+    store.save("d", ["d"])
+
+    assert store.get("b") == []
+    assert [store.get(session_id) for session_id in ("a", "c", "d")] == [["a"], ["c"], ["d"]]
+    stats = store.stats()
+    assert (stats["active_sessions"], stats["evictions"]) == (3, 1)
+
+
+def test_sqlite_store_trims_each_session_to_its_byte_cap(db_path, clock):
+    store = sqlite_store(db_path, clock, max_messages=2, max_session_bytes=1000)
+    store.save("a", ["one", "two", "three"])
+    assert store.get("a") == ["two", "three"]
+    assert store.stats()["bytes"] == len("twothree")
+
+
+def test_sqlite_store_is_shared_between_store_instances(db_path, clock):
+    sqlite_store(db_path, clock).save("a", ["hello"])
+    assert sqlite_store(db_path, clock).get("a") == ["hello"]
@@ -0,0 +1,114 @@
+# backend/tests/test_store.py
+import random
+import sqlite3
+import threading
+
+import pytest
+
+from app.core.store import ExpenseStore
+
+
+def test_add_expense_returns_increasing_ids_and_persists(db_path):
+    store = ExpenseStore(db_path)
+    first = store.add_expense(12.5, "Food", "lunch", tenant="a")
+    second = store.add_expense(3.0, "travel", "bus", tenant="a")
+    assert second["id"] > first["id"]
+    assert first["category"] == "food"
+
+    reopened = ExpenseStore(db_path)
+    assert reopened.count(tenant="a") == 2
+    assert reopened.total_spent(tenant="a") == pytest.approx(15.5)
+    assert [e["id"] for e in reopened.recent_expenses(5, tenant="a")] == [second["id"], first["id"]]
+
+
+def test_add_expenses_writes_a_batch(db_path):
+    store = ExpenseStore(db_path)
+    rows = [(float(i), "Food" if i % 2 else "travel", f"item {i}", None) for i in range(1, 1001)]
+    assert store.add_expenses(rows, tenant="a") == 1000
+    assert store.count(tenant="a") == 1000
+    assert store.total_spent(tenant="a") == pytest.approx(sum(range(1, 1001)))
+    assert store.category_totals(tenant="a") == {
+        "food": pytest.approx(sum(range(1, 1001, 2))),
+        "travel": pytest.approx(sum(range(2, 1001, 2))),
+    }
+    assert store.recent_expenses(1, tenant="a")[0]["description"] == "item 1000"
+    assert store.verify_aggregates(tenant="a") == []
+
+
+def test_add_expenses_is_all_or_nothing(db_path):
+    store = ExpenseStore(db_path)
+    store.add_expense(5.0, "food", "kept", tenant="a")
+    with pytest.raises(sqlite3.IntegrityError):
+        store.add_expenses([(1.0, "food", "ok", None), (None, "food", "bad", None)], tenant="a")
+    assert store.count(tenant="a") == 1
+    assert store.total_spent(tenant="a") == pytest.approx(5.0)
+    assert store.verify_aggregates(tenant="a") == []
+
+
+def test_tenants_do_not_see_each_others_expenses_or_budget(db_path):
+    store = ExpenseStore(db_path, shards=2)
+    store.add_expense(10.0, "food", "mine", tenant="a")
+    store.add_expenses([(7.0, "food", "theirs", None)], tenant="b")
+    store.set_budget(100.0, tenant="a")
+    assert store.total_spent(tenant="a") == pytest.approx(10.0)
+    assert store.total_spent(tenant="b") == pytest.approx(7.0)
+    assert store.get_budget(tenant="b")["amount"] is None
+    assert store.delete_expense(store.recent_expenses(1, tenant="b")[0]["id"], tenant="a") is None
+
+
+
+def _random_operation(rng, store, tenant, ids, ids_lock):
+    action = rng.random()
+    if action < 0.45:
+        expense = store.add_expense(round(rng.uniform(1, 100), 2), rng.choice(("food", "rent")), "x", tenant=tenant)
+        with ids_lock:
+            ids[tenant].append(expense["id"])
+    elif action < 0.55:
+        store.add_expenses([(round(rng.uniform(1, 100), 2), "travel", "batch", None)] * 3, tenant=tenant)
+    elif action < 0.85:
+        with ids_lock:
+            expense_id = ids[tenant].pop(rng.randrange(len(ids[tenant]))) if ids[tenant] else None
+        if expense_id is not None:
+            store.delete_expense(expense_id, tenant=tenant)
+    else:
+        store.total_spent(tenant=tenant)
+
+
+def test_aggregates_stay_exact_across_interleaved_writes_and_eviction(db_path):
+    # Two stores on the same files stand in for two gunicorn workers; with two
+    # hot tenants out of four, switching tenants keeps evicting and reloading.
+    workers = (ExpenseStore(db_path, shards=2, hot_tenants=2), ExpenseStore(db_path, shards=2, hot_tenants=2))
+    tenants = [f"tenant-{index}" for index in range(4)]
+    ids = {tenant: [] for tenant in tenants}
+    rng = random.Random(11)
+    for _ in range(300):
+        store, tenant = rng.choice(workers), rng.choice(tenants)
+        _random_operation(rng, store, tenant, ids, threading.Lock())
+        # Checked on the store that just wrote, whose aggregates were updated
+        # in place rather than reloaded.
+        assert store.verify_aggregates(tenant=tenant) == []
+    assert workers[0].evictions and workers[1].evictions
+    for tenant in tenants:
+        assert workers[0].total_spent(tenant=tenant) == pytest.approx(workers[1].total_spent(tenant=tenant))
+        assert workers[0].recent_expenses(5, tenant=tenant) == workers[1].recent_expenses(5, tenant=tenant)
+
+
+def test_aggregates_stay_exact_under_concurrent_writers(db_path):
+    workers = (ExpenseStore(db_path, shards=2, hot_tenants=2), ExpenseStore(db_path, shards=2, hot_tenants=2))
+    tenants = [f"tenant-{index}" for index in range(4)]
+    ids = {tenant: [] for tenant in tenants}
+    ids_lock = threading.Lock()
+
+    def run(seed):
+        rng = random.Random(seed)
+        for _ in range(150):
+            _random_operation(rng, rng.choice(workers), rng.choice(tenants), ids, ids_lock)
+
+    threads = [threading.Thread(target=run, args=(seed,)) for seed in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for tenant in tenants:
+        for store in workers:
+            assert store.verify_aggregates(tenant=tenant) == []
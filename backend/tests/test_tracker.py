@@ -0,0 +1,126 @@
+# backend/tests/test_tracker.py
+import pytest
+
+from app.api import tracker
+from app.core.identity import sign_user
+from app.core.store import DEFAULT_TENANT, current_tenant, expense_store
+from config import Config
+
+
+class Interrupted(BaseException):
+    """Stands in for gevent.Timeout, which is not an Exception."""
+
+
+@pytest.fixture
+def auth(monkeypatch):
+    """Authorization headers for a user, signed with a test secret."""
+    monkeypatch.setattr(Config, "USER_TOKEN_SECRET", "test-secret")
+    return lambda user_id: {"Authorization": f"Bearer {sign_user(user_id)}"}
+
+
+def test_tenant_is_reset_when_the_agent_is_interrupted(client, monkeypatch, auth):
+    class Executor:
+        def invoke(self, inputs, config=None):
+            assert current_tenant.get() == "user:u1"
+            raise Interrupted()
+
+    monkeypatch.setattr(tracker, "get_expense_agent_executor", lambda: Executor())
+    with pytest.raises(Interrupted):
+        client.post("/api/tracker", json={"prompt": "tell me about my spending"}, headers=auth("u1"))
+    assert current_tenant.get() == DEFAULT_TENANT
+
+
+def test_a_user_id_in_the_body_is_refused(client):
+    expense_store.add_expense(99.0, "private", "alice secret rent", tenant="user:alice")
+    response = client.post("/api/tracker", json={"prompt": "what's my total?", "user_id": "alice"})
+    assert response.status_code == 403
+    assert b"alice secret rent" not in response.data
+
+
+def test_users_are_identified_by_a_verified_token(client, auth):
+    client.post("/api/tracker", json={"prompt": "add ₹20 for coffee"}, headers=auth("carol"))
+    assert expense_store.total_spent(tenant="user:carol") == pytest.approx(20)
+
+    forged = {"Authorization": "Bearer carol." + "0" * 64}
+    for headers in (forged, {"Authorization": "carol"}, {"Authorization": "Bearer carol"}):
+        response = client.post("/api/tracker", json={"prompt": "what's my total?"}, headers=headers)
+        assert response.status_code == 401
+    assert expense_store.total_spent(tenant="user:carol") == pytest.approx(20)
+
+
+def test_tokens_do_not_verify_without_a_secret(client, monkeypatch, auth):
+    headers = auth("carol")
+    monkeypatch.setattr(Config, "USER_TOKEN_SECRET", "")
+    assert client.post("/api/tracker", json={"prompt": "hi"}, headers=headers).status_code == 401
+
+
+def exported(client, query):
+    return client.get(f"/api/tracker/export?format=json&{query}").get_json()
+
+
+def test_clients_without_a_user_share_the_default_ledger(client, monkeypatch):
+    monkeypatch.setattr(Config, "EXPENSE_TENANCY", "shared")
+    expense_store.add_expense(11.0, "misc", "written earlier", tenant=DEFAULT_TENANT)
+    client.post("/api/tracker", json={"prompt": "add ₹20 for coffee", "session_id": "page-load-1"})
+
+    # A new session (e.g. after a reload) still sees both
+    descriptions = {row["description"] for row in exported(client, "session_id=page-load-2")}
+    assert {"written earlier", "coffee"} <= descriptions
+    assert tracker.resolve_tenant(None, "page-load-2") == DEFAULT_TENANT
+
+
+def test_session_tenancy_gives_each_session_its_own_ledger(client, monkeypatch):
+    monkeypatch.setattr(Config, "EXPENSE_TENANCY", "session")
+    client.post("/api/tracker", json={"prompt": "add ₹20 for coffee", "session_id": "own-1"})
+
+    assert [row["description"] for row in exported(client, "session_id=own-1")] == ["coffee"]
+    assert exported(client, "session_id=own-2") == []
+    assert client.get("/api/tracker/export").status_code == 400
+
+
+@pytest.mark.parametrize("path", ["/api/tracker/report", "/api/tracker/export"])
+def test_reports_and_exports_refuse_a_user_id(client, path):
+    expense_store.add_expense(99.0, "private", "alice's rent", tenant="user:alice")
+    response = client.get(f"{path}?user_id=alice")
+    assert response.status_code == 403
+    assert b"alice's rent" not in response.data
+    assert client.get(f"{path}?user_id=alice&session_id=mine").status_code == 403
+
+
+def test_reports_and_exports_serve_the_authenticated_users_ledger(client, auth):
+    client.post("/api/tracker", json={"prompt": "add ₹20 for coffee"}, headers=auth("dave"))
+    client.post("/api/tracker", json={"prompt": "add ₹45 for lunch"}, headers=auth("erin"))
+
+    rows = client.get("/api/tracker/export?format=json", headers=auth("dave")).get_json()
+    assert [row["description"] for row in rows] == ["coffee"]
+    report = client.get("/api/tracker/report", headers=auth("erin")).get_json()
+    assert [expense["description"] for expense in report["top_expenses"]] == ["lunch"]
+    assert client.get("/api/tracker/report", headers={"Authorization": "Bearer dave.forged"}).status_code == 401
+
+
+def test_one_caller_cannot_read_another_tenants_ledger(client, monkeypatch, auth):
+    expense_store.add_expense(99.0, "private", "alice secret rent", tenant="user:alice")
+    assert b"alice secret rent" in client.post(
+        "/api/tracker", json={"prompt": "what's my total?"}, headers=auth("alice")).data
+
+    monkeypatch.setattr(Config, "EXPENSE_TENANCY", "session")
+    callers = [
+        {"json": {"prompt": "what's my total?"}, "headers": auth("mallory")},
+        {"json": {"prompt": "what's my total?", "session_id": "alice"}},
+        {"json": {"prompt": "what's my total?", "session_id": "user:alice"}},
+        {"json": {"prompt": "what's my total?", "user_id": "alice"}, "headers": auth("mallory")},
+    ]
+    for caller in callers:
+        assert b"alice secret rent" not in client.post("/api/tracker", **caller).data
+    for path in ("/api/tracker/report?session_id=alice", "/api/tracker/export?format=json&session_id=alice"):
+        assert b"alice secret rent" not in client.get(path, headers=auth("mallory")).data
+        assert b"alice secret rent" not in client.get(path).data
+
+
+def test_a_session_cannot_read_another_sessions_ledger(client, monkeypatch):
+    monkeypatch.setattr(Config, "EXPENSE_TENANCY", "session")
+    client.post("/api/tracker", json={"prompt": "add ₹20 for coffee", "session_id": "owner"})
+
+    report = client.get("/api/tracker/report?session_id=someone-else").get_json()
+    assert report["totals"] == [] and report["top_expenses"] == []
+    assert client.get("/api/tracker/report").status_code == 400
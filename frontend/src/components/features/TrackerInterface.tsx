@@ -5,6 +5,14 @@ import { Card } from "@/components/ui/card";
 import { Loader2, Send, User, Bot, Trash2, Brain } from "lucide-react";
 import ReactMarkdown from "react-markdown";
 
+const SESSION_STORAGE_KEY = "tracker_session_id";
+
+const newSessionId = () => {
+  const id = `session_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+  localStorage.setItem(SESSION_STORAGE_KEY, id);
+  return id;
+};
+
 interface Message {
   role: "user" | "ai";
   content: string;
@@ -15,15 +23,16 @@ const TrackerInterface = () => {
   const [chatHistory, setChatHistory] = useState<Message[]>([
     {
       role: "ai",
-      content: "Hi! I'm your expense tracker. You can add expenses like 'add $20 for coffee' or ask me 'what's my total spending?'"
+      content: "Hi! I'm your expense tracker. You can add expenses like 'add ₹20 for coffee' or ask me 'what's my total spending?'"
     }
   ]);
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
   const [streamingMessage, setStreamingMessage] = useState("");
   const [sessionId, setSessionId] = useState<string>(() => {
-    // Generate a unique session ID on mount
-    return `session_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`;
+    // Reuse the stored session ID so reloads keep the conversation (and,
+    // with per-session ledgers, the expenses)
+    return localStorage.getItem(SESSION_STORAGE_KEY) || newSessionId();
   });
   const chatEndRef = useRef<HTMLDivElement>(null);
 
@@ -93,10 +102,10 @@ const TrackerInterface = () => {
     setChatHistory([
       {
         role: "ai",
-        content: "Hi! I'm your expense tracker. You can add expenses like 'add $20 for coffee' or ask me 'what's my total spending?'"
+        content: "Hi! I'm your expense tracker. You can add expenses like 'add ₹20 for coffee' or ask me 'what's my total spending?'"
       }
     ]);
-    setSessionId(`session_${Date.now()}_${Math.random().toString(36).substr(2, 9)}`);
+    setSessionId(newSessionId());
     setError(null);
     setStreamingMessage("");
   };
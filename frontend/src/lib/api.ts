@@ -42,7 +42,7 @@ export async function summarizeText(text: string): Promise<{ summary: string }>
 
 /**
  * Sends a prompt to the expense tracker agent.
- * @param prompt The user's command or question (e.g., "add $20 for coffee").
+ * @param prompt The user's command or question (e.g., "add ₹20 for coffee").
  * @returns A promise that resolves to the agent's response object.
  */
 export async function sendTrackerPrompt(prompt: string): Promise<{ response: string }> {